@@ -0,0 +1,3 @@
+"""
+Benchmarks del bot contra servidores locales que imitan OpenRouter y Twitter
+"""
@@ -0,0 +1,234 @@
+"""
+Servidores locales que imitan OpenRouter (chat completions, JSON o SSE) y la
+API v2 de Twitter, con latencia, errores y 429 inyectables
+"""
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+import asyncio
+import itertools
+import json
+import random
+import time
+
+from aiohttp import web
+
+# Vocabulario para que los tweets generados no sean casi duplicados entre sí
+_WORDS = (
+    "bruh woof chihuahua web3 ip blockchain story protocol licencia royalties nft "
+    "remix creador derechos onchain territorio colita ladra sassy hueso patita "
+    "galleta siesta zoomies modular programable atribución comunidad builders"
+).split()
+
+@dataclass
+class FaultProfile:
+    """Comportamiento inyectado en un servidor falso"""
+    latency: float = 0.0  # Segundos antes de responder
+    jitter: float = 0.0  # Segundos aleatorios extra (uniforme entre 0 y jitter)
+    error_rate: float = 0.0  # Probabilidad de responder 500
+    rate_limit_rate: float = 0.0  # Probabilidad de responder 429
+    rate_limit_reset: int = 1  # Segundos hasta el reset anunciado en un 429
+
+@dataclass
+class ServerStats:
+    requests: Dict[str, int] = field(default_factory=dict)
+    errors: int = 0
+    rate_limited: int = 0
+
+class FakeServers:
+    """
+    Un solo servidor aiohttp con las rutas de OpenRouter y Twitter v2.
+    Las URLs quedan en `openrouter_url` y `twitter_url` para inyectarlas en Config.
+    """
+
+    def __init__(
+        self,
+        llm: Optional[FaultProfile] = None,
+        twitter: Optional[FaultProfile] = None,
+        candidates: int = 3,
+        stream_chunks: int = 8,
+        seed: int = 0
+    ):
+        self.llm = llm or FaultProfile()
+        self.twitter = twitter or FaultProfile()
+        self.candidates = candidates
+        self.stream_chunks = stream_chunks
+        self.stats = ServerStats()
+        self._random = random.Random(seed)
+        self._ids = itertools.count(10 ** 18)
+        self._runner: Optional[web.AppRunner] = None
+        self.base_url: Optional[str] = None
+
+    @property
+    def openrouter_url(self) -> str:
+        return f"{self.base_url}/api/v1/chat/completions"
+
+    @property
+    def twitter_url(self) -> str:
+        return self.base_url
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> None:
+        app = web.Application()
+        app.router.add_post("/api/v1/chat/completions", self._chat_completions)
+        app.router.add_get("/2/users/me", self._users_me)
+        app.router.add_get("/2/users/{id}/mentions", self._mentions)
+        app.router.add_get("/2/tweets/search/recent", self._search)
+        app.router.add_post("/2/tweets", self._create_tweet)
+        app.router.add_get("/2/tweets", self._lookup_tweets)
+
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        # Con port=0 el sistema elige un puerto libre
+        port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f"http://{host}:{port}"
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _inject(self, route: str, profile: FaultProfile) -> Optional[web.Response]:
+        """Aplicar latencia y, si toca, devolver un error inyectado"""
+        self.stats.requests[route] = self.stats.requests.get(route, 0) + 1
+        delay = profile.latency + (self._random.uniform(0, profile.jitter) if profile.jitter else 0)
+        if delay:
+            await asyncio.sleep(delay)
+
+        roll = self._random.random()
+        if roll < profile.rate_limit_rate:
+            self.stats.rate_limited += 1
+            return web.json_response(
+                {"title": "Too Many Requests", "detail": "Too Many Requests", "status": 429},
+                status=429,
+                headers={
+                    "x-rate-limit-limit": "300",
+                    "x-rate-limit-remaining": "0",
+                    "x-rate-limit-reset": str(int(time.time()) + profile.rate_limit_reset),
+                }
+            )
+        if roll < profile.rate_limit_rate + profile.error_rate:
+            self.stats.errors += 1
+            return web.json_response({"error": {"message": "injected failure"}}, status=500)
+        return None
+
+    def _rate_limit_headers(self) -> Dict[str, str]:
+        return {
+            "x-rate-limit-limit": "100000",
+            "x-rate-limit-remaining": "99999",
+            "x-rate-limit-reset": str(int(time.time()) + 900),
+        }
+
+    def _tweet_text(self) -> str:
+        words = self._random.sample(_WORDS, 12)
+        return " ".join(words) + " #StoryProtocol #Web3"
+
+    # --- OpenRouter ---
+
+    async def _chat_completions(self, request: web.Request) -> web.StreamResponse:
+        payload = await request.json()
+        error = await self._inject("chat_completions", self.llm)
+        if error is not None:
+            return error
+
+        content = "\n---\n".join(self._tweet_text() for _ in range(self.candidates))
+        usage = {"prompt_tokens": 400, "completion_tokens": len(content) // 4, "prompt_tokens_details": {"cached_tokens": 0}}
+        if not payload.get("stream"):
+            return web.json_response({
+                "id": f"gen-{next(self._ids)}",
+                "model": payload.get("model"),
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                "usage": usage,
+            })
+
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        await response.write(b": OPENROUTER PROCESSING\n\n")
+        size = max(1, len(content) // self.stream_chunks + 1)
+        for start in range(0, len(content), size):
+            event = {"choices": [{"index": 0, "delta": {"content": content[start:start + size]}}]}
+            await response.write(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+            await asyncio.sleep(0)
+        await response.write(f"data: {json.dumps({'choices': [], 'usage': usage})}\n\n".encode("utf-8"))
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+
+    # --- Twitter v2 ---
+
+    async def _users_me(self, request: web.Request) -> web.Response:
+        error = await self._inject("users_me", self.twitter)
+        if error is not None:
+            return error
+        return web.json_response(
+            {"data": {"id": "1000", "name": "Bruh", "username": "bruhbot"}},
+            headers=self._rate_limit_headers()
+        )
+
+    async def _mentions(self, request: web.Request) -> web.Response:
+        error = await self._inject("mentions", self.twitter)
+        if error is not None:
+            return error
+        data = []
+        for _ in range(10):
+            tweet_id = str(next(self._ids))
+            data.append({
+                "id": tweet_id,
+                "text": f"@bruhbot {self._tweet_text()}",
+                "conversation_id": tweet_id,
+                "author_id": "2000",
+                "created_at": "2024-01-01T00:00:00.000Z",
+                "edit_history_tweet_ids": [tweet_id],
+            })
+        return web.json_response(
+            {"data": data, "meta": {"result_count": len(data)}},
+            headers=self._rate_limit_headers()
+        )
+
+    async def _search(self, request: web.Request) -> web.Response:
+        error = await self._inject("search", self.twitter)
+        if error is not None:
+            return error
+        conversation_id = request.query.get("query", "").split(":")[-1] or "1"
+        data = [{
+            "id": conversation_id,
+            "text": self._tweet_text(),
+            "conversation_id": conversation_id,
+            "created_at": "2024-01-01T00:00:00.000Z",
+            "edit_history_tweet_ids": [conversation_id],
+        }]
+        return web.json_response(
+            {"data": data, "meta": {"result_count": 1}},
+            headers=self._rate_limit_headers()
+        )
+
+    async def _create_tweet(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        error = await self._inject("create_tweet", self.twitter)
+        if error is not None:
+            return error
+        tweet_id = str(next(self._ids))
+        return web.json_response(
+            {"data": {"id": tweet_id, "text": body.get("text", ""), "edit_history_tweet_ids": [tweet_id]}},
+            status=201,
+            headers=self._rate_limit_headers()
+        )
+
+    async def _lookup_tweets(self, request: web.Request) -> web.Response:
+        error = await self._inject("lookup_tweets", self.twitter)
+        if error is not None:
+            return error
+        data = [{
+            "id": tweet_id,
+            "text": self._tweet_text(),
+            "edit_history_tweet_ids": [tweet_id],
+            "public_metrics": {
+                "retweet_count": self._random.randint(0, 20),
+                "reply_count": self._random.randint(0, 10),
+                "like_count": self._random.randint(0, 100),
+                "quote_count": self._random.randint(0, 5),
+                "bookmark_count": self._random.randint(0, 5),
+                "impression_count": self._random.randint(100, 5000),
+            },
+        } for tweet_id in request.query.get("ids", "").split(",") if tweet_id]
+        return web.json_response({"data": data}, headers=self._rate_limit_headers())
@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+Benchmarks de throughput y latencia contra servidores locales falsos.
+
+Uso:
+    python benchmarks/run_benchmarks.py --requests 200 --concurrency 10
+    python benchmarks/run_benchmarks.py --stream --rate-limit-rate 0.05
+    python benchmarks/run_benchmarks.py --compare benchmarks/results/<anterior>.json
+
+Cada corrida guarda un JSON en benchmarks/results/ con el commit actual para
+poder comparar regresiones entre commits.
+"""
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.fake_servers import FakeServers, FaultProfile
+from src.config import Config
+from src.logging_setup import setup_logging
+
+logger = logging.getLogger(__name__)
+
+RESULTS_DIR = ROOT / "benchmarks" / "results"
+
+# Métricas que se comparan con --compare y si subir es mejor
+COMPARED_METRICS = {"ops_per_sec": True, "p50_ms": False, "p99_ms": False, "loop_blocked_ms": False}
+REGRESSION_THRESHOLD = 10.0  # Variación porcentual a partir de la cual se marca una regresión
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Percentil por rango más cercano"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+class LoopMonitor:
+    """
+    Mide cuánto tarda el event loop en despertar una tarea que duerme `interval`.
+    El exceso sobre `threshold` se cuenta como tiempo bloqueado.
+    """
+
+    def __init__(self, interval: float = 0.005, threshold: float = 0.002):
+        self.interval = interval
+        self.threshold = threshold
+        self.blocked = 0.0
+        self.max_lag = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self) -> None:
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = time.perf_counter() - start - self.interval
+            self.max_lag = max(self.max_lag, lag)
+            if lag > self.threshold:
+                self.blocked += lag
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+async def measure(
+    name: str,
+    operation: Callable[[int], Awaitable[None]],
+    requests: int,
+    concurrency: int,
+    trace_memory: bool
+) -> Dict:
+    """Correr `operation` `requests` veces con `concurrency` tareas y resumir los tiempos"""
+    latencies: List[float] = []
+    errors = 0
+    counter = iter(range(requests))
+
+    async def worker() -> None:
+        nonlocal errors
+        for i in counter:
+            start = time.perf_counter()
+            try:
+                await operation(i)
+            except Exception as e:
+                errors += 1
+                logger.debug(f"[{name}] operación {i} falló: {str(e)}")
+                continue
+            latencies.append(time.perf_counter() - start)
+
+    if trace_memory:
+        tracemalloc.start()
+    monitor = LoopMonitor()
+    monitor.start()
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    duration = time.perf_counter() - start
+    await monitor.stop()
+    peak = None
+    if trace_memory:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    def ms(value: Optional[float]) -> Optional[float]:
+        return round(value * 1000, 3) if value is not None else None
+
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "ok": len(latencies),
+        "errors": errors,
+        "duration_s": round(duration, 4),
+        "ops_per_sec": round(len(latencies) / duration, 2) if duration else None,
+        "p50_ms": ms(percentile(latencies, 50)),
+        "p99_ms": ms(percentile(latencies, 99)),
+        "max_ms": ms(max(latencies) if latencies else None),
+        "loop_blocked_ms": ms(monitor.blocked),
+        "loop_max_lag_ms": ms(monitor.max_lag),
+        "tracemalloc_peak_kb": peak // 1024 if peak is not None else None,
+        "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+def bench_config(servers: FakeServers, data_dir: str, stream: bool) -> type:
+    """Config aislada que apunta a los servidores falsos y a un directorio temporal"""
+    return Config.for_persona({
+        "name": "bench",
+        "DATA_DIR": data_dir,
+        "OPENROUTER_API_URL": servers.openrouter_url,
+        "OPENROUTER_API_KEY": "bench",
+        "OPENROUTER_STREAM": stream,
+        "TWITTER_API_BASE_URL": servers.twitter_url,
+        "TWITTER_API_KEY": "bench",
+        "TWITTER_API_SECRET": "bench",
+        "TWITTER_ACCESS_TOKEN": "bench",
+        "TWITTER_ACCESS_TOKEN_SECRET": "bench",
+        "RATE_LIMIT_MARGIN": 0.0,
+        "LLM_CACHE_DISK": False,
+    })
+
+async def bench_llm(config: type, args: argparse.Namespace) -> Dict:
+    from src.llm.openrouter import OpenRouterClient
+
+    client = OpenRouterClient(config=config)
+    try:
+        async def operation(i: int) -> None:
+            await client.generate_tweet(f"Benchmark prompt {i}")
+        return await measure("llm", operation, args.requests, args.concurrency, args.trace_memory)
+    finally:
+        await client.close()
+
+async def bench_twitter(config: type, args: argparse.Namespace) -> Dict:
+    from src.twitter.api import TwitterAPI
+
+    api = TwitterAPI(config=config)
+    try:
+        async def operation(i: int) -> None:
+            if await api.post_tweet(f"benchmark tweet {i}") is None:
+                raise RuntimeError("post_tweet devolvió None")
+        return await measure("twitter", operation, args.requests, args.concurrency, args.trace_memory)
+    finally:
+        await api.close()
+
+async def bench_mentions(config: type, args: argparse.Namespace) -> Dict:
+    from src.twitter.api import TwitterAPI
+
+    api = TwitterAPI(config=config)
+    try:
+        async def operation(i: int) -> None:
+            mentions = await api.get_mentions(max_pages=1)
+            await asyncio.gather(*(api.get_tweet_thread(m["conversation_id"]) for m in mentions))
+        return await measure("mentions", operation, args.requests // 10 or 1, args.concurrency, args.trace_memory)
+    finally:
+        await api.close()
+
+async def bench_bot(config: type, args: argparse.Namespace) -> Dict:
+    from src.bot import BruhBot
+
+    bot = BruhBot(config=config)
+    try:
+        async def operation(i: int) -> None:
+            draft = await bot.generate_draft()
+            await bot.post_tweet(draft["content"], topic=draft["topic"])
+        return await measure("bot", operation, args.requests, args.concurrency, args.trace_memory)
+    finally:
+        await bot.close()
+
+SCENARIOS = {
+    "llm": bench_llm,
+    "twitter": bench_twitter,
+    "mentions": bench_mentions,
+    "bot": bench_bot,
+}
+
+def current_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(current: Dict, previous_path: str) -> None:
+    """Imprimir la variación porcentual respecto a una corrida anterior"""
+    with open(previous_path, 'r', encoding='utf-8') as f:
+        previous = json.load(f)
+    print(f"\nComparación contra {previous.get('commit')} ({previous_path}):")
+    for name, result in current["scenarios"].items():
+        before = previous.get("scenarios", {}).get(name)
+        if not before:
+            continue
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            old, new = before.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old * 100
+            regression = change < 0 if higher_is_better else change > 0
+            flag = "  <-- regresión" if regression and abs(change) >= REGRESSION_THRESHOLD else ""
+            print(f"  {name:<9} {metric:<16} {old:>10} -> {new:>10} ({change:+.1f}%){flag}")
+
+async def run(args: argparse.Namespace) -> Dict:
+    servers = FakeServers(
+        llm=FaultProfile(
+            latency=args.llm_latency,
+            jitter=args.jitter,
+            error_rate=args.error_rate,
+            rate_limit_rate=args.rate_limit_rate
+        ),
+        twitter=FaultProfile(
+            latency=args.twitter_latency,
+            jitter=args.jitter,
+            error_rate=args.error_rate,
+            rate_limit_rate=args.rate_limit_rate
+        ),
+        seed=args.seed
+    )
+    await servers.start()
+    results = {}
+    try:
+        for name in args.scenarios:
+            # Cada escenario arranca con historial, cola y caches vacíos
+            with tempfile.TemporaryDirectory() as data_dir:
+                config = bench_config(servers, data_dir, args.stream)
+                results[name] = await SCENARIOS[name](config, args)
+            print(
+                f"{name:<9} {results[name]['ops_per_sec']} ops/s  "
+                f"p50={results[name]['p50_ms']}ms  p99={results[name]['p99_ms']}ms  "
+                f"errores={results[name]['errors']}  loop bloqueado={results[name]['loop_blocked_ms']}ms"
+            )
+    finally:
+        await servers.stop()
+
+    return {
+        "commit": current_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "params": {
+            key: value for key, value in vars(args).items()
+            if key not in ("output", "compare")
+        },
+        "server": {
+            "requests": servers.stats.requests,
+            "injected_errors": servers.stats.errors,
+            "injected_429": servers.stats.rate_limited,
+        },
+        "scenarios": results,
+    }
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmarks del Bruh Bot contra servidores locales")
+    parser.add_argument("--scenarios", type=lambda s: s.split(","), default=list(SCENARIOS),
+                        help=f"Escenarios separados por coma ({', '.join(SCENARIOS)})")
+    parser.add_argument("--requests", type=int, default=200, help="Operaciones por escenario")
+    parser.add_argument("--concurrency", type=int, default=10, help="Operaciones en paralelo")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Latencia del OpenRouter falso (s)")
+    parser.add_argument("--twitter-latency", type=float, default=0.02, help="Latencia del Twitter falso (s)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Latencia aleatoria extra (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Probabilidad de responder 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Probabilidad de responder 429")
+    parser.add_argument("--stream", action="store_true", help="Usar el modo SSE de OpenRouter")
+    parser.add_argument("--trace-memory", action="store_true", help="Medir el pico de memoria con tracemalloc (más lento)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Archivo JSON de salida (por defecto benchmarks/results/<fecha>_<commit>.json)")
+    parser.add_argument("--compare", help="JSON de una corrida anterior para comparar")
+    args = parser.parse_args()
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Escenarios desconocidos: {', '.join(sorted(unknown))}")
+    return args
+
+def main() -> None:
+    setup_logging(level="WARNING", log_file="")
+    args = parse_args()
+    result = asyncio.run(run(args))
+
+    output = Path(args.output) if args.output else \
+        RESULTS_DIR / f"{time.strftime('%Y%m%d-%H%M%S')}_{result['commit'] or 'nocommit'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2, ensure_ascii=False)
+    print(f"\nResultados guardados en {output}")
+
+    if args.compare:
+        compare(result, args.compare)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark de arranque en frío: cuánto cuesta importar el bot y construirlo.
+
+Cada muestra corre en un intérprete nuevo para medir imports sin cache de
+sys.modules. Uso:
+    python benchmarks/startup.py --runs 20
+    python benchmarks/startup.py --compare benchmarks/results/<anterior>.json
+"""
+from pathlib import Path
+from typing import Dict, List
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.run_benchmarks import RESULTS_DIR, compare, current_commit, percentile
+
+# Script que corre en el proceso hijo e imprime los tiempos de cada fase en segundos
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+sys.path.insert(0, {root!r})
+from src.config import Config
+config_done = time.perf_counter()
+from src.bot import BruhBot
+import_done = time.perf_counter()
+config = Config.for_persona({{
+    "name": "startup",
+    "DATA_DIR": {data_dir!r},
+    "OPENROUTER_API_KEY": "bench",
+    "TWITTER_API_KEY": "bench",
+    "TWITTER_API_SECRET": "bench",
+    "TWITTER_ACCESS_TOKEN": "bench",
+    "TWITTER_ACCESS_TOKEN_SECRET": "bench",
+}})
+bot = BruhBot(config=config)
+init_done = time.perf_counter()
+bot.llm, bot.twitter_api.client
+clients_done = time.perf_counter()
+print(json.dumps({{
+    "import_config": config_done - start,
+    "import_bot": import_done - config_done,
+    "init_bot": init_done - import_done,
+    "first_use_clients": clients_done - init_done,
+    "total": clients_done - start,
+}}))
+"""
+
+def sample(data_dir: str) -> Dict[str, float]:
+    probe = _PROBE.format(root=str(ROOT), data_dir=data_dir)
+    output = subprocess.run(
+        [sys.executable, "-c", probe],
+        capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def run(runs: int) -> Dict:
+    samples: Dict[str, List[float]] = {}
+    with tempfile.TemporaryDirectory() as data_dir:
+        sample(data_dir)  # Calentar el cache de bytecode y del sistema de archivos
+        for _ in range(runs):
+            for phase, seconds in sample(data_dir).items():
+                samples.setdefault(phase, []).append(seconds)
+
+    scenarios = {}
+    for phase, values in samples.items():
+        scenarios[phase] = {
+            "runs": len(values),
+            "p50_ms": round(percentile(values, 50) * 1000, 3),
+            "p99_ms": round(percentile(values, 99) * 1000, 3),
+            "max_ms": round(max(values) * 1000, 3),
+        }
+        print(f"{phase:<18} p50={scenarios[phase]['p50_ms']}ms  p99={scenarios[phase]['p99_ms']}ms")
+
+    return {
+        "benchmark": "startup",
+        "commit": current_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "params": {"runs": runs},
+        "scenarios": scenarios,
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Tiempo de arranque en frío del Bruh Bot")
+    parser.add_argument("--runs", type=int, default=20, help="Procesos medidos")
+    parser.add_argument("--output", help="Archivo JSON de salida (por defecto benchmarks/results/startup_<fecha>_<commit>.json)")
+    parser.add_argument("--compare", help="JSON de una corrida anterior para comparar")
+    args = parser.parse_args()
+
+    result = run(args.runs)
+    output = Path(args.output) if args.output else \
+        RESULTS_DIR / f"startup_{time.strftime('%Y%m%d-%H%M%S')}_{result['commit'] or 'nocommit'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2, ensure_ascii=False)
+    print(f"\nResultados guardados en {output}")
+
+    if args.compare:
+        compare(result, args.compare)
+
+if __name__ == "__main__":
+    main()
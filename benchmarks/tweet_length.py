@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Benchmark del validador de largo ponderado y del recorte que conserva hashtags
+sobre un corpus sintético de tweets al estilo de las personas (emoji, secuencias
+ZWJ, banderas, CJK, links y hashtags), comparado con el recorte ingenuo por len().
+
+Uso:
+    python benchmarks/tweet_length.py --tweets 50000
+    python benchmarks/tweet_length.py --compare benchmarks/results/<anterior>.json
+"""
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+import argparse
+import json
+import random
+import sys
+import time
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.run_benchmarks import RESULTS_DIR, compare, current_commit, percentile
+from src.knowledge.prompts import story_protocol
+from src.twitter.text import TWEET_MAX_LENGTH, fit_tweet_length, weighted_length
+
+_WORDS = (
+    "wey hoomans blockchain propiedad intelectual creadores licencias regalías activo "
+    "programable territorio chihuahua sassy let me tell you about remix derivados "
+    "on-chain registro descentralizado colaboración AI arte música el la de en que es"
+).split()
+_EMOJI = [
+    "🐕", "🙄", "💦", "✨", "🎨", "🔥", "🚀", "💯", "🤯", "😤", "❤️", "☀️",
+    "👍🏽", "🙌🏿", "👨‍👩‍👧‍👦", "🧑‍💻", "🏳️‍🌈", "🇲🇽", "🇦🇷", "1️⃣", "©️",
+]
+_CJK = ["知的財産", "ブロックチェーン", "創作者", "区块链", "지식재산"]
+_URLS = ["https://story.foundation", "https://docs.story.foundation/docs/ip-asset", "storyprotocol.xyz"]
+_ACTIONS = ["*tiembla con actitud*", "*ladra en Web3*", "*mueve la colita*", "¡Ay, no manches!", "BRUH... 🙄"]
+
+def naive_fit(text: str) -> str:
+    """El recorte anterior: len() y "..." al final"""
+    if len(text) > TWEET_MAX_LENGTH:
+        text = text[:TWEET_MAX_LENGTH - 3] + "..."
+    return text
+
+def make_tweet(rng: random.Random) -> Tuple[str, str]:
+    """Un tweet sintético y los hashtags de su topic, con largo cercano al límite"""
+    topic = rng.choice(story_protocol.STORY_PROTOCOL_TOPICS)
+    hashtags = story_protocol.get_hashtags_for_topic(topic["tags"])
+    target = rng.randint(180, 360)
+    parts: List[str] = [rng.choice(_ACTIONS)]
+    while sum(len(part) + 1 for part in parts) < target:
+        roll = rng.random()
+        if roll < 0.12:
+            parts.append(rng.choice(_EMOJI) * rng.randint(1, 3))
+        elif roll < 0.16:
+            parts.append(rng.choice(_CJK))
+        elif roll < 0.18:
+            parts.append(rng.choice(_URLS))
+        elif roll < 0.22:
+            parts[-1] += rng.choice(".!?")
+        else:
+            parts.append(rng.choice(_WORDS))
+    return " ".join(parts) + " " + hashtags, hashtags
+
+def lost_hashtags(text: str, hashtags: str) -> bool:
+    lowered = text.lower()
+    return any(tag.lower() not in lowered for tag in hashtags.split())
+
+def timed(func: Callable[[str], object], texts: List[str]) -> Dict:
+    """Tiempo por llamada de `func` sobre todo el corpus"""
+    latencies = []
+    start = time.perf_counter()
+    for text in texts:
+        call_start = time.perf_counter()
+        func(text)
+        latencies.append(time.perf_counter() - call_start)
+    duration = time.perf_counter() - start
+    return {
+        "calls": len(texts),
+        "duration_s": round(duration, 4),
+        "ops_per_sec": round(len(texts) / duration, 2) if duration else None,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 5),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 5),
+    }
+
+def run(tweets: int, seed: int) -> Dict:
+    rng = random.Random(seed)
+    corpus = [make_tweet(rng) for _ in range(tweets)]
+    texts = [text for text, _ in corpus]
+
+    over_len = sum(1 for text in texts if len(text) > TWEET_MAX_LENGTH)
+    over_weighted = sum(1 for text in texts if weighted_length(text) > TWEET_MAX_LENGTH)
+    # Pasaban el chequeo con len() pero Twitter los habría rechazado
+    false_pass = sum(
+        1 for text in texts
+        if len(text) <= TWEET_MAX_LENGTH < weighted_length(text)
+    )
+
+    naive = [naive_fit(text) for text in texts]
+    smart = [fit_tweet_length(text, hashtags=hashtags) for text, hashtags in corpus]
+    quality = {
+        "tweets": tweets,
+        "over_280_len": over_len,
+        "over_280_weighted": over_weighted,
+        "false_pass_len_check": false_pass,
+        "naive_still_invalid": sum(1 for text in naive if weighted_length(text) > TWEET_MAX_LENGTH),
+        "naive_lost_hashtags": sum(
+            1 for text, (_, hashtags) in zip(naive, corpus) if lost_hashtags(text, hashtags)
+        ),
+        "smart_still_invalid": sum(1 for text in smart if weighted_length(text) > TWEET_MAX_LENGTH),
+        "smart_lost_hashtags": sum(
+            1 for text, (_, hashtags) in zip(smart, corpus) if lost_hashtags(text, hashtags)
+        ),
+    }
+    for key, value in quality.items():
+        print(f"{key:<22} {value}")
+
+    hashtags_by_text = dict(corpus)
+    scenarios = {
+        "len": timed(len, texts),
+        "weighted_length": timed(weighted_length, texts),
+        "naive_fit": timed(naive_fit, texts),
+        "fit_tweet_length": timed(lambda text: fit_tweet_length(text, hashtags=hashtags_by_text[text]), texts),
+    }
+    for name, result in scenarios.items():
+        print(f"{name:<18} {result['ops_per_sec']} ops/s  p50={result['p50_ms']}ms  p99={result['p99_ms']}ms")
+
+    return {
+        "benchmark": "tweet_length",
+        "commit": current_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "params": {"tweets": tweets, "seed": seed},
+        "quality": quality,
+        "scenarios": scenarios,
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Validador de largo ponderado y recorte de tweets")
+    parser.add_argument("--tweets", type=int, default=50000, help="Tweets en el corpus sintético")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Archivo JSON de salida (por defecto benchmarks/results/tweet_length_<fecha>_<commit>.json)")
+    parser.add_argument("--compare", help="JSON de una corrida anterior para comparar")
+    args = parser.parse_args()
+
+    result = run(args.tweets, args.seed)
+    output = Path(args.output) if args.output else \
+        RESULTS_DIR / f"tweet_length_{time.strftime('%Y%m%d-%H%M%S')}_{result['commit'] or 'nocommit'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2, ensure_ascii=False)
+    print(f"\nResultados guardados en {output}")
+
+    if args.compare:
+        compare(result, args.compare)
+
+if __name__ == "__main__":
+    main()
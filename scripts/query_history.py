@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Script para consultar el historial de tweets del Bruh Bot
+"""
+import sys
+import json
+import argparse
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Importar directamente desde la ruta relativa
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.config import Config
+from src.storage import JsonlHistoryStore, SqliteHistoryStore
+
+def open_store():
+    """Abrir el backend de historial configurado"""
+    if Config.HISTORY_BACKEND == "sqlite":
+        return SqliteHistoryStore(Config.TWEETS_HISTORY_DB)
+    return JsonlHistoryStore(Config.TWEETS_HISTORY_FILE)
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Consultar el historial de tweets")
+    parser.add_argument("--type", dest="tweet_type", help="Tipo de tweet (original, reply...)")
+    parser.add_argument("--topic", help="Topic exacto del tweet")
+    parser.add_argument("--hours", type=float, help="Solo tweets de las últimas N horas")
+    parser.add_argument("--limit", type=int, default=20, help="Máximo de resultados")
+    parser.add_argument("--posted", metavar="TEXT", help="Verificar si este texto ya se publicó")
+    parser.add_argument("--tweet-id", help="Buscar un tweet por su ID")
+    args = parser.parse_args()
+
+    store = open_store()
+    try:
+        if args.posted is not None:
+            posted = store.has_content(args.posted)
+            print("Ya publicado" if posted else "No publicado")
+            return 0 if posted else 1
+
+        if args.tweet_id:
+            record = store.get_by_tweet_id(args.tweet_id)
+            if record is None:
+                print("Tweet no encontrado")
+                return 1
+            print(json.dumps(record, ensure_ascii=False, indent=2))
+            return 0
+
+        since = datetime.now() - timedelta(hours=args.hours) if args.hours else None
+        records = store.find(
+            tweet_type=args.tweet_type,
+            since=since,
+            topic=args.topic,
+            limit=args.limit
+        )
+        for record in records:
+            print(json.dumps(record, ensure_ascii=False))
+        return 0
+    finally:
+        store.close()
+
+if __name__ == "__main__":
+    sys.exit(main())
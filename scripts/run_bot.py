@@ -2,44 +2,34 @@
 """
 Script principal para ejecutar el Bruh Bot
 """
-import os
 import sys
 import signal
 import asyncio
+import argparse
 import logging
 from pathlib import Path
 
-# Configuración de logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
-logger = logging.getLogger(__name__)
-
 # Obtener la ruta al directorio src
 src_dir = Path(__file__).resolve().parent.parent / 'src'
 
 # Importar directamente desde la ruta relativa
 sys.path.insert(0, str(src_dir.parent))
 
+from src.config import Config
+from src.logging_setup import setup_logging
+
+# Configuración de logging (una sola vez: consola y archivo rotado en DATA_DIR,
+# escritos desde un hilo aparte)
+Config.ensure_directories()
+setup_logging()
+logger = logging.getLogger(__name__)
+
 try:
     from src.bot import BruhBot
 except ImportError as e:
     logger.error(f"Error importando BruhBot: {e}")
     logger.error(f"PYTHONPATH actual: {sys.path}")
     sys.exit(1)
-from src.config import Config
-
-# Configuración de logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler(os.path.join(Config.DATA_DIR, 'bruh_bot.log'))
-    ]
-)
-logger = logging.getLogger(__name__)
 
 # Variable global para el bot
 bot = None
@@ -58,13 +48,85 @@ async def cleanup():
             if hasattr(bot, 'tweets_history'):
                 logger.info("Guardando historial de tweets...")
                 bot._save_tweets_history()
+            
+            # El outbox se escribe con fsync en cada cambio; solo avisar lo pendiente
+            if hasattr(bot, 'outbox') and len(bot.outbox):
+                logger.info(f"{len(bot.outbox)} tweets quedan en el outbox y se reintentarán al reiniciar")
+            
+            # Cerrar las sesiones HTTP
+            logger.info("Cerrando conexiones HTTP...")
+            await bot.close()
     except Exception as e:
         logger.error(f"Error durante la limpieza: {str(e)}")
     finally:
         logger.info("Bruh Bot se despide! *tiembla por última vez* 👋")
 
-async def main():
+def parse_args():
+    parser = argparse.ArgumentParser(description="Ejecutar el Bruh Bot")
+    parser.add_argument(
+        "--personas",
+        nargs="?",
+        const=Config.PERSONAS_FILE,
+        help="Correr varias personas desde un archivo JSON (por defecto PERSONAS_FILE)"
+    )
+    parser.add_argument(
+        "--post-once",
+        action="store_true",
+        help="Publicar un solo tweet y salir (para cron)"
+    )
+    parser.add_argument(
+        "--shards",
+        type=int,
+        default=1,
+        help="Repartir las personas entre N procesos"
+    )
+    return parser.parse_args()
+
+async def run_personas(path: str):
+    """Correr varias personas en este event loop"""
+    from src.personas import PersonaRunner, load_persona_settings
+    
+    settings = load_persona_settings(path)
+    logger.info(f"Iniciando {len(settings)} personas en un solo proceso")
+    await PersonaRunner(settings).run()
+
+async def main(args):
     """Función principal para ejecutar el bot"""
+    metrics_runner = None
+    # Con --personas el servidor lo levanta PersonaRunner, una vez por proceso
+    if Config.METRICS_PORT and not args.personas:
+        from src.metrics import start_metrics_server
+        metrics_runner = await start_metrics_server(Config.METRICS_PORT, Config.METRICS_HOST)
+    
+    try:
+        await run(args)
+    finally:
+        if metrics_runner is not None:
+            from src.metrics import stop_metrics_server
+            await stop_metrics_server(metrics_runner)
+
+async def post_once():
+    """Publicar un solo tweet (pendiente del outbox o nuevo) y salir"""
+    global bot
+    Config.validate()
+    bot = BruhBot()
+    try:
+        tweet_id = await bot.post_once()
+    finally:
+        await bot.close()
+    if not tweet_id:
+        sys.exit(1)
+
+async def run(args):
+    """Ejecutar una sola persona o varias según los argumentos"""
+    if args.personas:
+        await run_personas(args.personas)
+        return
+    
+    if args.post_once:
+        await post_once()
+        return
+    
     try:
         # Validar configuración
         Config.validate()
@@ -93,11 +155,18 @@ async def main():
         sys.exit(1)
 
 if __name__ == "__main__":
+    args = parse_args()
+    
+    if args.personas and args.shards > 1:
+        from src.personas import load_persona_settings, run_sharded
+        run_sharded(load_persona_settings(args.personas), args.shards)
+        sys.exit(0)
+    
     loop = asyncio.new_event_loop()
     asyncio.set_event_loop(loop)
     
     try:
-        loop.run_until_complete(main())
+        loop.run_until_complete(main(args))
     except KeyboardInterrupt:
         logger.info("Interrupción detectada, cerrando...")
         loop.run_until_complete(cleanup())
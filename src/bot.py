@@ -2,60 +2,168 @@
 Clase principal del Bruh Bot - El Chihuahua Web3 más sassy de Twitter
 Versión API-only: Solo posting de tweets, sin scraping
 """
-import json
 import asyncio
+import os
 import random
 from datetime import datetime
-from typing import Dict, List
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
 import logging
 
 from src.config import Config
 from src.llm.openrouter import OpenRouterClient
+from src.llm import ranking
 from src.knowledge.prompts import story_protocol
-from src.twitter.api import TwitterAPI
+from src.twitter.api import TweetRejectedError, TwitterAPI
+from src.twitter.text import fit_tweet_length, format_thread
+from src.storage import HistoryStore, JsonlHistoryStore, SqliteHistoryStore
+from src.drafts import DraftBuffer
+from src.outbox import Outbox
+from src.dedup import SimilarityIndex
+from src.engagement import EngagementIndex, TopicSelector
+from src.logging_setup import setup_logging
+from src.replies import ReplyEngine
+from src.metrics import DRAFT_OLDEST_AGE, ERRORS, QUEUE_DEPTH, REGISTRY, STAGE_LATENCY
+from src.scheduler import MISSED_RUN_ONCE, MISSED_SKIP, Scheduler
 
-# Configuración de logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
+# Topic de los tweets generales/territoriales (tags de NFT por defecto)
+TERRITORY_TOPIC = {"topic": "Bruh NFT Lifestyle", "tags": ["nft"]}
+
 class BruhBot:
-    def __init__(self):
-        self.config = Config
-        self.llm = OpenRouterClient()
-        self.twitter_api = TwitterAPI()
+    def __init__(
+        self,
+        config: type = Config,
+        llm: Optional[OpenRouterClient] = None,
+        twitter_api: Optional[TwitterAPI] = None,
+        scheduler: Optional[Scheduler] = None
+    ):
+        self.config = config
+        # Los clientes, el índice de similitud y el motor de respuestas se crean
+        # en el primer uso, así un arranque corto (--post-once) no paga lo que no usa
+        self._llm = llm
+        self._twitter_api = twitter_api
+        self._similarity: Optional[SimilarityIndex] = None
+        self._replies: Optional[ReplyEngine] = None
         self.last_tweet_time = None
-        self.tweets_history: List[Dict] = self._load_tweets_history()
         
         # Asegurarnos que existan los directorios necesarios
         self.config.ensure_directories()
         
+        self.tweets_history: HistoryStore = self._load_tweets_history()
+        self.drafts = DraftBuffer(
+            self.config.DRAFTS_FILE,
+            max_size=self.config.DRAFT_BUFFER_SIZE,
+            max_age=self.config.DRAFT_MAX_AGE,
+            retry_delay=self.config.DRAFT_RETRY_DELAY
+        )
+        self.outbox = Outbox(self.config.OUTBOX_FILE, max_attempts=self.config.OUTBOX_MAX_ATTEMPTS)
+        self.engagement = EngagementIndex(self.config.ENGAGEMENT_FILE, window=self.config.ENGAGEMENT_WINDOW)
+        self.topic_selector = TopicSelector(
+            self.engagement,
+            exploration=self.config.TOPIC_EXPLORATION,
+            min_samples=self.config.TOPIC_MIN_SAMPLES
+        )
+        self.scheduler = scheduler or Scheduler(misfire_grace=self.config.SCHEDULER_MISFIRE_GRACE)
+        
         logger.info("Bot inicializado en modo API-only - *mueve la colita* ¡Listo para generar tweets!")
 
-    def _load_tweets_history(self) -> List[Dict]:
-        """Cargar historial de tweets del archivo JSON"""
-        try:
-            with open(self.config.TWEETS_HISTORY_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            return []
+    @property
+    def llm(self) -> OpenRouterClient:
+        if self._llm is None:
+            self._llm = OpenRouterClient(config=self.config)
+        return self._llm
+
+    @property
+    def twitter_api(self) -> TwitterAPI:
+        if self._twitter_api is None:
+            self._twitter_api = TwitterAPI(config=self.config)
+        return self._twitter_api
+
+    @property
+    def similarity(self) -> SimilarityIndex:
+        if self._similarity is None:
+            self._similarity = self._build_similarity_index()
+        return self._similarity
+
+    @property
+    def replies(self) -> ReplyEngine:
+        if self._replies is None:
+            self._replies = ReplyEngine(
+                self.twitter_api,
+                self.llm,
+                self.tweets_history,
+                self.config.REPLY_STATE_FILE,
+                record_reply=self._add_reply_to_history,
+                concurrency=self.config.REPLY_CONCURRENCY,
+                post_spacing=self.config.REPLY_POST_SPACING,
+                max_per_poll=self.config.REPLY_MAX_PER_POLL,
+                context_tokens=self.config.THREAD_CONTEXT_TOKENS,
+                post_reserve=self.config.RATE_LIMIT_REPLY_RESERVE
+            )
+        return self._replies
+
+    def _load_tweets_history(self) -> HistoryStore:
+        """Abrir el historial de tweets según HISTORY_BACKEND (migra el formato antiguo si existe)"""
+        jsonl_store = JsonlHistoryStore(
+            self.config.TWEETS_HISTORY_FILE,
+            legacy_path=self.config.TWEETS_HISTORY_LEGACY_FILE,
+            compact_every=self.config.HISTORY_COMPACT_EVERY,
+            max_records=self.config.HISTORY_MAX_RECORDS
+        )
+        if self.config.HISTORY_BACKEND != "sqlite":
+            return jsonl_store
+        
+        store = SqliteHistoryStore(self.config.TWEETS_HISTORY_DB)
+        if len(store) == 0 and os.path.exists(self.config.TWEETS_HISTORY_FILE):
+            store.import_records(jsonl_store)
+            # Igual que el JSON antiguo: renombrado para no volver a importarlo
+            jsonl_store.close()
+            os.replace(self.config.TWEETS_HISTORY_FILE, self.config.TWEETS_HISTORY_FILE + ".migrated")
+        return store
 
     def _save_tweets_history(self) -> None:
-        """Guardar historial de tweets al archivo JSON"""
-        with open(self.config.TWEETS_HISTORY_FILE, 'w', encoding='utf-8') as f:
-            json.dump(self.tweets_history, f, ensure_ascii=False, indent=2)
+        """Asegurar que el historial de tweets esté persistido en disco"""
+        self.tweets_history.flush()
+
+    def _build_similarity_index(self) -> SimilarityIndex:
+        """Construir el índice de casi-duplicados con el historial reciente y los borradores en cola"""
+        index = SimilarityIndex(
+            threshold=self.config.DEDUP_THRESHOLD,
+            lookback=self.config.DEDUP_LOOKBACK
+        )
+        index.extend(record.get("content", "") for record in self.tweets_history.recent(self.config.DEDUP_LOOKBACK))
+        index.extend(draft["content"] for draft in self.drafts.pending())
+        index.extend(entry["content"] for entry in self.outbox.pending())
+        return index
 
-    def _add_tweet_to_history(self, tweet: str, tweet_type: str) -> None:
-        """Agregar un tweet al historial"""
+    def _add_tweet_to_history(
+        self,
+        tweet: str,
+        tweet_type: str,
+        tweet_id: Optional[str] = None,
+        topic: Optional[str] = None,
+        in_reply_to: Optional[str] = None,
+        thread_ids: Optional[List[str]] = None
+    ) -> None:
+        """Agregar un tweet al historial (un hilo se guarda como un solo registro)"""
         tweet_data = {
             "content": tweet,
             "type": tweet_type,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": datetime.now().isoformat(),
+            "tweet_id": tweet_id,
+            "topic": topic
         }
-        self.tweets_history.append(tweet_data)
-        self._save_tweets_history()
+        if in_reply_to:
+            tweet_data["in_reply_to"] = in_reply_to
+        if thread_ids:
+            tweet_data["thread_ids"] = thread_ids
+        with STAGE_LATENCY.time(stage="history_write"):
+            self.tweets_history.append(tweet_data)
+
+    def _add_reply_to_history(self, reply: str, tweet_id: str, in_reply_to: str) -> None:
+        """Agregar una respuesta a una mención al historial"""
+        self._add_tweet_to_history(reply, "reply", tweet_id, in_reply_to=in_reply_to)
 
     def _get_random_interval(self) -> int:
         """Obtener un intervalo aleatorio entre tweets"""
@@ -64,63 +172,381 @@ class BruhBot:
             self.config.TWEET_INTERVAL_MAX
         )
 
-    async def generate_tweet(self) -> str:
-        """Generar un nuevo tweet con hashtags contextuales"""
+    def _topic_arms(self) -> List[Tuple[str, Dict]]:
+        """Todas las combinaciones de tipo de tweet y topic"""
+        topics = self.config.TWEET_TOPICS or story_protocol.STORY_PROTOCOL_TOPICS
+        return [("educational", topic) for topic in topics] + [("territory", TERRITORY_TOPIC)]
+
+    def _choose_topic(self) -> Tuple[str, Dict]:
+        """Elegir el tipo de tweet y su topic"""
+        # Favorecer los topics con más engagement, salvo cuando toca explorar
+        choice = self.topic_selector.choose(self._topic_arms())
+        if choice is not None:
+            return choice
+        
         # 70% probabilidad de tweet sobre Story Protocol
         if random.random() < 0.7:
             # Seleccionar un topic aleatorio con sus tags
-            topic_dict = random.choice(story_protocol.STORY_PROTOCOL_TOPICS)
+            topics = self.config.TWEET_TOPICS or story_protocol.STORY_PROTOCOL_TOPICS
+            return "educational", random.choice(topics)
+        
+        # 30% probabilidad de tweet general/territorial
+        return "territory", TERRITORY_TOPIC
+
+    async def generate_tweet(self, choice: Optional[Tuple[str, Dict]] = None) -> str:
+        """Generar un nuevo tweet con hashtags contextuales"""
+        with STAGE_LATENCY.time(stage="generate_tweet"):
+            return await self._generate_tweet(choice)
+
+    async def _generate_tweet(self, choice: Optional[Tuple[str, Dict]]) -> str:
+        kind, topic_dict = choice or self._choose_topic()
+        if kind == "educational":
             prompt = story_protocol.get_educational_template(topic_dict)
-            tweet = await self.llm.generate_story_protocol_insight(prompt=prompt)
         else:
-            # 30% probabilidad de tweet general/territorial
-            # Para tweets generales, usar tags de NFT por defecto
-            topic_dict = {"topic": "Bruh NFT Lifestyle", "tags": ["nft"]}
             prompt = story_protocol.get_territory_marking_template(topic_dict)
-            tweet = await self.llm.generate_tweet(prompt=prompt)
+        hashtags = story_protocol.get_hashtags_for_topic(topic_dict["tags"])
+        
+        # Pedir varios candidatos por llamada y quedarnos con el mejor que no sea
+        # casi igual a un tweet reciente, antes de gastar un post
+        for attempt in range(self.config.DEDUP_MAX_ATTEMPTS):
+            candidates = await self.llm.generate_tweet_candidates(
+                prompt=prompt,
+                n=self.config.TWEET_CANDIDATES,
+                hashtags=hashtags
+            )
+            ranked = ranking.rank_candidates(
+                candidates,
+                hashtags=hashtags,
+                similarity=self.similarity,
+                catchphrases=self.config.BOT_PERSONALITY["catchphrases"]
+            )
+            for candidate in ranked:
+                if candidate.similarity < self.similarity.threshold:
+                    tweet = fit_tweet_length(candidate.text, hashtags=hashtags)
+                    self.similarity.add(tweet)
+                    return tweet
+            if not ranked:
+                logger.warning(
+                    f"El LLM no devolvió candidatos, "
+                    f"regenerando ({attempt + 1}/{self.config.DEDUP_MAX_ATTEMPTS})..."
+                )
+                continue
+            logger.warning(
+                f"Los {len(ranked)} candidatos son casi duplicados, "
+                f"regenerando ({attempt + 1}/{self.config.DEDUP_MAX_ATTEMPTS})..."
+            )
+        
+        raise ValueError("No se pudo generar un tweet válido que no sea casi duplicado")
+
+    async def generate_thread(self, topic_dict: Optional[Dict] = None) -> List[str]:
+        """Generar un hilo sobre un topic de Story Protocol en una sola llamada al LLM"""
+        with STAGE_LATENCY.time(stage="generate_thread"):
+            return await self._generate_thread(topic_dict)
+
+    async def _generate_thread(self, topic_dict: Optional[Dict]) -> List[str]:
+        if topic_dict is None:
+            topics = self.config.TWEET_TOPICS or story_protocol.STORY_PROTOCOL_TOPICS
+            topic_dict = random.choice(topics)
+        max_segments = self.config.THREAD_MAX_SEGMENTS
+        prompt = story_protocol.get_thread_template(topic_dict, max_segments)
+        hashtags = story_protocol.get_hashtags_for_topic(topic_dict["tags"])
+        
+        for attempt in range(self.config.DEDUP_MAX_ATTEMPTS):
+            segments = await self.llm.generate_thread(prompt, max_segments=max_segments)
+            thread = format_thread(segments, hashtags=hashtags)
+            if len(thread) < 2:
+                logger.warning(f"El LLM devolvió un hilo de {len(thread)} tweets, regenerando...")
+                continue
+            # El hilo se compara completo, igual que se guarda en el historial
+            content = "\n\n".join(thread)
+            if self.similarity.max_similarity(content) < self.similarity.threshold:
+                self.similarity.add(content)
+                return thread
+            logger.warning(
+                f"El hilo es casi duplicado, regenerando ({attempt + 1}/{self.config.DEDUP_MAX_ATTEMPTS})..."
+            )
         
-        return tweet
+        raise ValueError("No se pudo generar un hilo válido que no sea casi duplicado")
 
-    async def post_tweet(self, tweet: str) -> None:
-        """Publicar un tweet usando la API de Twitter"""
+    async def generate_draft(self) -> Dict:
+        """Generar un borrador listo para encolar (un tweet o, según THREAD_POST_RATIO, un hilo)"""
+        kind, topic_dict = self._choose_topic()
+        if kind == "educational" and random.random() < self.config.THREAD_POST_RATIO:
+            thread = await self.generate_thread(topic_dict)
+            return {
+                "content": "\n\n".join(thread),
+                "segments": thread,
+                "kind": "thread",
+                "topic": topic_dict["topic"]
+            }
+        tweet = await self.generate_tweet((kind, topic_dict))
+        return {"content": tweet, "kind": kind, "topic": topic_dict["topic"]}
+
+    async def post_tweet(self, tweet: str, topic: Optional[str] = None) -> Optional[str]:
+        """
+        Publicar un tweet usando la API de Twitter
+        Returns: ID del tweet si fue exitoso, None si falló
+        Raises: TweetRejectedError si Twitter lo rechaza de forma permanente
+        """
+        # Reparar localmente lo que Twitter rechazaría por largo (borradores viejos, outbox)
+        tweet = fit_tweet_length(tweet)
         logger.info(f"Posteando tweet: {tweet}")
         
         try:
             # Usar la API para postear
-            tweet_id = await self.twitter_api.post_tweet(text=tweet)
+            with STAGE_LATENCY.time(stage="post_tweet"):
+                tweet_id = await self.twitter_api.post_tweet(text=tweet)
             if tweet_id:
                 logger.info(f"Tweet posteado exitosamente con ID: {tweet_id}")
-                self._add_tweet_to_history(tweet, "original")
+                self._add_tweet_to_history(tweet, "original", tweet_id, topic=topic)
             else:
+                ERRORS.inc(stage="post_tweet")
                 logger.error("No se pudo postear el tweet")
+            return tweet_id
                 
+        except TweetRejectedError as e:
+            ERRORS.inc(stage="post_tweet")
+            if e.duplicate:
+                # El texto ya está en Twitter: que el historial lo sepa para no volver a intentarlo
+                self._add_tweet_to_history(tweet, "original", None, topic=topic)
+            raise
         except Exception as e:
+            ERRORS.inc(stage="post_tweet")
             logger.error(f"Error posteando tweet: {str(e)}")
+            return None
+
+    async def post_thread(self, entry: Dict) -> Optional[str]:
+        """
+        Publicar el hilo de una entrada del outbox. Cada segmento sale en cuanto
+        se conoce el ID del anterior y queda registrado en el outbox, así un
+        hilo interrumpido se retoma desde el último segmento publicado sin
+        regenerarlo ni repetir tweets.
+        Returns: ID del primer tweet si el hilo quedó completo, None si no
+        Raises: TweetRejectedError si Twitter rechaza un segmento
+        """
+        segments = entry["segments"]
+        posted = list(entry.get("posted") or [])
+        if posted:
+            logger.info(f"Retomando hilo desde el segmento {len(posted) + 1}/{len(segments)}")
+        else:
+            logger.info(f"Posteando hilo de {len(segments)} tweets: {segments[0]}")
+        
+        try:
+            with STAGE_LATENCY.time(stage="post_thread"):
+                new_ids = await self.twitter_api.post_thread(
+                    segments[len(posted):],
+                    reply_to_id=posted[-1] if posted else None,
+                    on_posted=lambda tweet_id: self.outbox.mark_progress(entry["id"], tweet_id)
+                )
+        except TweetRejectedError:
+            ERRORS.inc(stage="post_thread")
+            raise
+        except Exception as e:
+            logger.error(f"Error posteando hilo: {str(e)}")
+            new_ids = []
+        
+        thread_ids = posted + new_ids
+        if len(thread_ids) < len(segments):
+            ERRORS.inc(stage="post_thread")
+            logger.error(f"Hilo incompleto: {len(thread_ids)}/{len(segments)} tweets publicados")
+            return None
+        
+        logger.info(f"Hilo posteado exitosamente, primer tweet con ID: {thread_ids[0]}")
+        self._add_tweet_to_history(
+            entry["content"], "thread", thread_ids[0], topic=entry.get("topic"), thread_ids=thread_ids
+        )
+        return thread_ids[0]
+
+    async def _next_outbox_entry(
+        self,
+        next_draft: Optional[Callable[[Callable[[Dict], Dict]], Awaitable[Dict]]] = None
+    ) -> Dict:
+        """
+        Siguiente tweet a publicar: primero lo que quedó pendiente en el outbox
+        (posts fallidos o interrumpidos por un crash), y si no hay, un borrador
+        nuevo (de `next_draft`, por defecto la cola) registrado en el outbox antes
+        de salir de la cola. Si un crash lo deja en ambos, Twitter rechaza la
+        copia de la cola como duplicado y `_deliver` la saca del outbox.
+        """
+        while True:
+            entry = self.outbox.next_pending()
+            if entry is None:
+                return await (next_draft or self.drafts.take)(self.outbox.add)
+            
+            # Idempotencia: si llegó al historial, el post salió aunque no se marcó
+            content = entry["content"] if entry.get("segments") else fit_tweet_length(entry["content"])
+            if self.tweets_history.has_content(content):
+                logger.info("Tweet pendiente del outbox ya estaba publicado, marcándolo como entregado")
+                self.outbox.mark_done(entry["id"], None)
+                continue
+            
+            logger.info(f"Reanudando tweet pendiente del outbox (intentos previos: {entry['attempts']})")
+            return entry
+
+    async def _deliver(self, entry: Dict) -> Optional[str]:
+        """
+        Postear una entrada del outbox (tweet o hilo) y marcarla entregada o
+        fallida. Solo los errores transitorios cuentan como intento fallido: lo
+        que Twitter rechaza con un 403 sale del outbox en el momento para no
+        bloquear los posts siguientes.
+        """
+        try:
+            if entry.get("segments"):
+                tweet_id = await self.post_thread(entry)
+            else:
+                tweet_id = await self.post_tweet(entry["content"], topic=entry.get("topic"))
+        except TweetRejectedError as e:
+            if e.duplicate and not entry.get("segments"):
+                # Típicamente un post que salió antes de un crash sin llegar al historial
+                logger.info("El tweet del outbox ya estaba publicado, marcándolo como entregado")
+                self.outbox.mark_done(entry["id"], None)
+            else:
+                # Sin el ID del segmento rechazado un hilo no se puede continuar
+                logger.error(f"Twitter rechazó la entrada del outbox, descartándola: {str(e)}")
+                self.outbox.mark_abandoned(entry["id"])
+            return None
+        
+        if tweet_id:
+            self.outbox.mark_done(entry["id"], tweet_id)
+        else:
+            self.outbox.mark_failed(entry["id"])
+        return tweet_id
+
+    async def _queued_or_new_draft(self, register: Callable[[Dict], Dict]) -> Dict:
+        """Un borrador de la cola si hay alguno; si no, generarlo en el momento"""
+        if len(self.drafts):
+            return await self.drafts.take(register)
+        return register(await self.generate_draft())
+
+    async def post_once(self) -> Optional[str]:
+        """
+        Publicar un solo tweet y volver (modo cron): lo pendiente del outbox,
+        o un borrador de la cola, o uno generado en el momento.
+        Returns: ID del tweet si fue exitoso, None si falló
+        """
+        entry = await self._next_outbox_entry(self._queued_or_new_draft)
+        return await self._deliver(entry)
+
+    def usage_report(self) -> Dict:
+        """Tokens y costo del LLM (sesión, hora y día) y el modo del governor de costo"""
+        return self.llm.usage_report()
+
+    def _collect_metrics(self) -> None:
+        """Actualizar los gauges de colas"""
+        persona = self.config.PERSONA_NAME
+        stats = self.drafts.stats()
+        QUEUE_DEPTH.set(stats["depth"], queue="drafts", persona=persona)
+        QUEUE_DEPTH.set(len(self.outbox), queue="outbox", persona=persona)
+        DRAFT_OLDEST_AGE.set(stats["oldest_age"] or 0, persona=persona)
+
+    async def _post_job(self) -> None:
+        """Job de posteo: el siguiente tweet (pendiente o borrador nuevo)"""
+        await self._deliver(await self._next_outbox_entry())
+        
+        stats = self.drafts.stats()
+        logger.info(
+            f"Cola de borradores: {stats['depth']}/{stats['max_size']}, "
+            f"última recarga en {stats['last_refill_latency'] or 0:.1f}s"
+        )
+        usage = self.usage_report()
+        logger.info(
+            f"Costo del LLM: ${usage['hour']['cost']:.4f} esta hora, "
+            f"${usage['day']['cost']:.4f} hoy (modo {usage['mode']})"
+        )
+        job = self.scheduler.get_job("post")
+        minutes = (job.next_run - self.scheduler.clock.now()) / 60
+        logger.info(f"Próximo tweet en {minutes:.1f} minutos... *se acurruca a dormir*")
+
+    async def _replies_job(self) -> None:
+        handled = await self.replies.poll_once()
+        if handled:
+            logger.info(f"Procesadas {handled} menciones *ladra de vuelta*")
+
+    async def _maintenance_job(self) -> None:
+        self.tweets_history.maintain()
+        self.outbox.compact()
+
+    async def _engagement_job(self) -> None:
+        """Leer las public_metrics de los tweets recientes y actualizar el índice por topic"""
+        since = self.engagement.window_start()
+        records = [
+            record for tweet_type in ("original", "thread")
+            for record in self.tweets_history.find(tweet_type=tweet_type, since=since)
+            if record.get("tweet_id") and record.get("topic")
+        ]
+        if not records:
+            return
+        metrics = await self.twitter_api.get_tweet_metrics(record["tweet_id"] for record in records)
+        updated = self.engagement.update(records, metrics)
+        logger.info(f"Engagement actualizado para {updated}/{len(records)} tweets recientes")
+
+    def _register_jobs(self) -> None:
+        """Registrar los loops del bot en el scheduler"""
+        if self.scheduler.get_job("post") is not None:
+            # Ya registrados: el supervisor de personas reinició el bot
+            return
+        # El intervalo entre tweets se sortea en cada vuelta, pero sobre deadlines
+        # absolutos: lo que tarde generar y postear no se suma a la espera
+        self.scheduler.add_job(
+            "post", self._post_job, self._get_random_interval, missed=MISSED_RUN_ONCE
+        )
+        # Las menciones se responden en paralelo sin retrasar los tweets
+        if self.config.REPLIES_ENABLED:
+            self.scheduler.add_job(
+                "replies", self._replies_job, self.config.REPLY_INTERVAL, missed=MISSED_SKIP
+            )
+        self.scheduler.add_job(
+            "engagement", self._engagement_job, self.config.ENGAGEMENT_REFRESH_INTERVAL, missed=MISSED_SKIP
+        )
+        self.scheduler.add_job(
+            "maintenance", self._maintenance_job, self.config.HISTORY_MAINTENANCE_INTERVAL,
+            missed=MISSED_SKIP, delay=self.config.HISTORY_MAINTENANCE_INTERVAL
+        )
+
+    async def close(self) -> None:
+        """Liberar las conexiones HTTP y archivos del bot"""
+        if self._llm is not None:
+            await self._llm.close()
+        if self._twitter_api is not None:
+            await self._twitter_api.close()
+        self.tweets_history.close()
 
     async def run(self) -> None:
         """Ejecutar el bot en modo API-only"""
         logger.info("¡Bruh Bot iniciando en modo API-only! *tiembla con emoción*")
         
+        REGISTRY.add_collector(self._collect_metrics)
+        
+        # Los borradores se generan en segundo plano, por delante del posteo
+        producer = asyncio.create_task(self.drafts.run_producer(self.generate_draft))
+        
         try:
-            while True:
-                # Generar y postear tweet
-                tweet = await self.generate_tweet()
-                await self.post_tweet(tweet)
-                
-                # Esperar intervalo aleatorio
-                interval = self._get_random_interval()
-                minutes = interval / 60
-                logger.info(f"Tweet posteado! Esperando {minutes:.1f} minutos hasta el próximo tweet... *se acurruca a dormir*")
-                await asyncio.sleep(interval)
+            # El ID del usuario lo resuelve (y cachea) el primer poll de menciones:
+            # si Twitter falla al arrancar, ese poll se reintenta en vez de tumbar el bot
+            self._register_jobs()
+            await self.scheduler.run()
                 
         except Exception as e:
             logger.error(f"Error en el bot: {str(e)}")
             raise
+        finally:
+            REGISTRY.remove_collector(self._collect_metrics)
+            producer.cancel()
 
 if __name__ == "__main__":
+    # Configuración de logging
+    setup_logging()
+    
     # Validar configuración antes de iniciar
     Config.validate()
     
     # Iniciar el bot
     bot = BruhBot()
-    asyncio.run(bot.run())
\ No newline at end of file
+
+    async def _main() -> None:
+        try:
+            await bot.run()
+        finally:
+            await bot.close()
+
+    asyncio.run(_main())
\ No newline at end of file
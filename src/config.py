@@ -1,7 +1,7 @@
 """
 Configuración principal del Bruh Bot
 """
-from typing import Dict
+from typing import Any, Dict, List, Optional, Tuple
 import os
 from dotenv import load_dotenv
 
@@ -15,6 +15,20 @@ class Config:
     TWITTER_ACCESS_TOKEN: str = os.getenv("TWITTER_ACCESS_TOKEN", "")
     TWITTER_ACCESS_TOKEN_SECRET: str = os.getenv("TWITTER_ACCESS_TOKEN_SECRET", "")
     
+    # Twitter API I/O
+    TWITTER_API_BASE_URL: str = os.getenv("TWITTER_API_BASE_URL", "https://api.twitter.com")  # Cambiar para apuntar a un servidor local
+    TWITTER_MAX_WORKERS: int = int(os.getenv("TWITTER_MAX_WORKERS", "8"))  # Hilos del executor para llamadas a tweepy
+    TWITTER_ENDPOINT_CONCURRENCY: Dict[str, int] = {
+        "post": 2,  # create_tweet (tweets y replies)
+        "mentions": 1,  # get_users_mentions
+        "thread": 4,  # search_recent_tweets por conversación
+        "me": 1,  # get_me (una vez al arrancar)
+        "lookup": 2,  # get_tweets (métricas de engagement, hasta 100 IDs por llamada)
+    }
+    RATE_LIMIT_MAX_RETRIES: int = 2  # Reintentos tras un 429, esperando al reset de la ventana
+    RATE_LIMIT_MARGIN: float = 1.0  # Segundos extra tras el reset por desfase de relojes
+    RATE_LIMIT_REPLY_RESERVE: int = 5  # Posts que se reservan para tweets originales antes de responder menciones
+    
     # Twitter Scraping Credentials
     TWITTER_USERNAME: str = os.getenv("TWITTER_USERNAME", "")
     TWITTER_PASSWORD: str = os.getenv("TWITTER_PASSWORD", "")
@@ -23,13 +37,87 @@ class Config:
     OPENROUTER_API_KEY: str = os.getenv("OPENROUTER_API_KEY", "")
     OPENROUTER_API_URL: str = "https://openrouter.ai/api/v1/chat/completions"
     OPENROUTER_MODEL: str = "anthropic/claude-3-opus"  # Podemos cambiarlo a grok cuando esté disponible
+    OPENROUTER_MAX_CONNECTIONS: int = int(os.getenv("OPENROUTER_MAX_CONNECTIONS", "10"))  # Tamaño del pool de conexiones
+    OPENROUTER_KEEPALIVE_TIMEOUT: float = float(os.getenv("OPENROUTER_KEEPALIVE_TIMEOUT", "30"))  # Segundos que vive una conexión ociosa
+    OPENROUTER_CONNECT_TIMEOUT: float = float(os.getenv("OPENROUTER_CONNECT_TIMEOUT", "10"))  # Segundos para establecer conexión
+    OPENROUTER_READ_TIMEOUT: float = float(os.getenv("OPENROUTER_READ_TIMEOUT", "60"))  # Segundos máximos esperando respuesta
+    OPENROUTER_STREAM: bool = os.getenv("OPENROUTER_STREAM", "false").lower() == "true"  # Consumir la respuesta por SSE
+    OPENROUTER_PROMPT_CACHING: bool = os.getenv("OPENROUTER_PROMPT_CACHING", "true").lower() == "true"  # Marcar el prompt de sistema con cache_control si alcanza el mínimo cacheable del modelo
+    OPENROUTER_STREAM_DEADLINE: float = float(os.getenv("OPENROUTER_STREAM_DEADLINE", "45"))  # Segundos máximos de una generación en streaming
+    OPENROUTER_FALLBACK_MODELS: List[str] = [
+        model.strip()
+        for model in os.getenv("OPENROUTER_FALLBACK_MODELS", "anthropic/claude-3-haiku,meta-llama/llama-3.1-8b-instruct").split(",")
+        if model.strip()
+    ]  # Modelos de respaldo en orden de preferencia
+    OPENROUTER_CIRCUIT_FAILURES: int = 3  # Fallos seguidos que abren el circuito de un modelo
+    OPENROUTER_CIRCUIT_RESET: int = 60  # Segundos con el circuito abierto antes de volver a probar el modelo
+    OPENROUTER_HEDGING: bool = os.getenv("OPENROUTER_HEDGING", "false").lower() == "true"  # Petición de respaldo si el primario tarda más que su p95
+    OPENROUTER_HEDGE_MIN_DELAY: float = float(os.getenv("OPENROUTER_HEDGE_MIN_DELAY", "3"))  # Segundos mínimos antes de lanzar el respaldo
+    # Precio en USD por millón de tokens (prompt, completion); se usa si la respuesta no trae `usage.cost`
+    OPENROUTER_MODEL_PRICES: Dict[str, Tuple[float, float]] = {
+        "anthropic/claude-3-opus": (15.0, 75.0),
+        "anthropic/claude-3.5-sonnet": (3.0, 15.0),
+        "anthropic/claude-3-haiku": (0.25, 1.25),
+        "meta-llama/llama-3.1-8b-instruct": (0.02, 0.05),
+    }
+    LLM_HOURLY_BUDGET: float = float(os.getenv("LLM_HOURLY_BUDGET", "0"))  # USD por hora (0 = sin límite)
+    LLM_DAILY_BUDGET: float = float(os.getenv("LLM_DAILY_BUDGET", "5"))  # USD por día (0 = sin límite)
+    LLM_BUDGET_SOFT_RATIO: float = 0.8  # Fracción del presupuesto a partir de la cual se pasa a modo economía
+    LLM_ECONOMY_TOKENS_RATIO: float = 0.6  # Fracción de max_tokens que se pide en modo economía
+    
+    # Cache de respuestas del LLM
+    LLM_CACHE_MAX_ENTRIES: int = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "256"))  # Entradas en memoria (LRU)
+    LLM_CACHE_TTL: int = int(os.getenv("LLM_CACHE_TTL", str(60 * 60)))  # Segundos de validez de una respuesta
+    LLM_CACHE_DISK: bool = os.getenv("LLM_CACHE_DISK", "false").lower() == "true"  # Activar la capa en disco
+    LLM_CACHE_MAX_DISK_ENTRIES: int = int(os.getenv("LLM_CACHE_MAX_DISK_ENTRIES", "5000"))
+    
+    # Logging
+    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+    LOG_JSON: bool = os.getenv("LOG_JSON", "false").lower() == "true"  # Una línea JSON por registro
+    LOG_MAX_BYTES: int = int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024)))  # Tamaño antes de rotar el archivo
+    LOG_BACKUP_COUNT: int = int(os.getenv("LOG_BACKUP_COUNT", "5"))  # Archivos rotados que se conservan
+    LOG_ROTATE_WHEN: str = os.getenv("LOG_ROTATE_WHEN", "")  # p. ej. "midnight": rotar por tiempo en vez de tamaño
+    
+    # Métricas Prometheus
+    METRICS_PORT: int = int(os.getenv("METRICS_PORT", "0"))  # Puerto del endpoint /metrics (0 = desactivado)
+    METRICS_HOST: str = os.getenv("METRICS_HOST", "127.0.0.1")
     
     # Bot Configuration
     TWEET_INTERVAL_MIN: int = 30 * 60  # 30 minutos en segundos
     TWEET_INTERVAL_MAX: int = 60 * 60  # 60 minutos en segundos
     REPLY_INTERVAL: int = 5 * 60  # 5 minutos entre replies para evitar rate limits
+    SCHEDULER_MISFIRE_GRACE: int = 5  # Segundos de retraso tolerados antes de dar una ejecución por perdida
+    REPLIES_ENABLED: bool = os.getenv("REPLIES_ENABLED", "true").lower() == "true"
+    REPLY_CONCURRENCY: int = 3  # Menciones preparadas en paralelo (hilo + LLM)
+    REPLY_POST_SPACING: int = 30  # Segundos mínimos entre posts de respuestas
+    REPLY_MAX_PER_POLL: int = 10  # Menciones respondidas como máximo en cada poll
+    THREAD_CACHE_SIZE: int = 200  # Conversaciones guardadas en el cache de hilos
+    THREAD_CACHE_TTL: int = 6 * 60 * 60  # Segundos sin uso antes de expulsar una conversación
+    THREAD_CONTEXT_TOKENS: int = int(os.getenv("THREAD_CONTEXT_TOKENS", "500"))  # Presupuesto de tokens del contexto de un hilo
+    DRAFT_BUFFER_SIZE: int = int(os.getenv("DRAFT_BUFFER_SIZE", "3"))  # Tweets pre-generados en cola
+    DRAFT_MAX_AGE: int = int(os.getenv("DRAFT_MAX_AGE", str(6 * 60 * 60)))  # Segundos antes de descartar un borrador
+    DRAFT_RETRY_DELAY: int = 60  # Segundos de espera si el LLM falla al generar un borrador
+    OUTBOX_MAX_ATTEMPTS: int = 5  # Intentos de postear un tweet del outbox antes de abandonarlo
+    
+    # Detección de casi-duplicados
+    DEDUP_THRESHOLD: float = float(os.getenv("DEDUP_THRESHOLD", "0.7"))  # Similitud Jaccard a partir de la cual se rechaza
+    DEDUP_LOOKBACK: int = int(os.getenv("DEDUP_LOOKBACK", "500"))  # Tweets recientes contra los que se compara
+    DEDUP_MAX_ATTEMPTS: int = 3  # Generaciones antes de rechazar el borrador
+    TWEET_CANDIDATES: int = int(os.getenv("TWEET_CANDIDATES", "3"))  # Candidatos pedidos por llamada al LLM
+    
+    # Hilos (varios tweets encadenados como respuestas)
+    THREAD_POST_RATIO: float = float(os.getenv("THREAD_POST_RATIO", "0"))  # Probabilidad de que un borrador sea un hilo
+    THREAD_MAX_SEGMENTS: int = int(os.getenv("THREAD_MAX_SEGMENTS", "5"))  # Tweets como máximo por hilo
+    
+    # Selección de topics según engagement
+    ENGAGEMENT_REFRESH_INTERVAL: int = 60 * 60  # Segundos entre lecturas de public_metrics
+    ENGAGEMENT_WINDOW: int = 3 * 24 * 60 * 60  # Segundos durante los que se siguen actualizando las métricas de un tweet
+    TOPIC_EXPLORATION: float = float(os.getenv("TOPIC_EXPLORATION", "0.2"))  # Probabilidad de elegir el topic al azar
+    TOPIC_MIN_SAMPLES: int = 3  # Tweets medidos que necesita un topic para competir por engagement
     
     # Personalidad del Bot
+    PERSONA_NAME: str = "bruh"
+    TWEET_TOPICS: Optional[List[Dict]] = None  # None = STORY_PROTOCOL_TOPICS
     BOT_PERSONALITY: Dict[str, str] = {
         "name": "Bruh",
         "species": "Chihuahua negro (mini doberman style)",
@@ -52,7 +140,63 @@ class Config:
     
     # Paths
     DATA_DIR: str = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
-    TWEETS_HISTORY_FILE: str = os.path.join(DATA_DIR, "tweets_history.json")
+    TWEETS_HISTORY_FILE: str = os.path.join(DATA_DIR, "tweets_history.jsonl")
+    TWEETS_HISTORY_LEGACY_FILE: str = os.path.join(DATA_DIR, "tweets_history.json")  # Formato antiguo, se migra automáticamente
+    TWEETS_HISTORY_DB: str = os.path.join(DATA_DIR, "tweets_history.db")
+    DRAFTS_FILE: str = os.path.join(DATA_DIR, "drafts_queue.json")
+    OUTBOX_FILE: str = os.path.join(DATA_DIR, "outbox.jsonl")
+    LLM_CACHE_FILE: str = os.path.join(DATA_DIR, "llm_cache.db")
+    REPLY_STATE_FILE: str = os.path.join(DATA_DIR, "reply_state.json")
+    ENGAGEMENT_FILE: str = os.path.join(DATA_DIR, "engagement.json")
+    LLM_USAGE_FILE: str = os.path.join(DATA_DIR, "llm_usage.json")
+    LOG_FILE: str = os.getenv("LOG_FILE", os.path.join(DATA_DIR, "bruh_bot.log"))  # "" = solo consola
+    PERSONAS_FILE: str = os.getenv("PERSONAS_FILE", os.path.join(DATA_DIR, "personas.json"))
+    PERSONA_RESTART_DELAY: int = int(os.getenv("PERSONA_RESTART_DELAY", "60"))  # Segundos antes de reiniciar una persona caída (0 = no reiniciar)
+    
+    # Historial
+    HISTORY_BACKEND: str = os.getenv("HISTORY_BACKEND", "jsonl")  # "jsonl" o "sqlite"
+    HISTORY_COMPACT_EVERY: int = int(os.getenv("HISTORY_COMPACT_EVERY", "500"))  # Appends entre revisiones de compactación
+    HISTORY_MAX_RECORDS: int = int(os.getenv("HISTORY_MAX_RECORDS", "20000"))  # Registros que conserva la compactación (0 = sin límite)
+    HISTORY_MAINTENANCE_INTERVAL: int = 6 * 60 * 60  # Segundos entre compactaciones programadas
+
+    # Variables que cada persona puede leer del entorno con su propio prefijo
+    CREDENTIAL_VARS = [
+        "TWITTER_API_KEY",
+        "TWITTER_API_SECRET",
+        "TWITTER_ACCESS_TOKEN",
+        "TWITTER_ACCESS_TOKEN_SECRET",
+        "TWITTER_USERNAME",
+        "TWITTER_PASSWORD",
+    ]
+
+    @classmethod
+    def for_persona(cls, settings: Dict[str, Any]) -> type:
+        """
+        Crear una configuración derivada para una persona. Las claves en
+        MAYÚSCULAS sobreescriben atributos de Config, `env_prefix` toma las
+        credenciales de variables como LUNA_TWITTER_API_KEY, y todos los
+        archivos de datos se mueven a un directorio propio de la persona.
+        """
+        name = settings["name"]
+        overrides = {key: value for key, value in settings.items() if key.isupper()}
+        
+        prefix = settings.get("env_prefix")
+        if prefix:
+            for var in cls.CREDENTIAL_VARS:
+                value = os.getenv(f"{prefix}{var}")
+                if value:
+                    overrides.setdefault(var, value)
+        
+        # Historial, cola de borradores y checkpoints aislados por persona
+        data_dir = overrides.setdefault("DATA_DIR", os.path.join(cls.DATA_DIR, "personas", name))
+        for attr in dir(cls):
+            value = getattr(cls, attr)
+            if attr.endswith(("_FILE", "_DB")) and attr not in overrides and isinstance(value, str) \
+                    and os.path.dirname(value) == cls.DATA_DIR:
+                overrides[attr] = os.path.join(data_dir, os.path.basename(value))
+        
+        overrides["PERSONA_NAME"] = name
+        return type(f"{cls.__name__}_{name}", (cls,), overrides)
 
     @classmethod
     def validate(cls) -> bool:
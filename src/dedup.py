@@ -0,0 +1,122 @@
+"""
+Índice de similitud (MinHash + LSH) para detectar tweets casi duplicados
+antes de gastar una llamada a la API de Twitter
+"""
+from collections import deque
+from typing import Deque, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+import hashlib
+import re
+
+from src.storage import normalize_content
+
+# Primo de Mersenne para las permutaciones universales (a*x + b) mod p
+_MERSENNE_PRIME = (1 << 61) - 1
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+def _stable_hash(token: str) -> int:
+    """Hash de 64 bits estable entre procesos (hash() de Python no lo es)"""
+    return int.from_bytes(hashlib.blake2b(token.encode('utf-8'), digest_size=8).digest(), 'big')
+
+def shingles(text: str, size: int = 2) -> FrozenSet[int]:
+    """Conjunto de n-gramas de palabras del texto normalizado, como hashes"""
+    words = _WORD_RE.findall(normalize_content(text))
+    if len(words) < size:
+        return frozenset([_stable_hash(" ".join(words))]) if words else frozenset()
+    return frozenset(
+        _stable_hash(" ".join(words[i:i + size]))
+        for i in range(len(words) - size + 1)
+    )
+
+def jaccard(a: FrozenSet[int], b: FrozenSet[int]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+class SimilarityIndex:
+    """
+    Índice incremental de los últimos `lookback` tweets. Las bandas LSH
+    reducen cada consulta a unos pocos candidatos, que luego se comparan
+    con Jaccard exacto sobre sus shingles.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.7,
+        lookback: int = 500,
+        num_perm: int = 32,
+        bands: int = 8,
+        shingle_size: int = 2
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm debe ser múltiplo de bands")
+        self.threshold = threshold
+        self.lookback = lookback
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+
+        # Coeficientes deterministas para que el índice sea reproducible
+        self._perms: List[Tuple[int, int]] = [
+            (_stable_hash(f"a{i}") % (_MERSENNE_PRIME - 1) + 1, _stable_hash(f"b{i}") % _MERSENNE_PRIME)
+            for i in range(num_perm)
+        ]
+        self._entries: Deque[Tuple[int, List[Tuple]]] = deque()
+        self._buckets: Dict[Tuple, Set[int]] = {}
+        self._shingles: Dict[int, FrozenSet[int]] = {}
+        self._next_id = 0
+
+    def _signature(self, tokens: FrozenSet[int]) -> List[int]:
+        if not tokens:
+            return [0] * len(self._perms)
+        return [min((a * t + b) % _MERSENNE_PRIME for t in tokens) for a, b in self._perms]
+
+    def _band_keys(self, signature: List[int]) -> List[Tuple]:
+        return [
+            (band, tuple(signature[band * self.rows:(band + 1) * self.rows]))
+            for band in range(self.bands)
+        ]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, text: str) -> None:
+        """Agregar un tweet al índice, expulsando el más viejo si se supera el lookback"""
+        tokens = shingles(text, self.shingle_size)
+        keys = self._band_keys(self._signature(tokens))
+        entry_id = self._next_id
+        self._next_id += 1
+
+        self._entries.append((entry_id, keys))
+        self._shingles[entry_id] = tokens
+        for key in keys:
+            self._buckets.setdefault(key, set()).add(entry_id)
+
+        while self.lookback and len(self._entries) > self.lookback:
+            self._evict()
+
+    def _evict(self) -> None:
+        entry_id, keys = self._entries.popleft()
+        del self._shingles[entry_id]
+        for key in keys:
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del self._buckets[key]
+
+    def extend(self, texts: Iterable[str]) -> None:
+        for text in texts:
+            self.add(text)
+
+    def max_similarity(self, text: str) -> float:
+        """Mayor similitud Jaccard entre el texto y los candidatos del índice"""
+        tokens = shingles(text, self.shingle_size)
+        candidates: Set[int] = set()
+        for key in self._band_keys(self._signature(tokens)):
+            candidates.update(self._buckets.get(key, ()))
+        return max((jaccard(tokens, self._shingles[c]) for c in candidates), default=0.0)
+
+    def is_duplicate(self, text: str, threshold: Optional[float] = None) -> bool:
+        """Saber si el texto es casi idéntico a algún tweet reciente"""
+        limit = self.threshold if threshold is None else threshold
+        return self.max_similarity(text) >= limit
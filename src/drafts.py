@@ -0,0 +1,133 @@
+"""
+Buffer de borradores pre-generados para que el posteo nunca espere al LLM
+"""
+from collections import deque
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+import asyncio
+import json
+import logging
+import time
+
+from src.storage.atomic import atomic_write_json
+
+logger = logging.getLogger(__name__)
+
+class DraftBuffer:
+    """
+    Cola acotada de tweets listos para postear, persistida en disco.
+    Un productor en segundo plano la mantiene llena y el posteo solo desencola.
+    """
+
+    def __init__(self, path: str, max_size: int = 3, max_age: float = 0, retry_delay: float = 60):
+        self.path = path
+        self.max_size = max_size
+        self.max_age = max_age  # Segundos; 0 = los borradores no caducan
+        self.retry_delay = retry_delay
+
+        self._drafts: Deque[Dict] = deque(self._load())
+        self._changed = asyncio.Condition()
+        self.last_refill_latency: Optional[float] = None
+        self.failed_refills = 0
+
+    def _load(self) -> list:
+        """Cargar los borradores que sobrevivieron al último reinicio"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                drafts = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return []
+        if drafts:
+            logger.info(f"Recuperados {len(drafts)} borradores pendientes")
+        return drafts[-self.max_size:] if self.max_size else drafts
+
+    def _save(self) -> None:
+        """Persistir la cola completa de forma atómica (es pequeña y acotada)"""
+        atomic_write_json(self.path, list(self._drafts), ensure_ascii=False)
+
+    def _age(self, draft: Dict) -> float:
+        created = datetime.fromisoformat(draft["created_at"])
+        return (datetime.now() - created).total_seconds()
+
+    def _drop_stale(self) -> None:
+        if not self.max_age:
+            return
+        before = len(self._drafts)
+        self._drafts = deque(d for d in self._drafts if self._age(d) <= self.max_age)
+        if len(self._drafts) != before:
+            logger.info(f"Descartados {before - len(self._drafts)} borradores caducados")
+            self._save()
+
+    def __len__(self) -> int:
+        return len(self._drafts)
+
+    def pending(self) -> List[Dict]:
+        """Copia de los borradores en cola, del más antiguo al más nuevo"""
+        return list(self._drafts)
+
+    async def put(self, draft: Dict) -> None:
+        """Encolar un borrador, esperando si la cola está llena"""
+        draft.setdefault("created_at", datetime.now().isoformat())
+        async with self._changed:
+            await self._changed.wait_for(lambda: len(self._drafts) < self.max_size)
+            self._drafts.append(draft)
+            self._save()
+            self._changed.notify_all()
+
+    async def get(self) -> Dict:
+        """Desencolar el borrador más antiguo, esperando si no hay ninguno"""
+        return await self.take(lambda draft: draft)
+
+    async def take(self, register: Callable[[Dict], Any]) -> Any:
+        """
+        Desencolar el borrador más antiguo pasándolo antes por `register` (p. ej.
+        registrarlo en el outbox): si falla o el proceso muere en medio, el
+        borrador sigue en la cola persistida en vez de perderse.
+        Returns: Lo que devuelva `register`
+        """
+        async with self._changed:
+            while True:
+                self._drop_stale()
+                if self._drafts:
+                    break
+                await self._changed.wait()
+            result = register(self._drafts[0])
+            self._drafts.popleft()
+            self._save()
+            self._changed.notify_all()
+            return result
+
+    async def run_producer(self, generate: Callable[[], Awaitable[Dict]]) -> None:
+        """Mantener la cola llena generando borradores por adelantado"""
+        while True:
+            async with self._changed:
+                await self._changed.wait_for(lambda: len(self._drafts) < self.max_size)
+
+            start = time.monotonic()
+            try:
+                draft = await generate()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failed_refills += 1
+                # Errores como el presupuesto agotado indican cuándo tiene sentido reintentar
+                delay = getattr(e, "retry_after", None) or self.retry_delay
+                logger.error(f"Error generando borrador, reintentando en {delay:.0f}s: {str(e)}")
+                await asyncio.sleep(delay)
+                continue
+
+            self.last_refill_latency = time.monotonic() - start
+            await self.put(draft)
+            logger.info(f"Borrador listo en {self.last_refill_latency:.1f}s ({len(self._drafts)}/{self.max_size} en cola)")
+
+    def stats(self) -> Dict:
+        """Profundidad de la cola, edad de los borradores y latencia de recarga"""
+        ages = [self._age(d) for d in self._drafts]
+        return {
+            "depth": len(self._drafts),
+            "max_size": self.max_size,
+            "oldest_age": max(ages) if ages else None,
+            "newest_age": min(ages) if ages else None,
+            "last_refill_latency": self.last_refill_latency,
+            "failed_refills": self.failed_refills,
+        }
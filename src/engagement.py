@@ -0,0 +1,149 @@
+"""
+Índice de engagement por topic y selector de topics tipo bandit
+"""
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import json
+import logging
+import random
+
+from src.storage.atomic import atomic_write_json
+
+logger = logging.getLogger(__name__)
+
+# Peso de cada interacción de public_metrics en el puntaje de un tweet
+ENGAGEMENT_WEIGHTS: Dict[str, float] = {
+    "like_count": 1.0,
+    "reply_count": 2.0,
+    "retweet_count": 3.0,
+    "quote_count": 3.0,
+    "bookmark_count": 1.0,
+}
+
+def engagement_score(metrics: Dict[str, int]) -> float:
+    """Puntaje ponderado de las interacciones de un tweet"""
+    return sum(weight * metrics.get(field, 0) for field, weight in ENGAGEMENT_WEIGHTS.items())
+
+class EngagementIndex:
+    """
+    Totales de engagement por topic, actualizados de forma incremental: cuando
+    llegan métricas nuevas de un tweet se resta su puntaje anterior y se suma
+    el nuevo, sin recorrer el historial. Los tweets que salen de la ventana de
+    seguimiento se olvidan pero su último puntaje queda en los totales.
+    """
+
+    def __init__(self, path: str, window: float = 3 * 24 * 60 * 60):
+        self.path = path
+        self.window = window  # Segundos durante los que un tweet se sigue midiendo
+        state = self._load()
+        self._tweets: Dict[str, Dict] = state.get("tweets", {})  # ID -> topic, timestamp, score
+        self._topics: Dict[str, Dict] = state.get("topics", {})  # topic -> total, count
+
+    def _load(self) -> Dict:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save(self) -> None:
+        atomic_write_json(self.path, {"tweets": self._tweets, "topics": self._topics}, ensure_ascii=False)
+
+    def window_start(self) -> datetime:
+        """Fecha desde la que los tweets se siguen midiendo"""
+        return datetime.now() - timedelta(seconds=self.window)
+
+    def update(self, records: Iterable[Dict], metrics: Dict[str, Dict[str, int]]) -> int:
+        """
+        Incorporar las métricas de los registros del historial que las tengan
+        Returns: Cantidad de tweets actualizados
+        """
+        updated = 0
+        for record in records:
+            tweet_id = str(record.get("tweet_id"))
+            topic = record.get("topic")
+            if not topic or tweet_id not in metrics:
+                continue
+
+            score = engagement_score(metrics[tweet_id])
+            totals = self._topics.setdefault(topic, {"total": 0.0, "count": 0})
+            previous = self._tweets.get(tweet_id)
+            if previous is None:
+                totals["count"] += 1
+                totals["total"] += score
+            else:
+                totals["total"] += score - previous["score"]
+            self._tweets[tweet_id] = {"topic": topic, "timestamp": record.get("timestamp"), "score": score}
+            updated += 1
+
+        self._prune()
+        self._save()
+        return updated
+
+    def _prune(self) -> None:
+        """Dejar de seguir los tweets fuera de la ventana (sus puntajes quedan en los totales)"""
+        start = self.window_start().isoformat()
+        self._tweets = {
+            tweet_id: tweet for tweet_id, tweet in self._tweets.items()
+            if (tweet.get("timestamp") or "") >= start
+        }
+
+    def mean(self, topic: str) -> Optional[float]:
+        totals = self._topics.get(topic)
+        if not totals or not totals["count"]:
+            return None
+        return totals["total"] / totals["count"]
+
+    def count(self, topic: str) -> int:
+        return self._topics.get(topic, {}).get("count", 0)
+
+    def stats(self) -> Dict[str, Dict]:
+        """Tweets medidos y engagement medio de cada topic"""
+        return {
+            topic: {"count": totals["count"], "mean": self.mean(topic)}
+            for topic, totals in self._topics.items()
+        }
+
+class TopicSelector:
+    """
+    Bandit epsilon-greedy sobre los brazos (tipo de tweet, topic). Con
+    probabilidad `exploration`, o mientras ningún topic tenga `min_samples`
+    tweets medidos, devuelve None y el bot elige como siempre. Si no, sortea
+    entre los topics medidos con probabilidad proporcional a su engagement
+    medio, para favorecer lo que convierte sin repetir siempre el mismo topic.
+    """
+
+    def __init__(
+        self,
+        index: EngagementIndex,
+        exploration: float = 0.2,
+        min_samples: int = 3,
+        rng: Optional[random.Random] = None
+    ):
+        self.index = index
+        self.exploration = exploration
+        self.min_samples = min_samples
+        self._random = rng or random.Random()
+
+    def choose(self, arms: Sequence[Tuple[str, Dict]]) -> Optional[Tuple[str, Dict]]:
+        """Elegir un brazo por engagement, o None para explorar"""
+        if self._random.random() < self.exploration:
+            return None
+
+        scored: List[Tuple[Tuple[str, Dict], float]] = []
+        for arm in arms:
+            topic = arm[1]["topic"]
+            if self.index.count(topic) >= self.min_samples:
+                scored.append((arm, self.index.mean(topic)))
+        if not scored:
+            return None
+
+        total = sum(mean for _, mean in scored)
+        if total <= 0:
+            return self._random.choice(scored)[0]
+        pick = self._random.uniform(0, total)
+        for arm, mean in scored:
+            pick -= mean
+            if pick <= 0:
+                return arm
+        return scored[-1][0]
@@ -1,6 +1,7 @@
 """
 Templates de prompts relacionados con Story Protocol
 """
+from functools import lru_cache
 
 # Hashtags fijos que se usan en cada tweet
 FIXED_HASHTAGS = ["#bruh", "#storyprotocol"]
@@ -15,36 +16,47 @@ CONTEXTUAL_HASHTAGS = {
 STORY_PROTOCOL_TOPICS = [
     {
         "topic": "La importancia de la propiedad intelectual en Web3",
-        "tags": ["ip"]
+        "tags": ["ip"],
+        "prompt": "importance"
     },
     {
         "topic": "Cómo Story Protocol está revolucionando los derechos de IP",
-        "tags": ["ip"]
+        "tags": ["ip"],
+        "prompt": "basic_explanation"
     },
     {
         "topic": "El futuro de la creatividad y AI en blockchain",
-        "tags": ["ai"]
+        "tags": ["ai"],
+        "prompt": "use_cases"
     },
     {
         "topic": "NFTs y derechos de IP en Story Protocol",
-        "tags": ["nft", "ip"]
+        "tags": ["nft", "ip"],
+        "prompt": "basic_explanation"
     },
     {
         "topic": "Monetización de IP y NFTs en Web3",
-        "tags": ["nft", "ip"]
+        "tags": ["nft", "ip"],
+        "prompt": "use_cases"
     },
     {
         "topic": "Colaboración creativa con AI en blockchain",
-        "tags": ["ai"]
+        "tags": ["ai"],
+        "prompt": "use_cases"
     },
     {
         "topic": "Protección de IP para NFTs",
-        "tags": ["nft", "ip"]
+        "tags": ["nft", "ip"],
+        "prompt": "importance"
     },
 ]
 
 def get_hashtags_for_topic(tags: list) -> str:
     """Generar string de hashtags según el contexto"""
+    return _hashtags_for_tags(tuple(tags))
+
+@lru_cache(maxsize=None)
+def _hashtags_for_tags(tags: tuple) -> str:
     hashtags = FIXED_HASHTAGS.copy()  # Siempre incluir los fijos
     
     # Agregar hashtags contextuales sin duplicar
@@ -95,12 +107,15 @@ WEB3_CATCHPHRASES = [
     "Decentralized como mi actitud! 💅",
 ]
 
-def get_storytelling_template() -> str:
-    return """
-    Como Bruh, el Chihuahua más web3-savvy del mundo, cuéntanos una historia corta sobre:
+# Puntos de la historia corta, compartidos por el tweet y el hilo de storytelling
+STORY_OUTLINE = """
     - Por qué la propiedad intelectual es importante
     - Cómo Story Protocol está cambiando el juego
-    - Un ejemplo práctico de uso
+    - Un ejemplo práctico de uso"""
+
+def get_storytelling_template() -> str:
+    return f"""
+    Como Bruh, el Chihuahua más web3-savvy del mundo, cuéntanos una historia corta sobre:{STORY_OUTLINE}
     
     Recuerda:
     - Mantener tu personalidad sassy
@@ -110,9 +125,13 @@ def get_storytelling_template() -> str:
     - Mantener el tweet en 280 caracteres incluyendo hashtags
     """
 
+# Los templates por topic se construyen una sola vez y se reutilizan
 def get_educational_template(topic_dict: dict) -> str:
-    topic = topic_dict["topic"]
-    hashtags = get_hashtags_for_topic(topic_dict["tags"])
+    return _educational_template(topic_dict["topic"], tuple(topic_dict["tags"]))
+
+@lru_cache(maxsize=256)
+def _educational_template(topic: str, tags: tuple) -> str:
+    hashtags = _hashtags_for_tags(tags)
     
     return f"""
     Quiero que expliques "{topic}" de una manera:
@@ -125,8 +144,11 @@ def get_educational_template(topic_dict: dict) -> str:
     """
 
 def get_territory_marking_template(trend_or_topic: dict) -> str:
-    topic = trend_or_topic["topic"]
-    hashtags = get_hashtags_for_topic(trend_or_topic["tags"])
+    return _territory_marking_template(trend_or_topic["topic"], tuple(trend_or_topic["tags"]))
+
+@lru_cache(maxsize=256)
+def _territory_marking_template(topic: str, tags: tuple) -> str:
+    hashtags = _hashtags_for_tags(tags)
     
     return f"""
     Has encontrado un tema trending sobre {topic}.
@@ -138,4 +160,33 @@ def get_territory_marking_template(trend_or_topic: dict) -> str:
     - Incluye emojis relevantes
     - Termina con estos hashtags: {hashtags}
     - Mantén el tweet en 280 caracteres incluyendo hashtags
-    """
\ No newline at end of file
+    """
+
+# Versión en hilo del storytelling, para lo que no entra en 280 caracteres. El
+# personaje no se nombra: lo define el system prompt de cada persona
+def get_thread_template(topic_dict: dict, segments: int) -> str:
+    return _thread_template(
+        topic_dict["topic"], tuple(topic_dict["tags"]), segments, topic_dict.get("prompt")
+    )
+
+@lru_cache(maxsize=256)
+def _thread_template(topic: str, tags: tuple, segments: int, prompt_key: str = None) -> str:
+    hashtags = _hashtags_for_tags(tags)
+    # Solo la idea educativa del topic (los topics propios de una persona pueden no tener)
+    idea = EDUCATIONAL_PROMPTS.get(prompt_key)
+    ideas = f"""
+    Puedes apoyarte en esta idea, contada con tus palabras y tu estilo:
+{idea}
+    """ if idea else ""
+    
+    return f"""
+    Con tu personalidad de siempre, escribe un hilo de Twitter de entre 3 y {segments}
+    tweets sobre "{topic}" que cuente una historia corta:{STORY_OUTLINE}
+    {ideas}
+    Recuerda:
+    - Usar Spanglish
+    - Incluir emojis relevantes
+    - Cada tweet con menos de 250 caracteres y que se entienda por sí solo
+    - Poner estos hashtags solo al final del último tweet: {hashtags}
+    - No numerar los tweets: la numeración "1/N" se agrega al publicar el hilo
+    """
@@ -0,0 +1,227 @@
+"""
+Contabilidad de tokens y costo de OpenRouter, y governor de presupuesto
+"""
+from datetime import datetime, timedelta
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+import json
+import logging
+import time
+
+from src.config import Config
+from src.storage.atomic import atomic_write_json
+
+logger = logging.getLogger(__name__)
+
+HOUR_FORMAT = "%Y-%m-%dT%H"
+DAY_FORMAT = "%Y-%m-%d"
+KEEP_HOURS = 48  # Buckets horarios que se conservan
+KEEP_DAYS = 31  # Buckets diarios que se conservan
+
+# Fracción del precio del prompt que cobran los tokens servidos desde el cache del proveedor
+CACHED_PROMPT_RATIO = 0.1
+
+# Modos del governor
+MODE_NORMAL = "normal"
+MODE_ECONOMY = "economy"  # Modelo más barato y menos max_tokens
+MODE_PAUSED = "paused"  # Sin generación hasta que se libere la ventana
+
+class BudgetExceededError(Exception):
+    """El presupuesto de la ventana se agotó; `retry_after` indica cuándo se libera"""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+def _empty_counter() -> Dict[str, float]:
+    return {"requests": 0, "prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0, "cost": 0.0}
+
+def estimate_cost(
+    prices: Mapping[str, Tuple[float, float]],
+    model: str,
+    prompt_tokens: int,
+    completion_tokens: int,
+    cached_tokens: int = 0
+) -> Optional[float]:
+    """Costo en USD según la tabla de precios por millón de tokens; None si el modelo no está"""
+    price = prices.get(model)
+    if price is None:
+        return None
+    prompt_price, completion_price = price
+    billed_prompt = prompt_tokens - cached_tokens * (1 - CACHED_PROMPT_RATIO)
+    return (billed_prompt * prompt_price + completion_tokens * completion_price) / 1_000_000
+
+class UsageLedger:
+    """
+    Contadores de tokens y costo por hora y por día, persistidos en JSON.
+    Registrar una llamada solo suma en dos diccionarios; el archivo se
+    reescribe como mucho cada `save_interval` segundos y al cerrar.
+    """
+
+    def __init__(self, path: str, save_interval: float = 30):
+        self.path = path
+        self.save_interval = save_interval
+        state = self._load()
+        self._hours: Dict[str, Dict] = state.get("hours", {})
+        self._days: Dict[str, Dict] = state.get("days", {})
+        self._dirty = False
+        self._last_save = time.monotonic()
+
+    def _load(self) -> Dict:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def save(self) -> None:
+        """Persistir los contadores si cambiaron"""
+        if not self._dirty:
+            return
+        self._prune()
+        atomic_write_json(self.path, {"hours": self._hours, "days": self._days})
+        self._dirty = False
+        self._last_save = time.monotonic()
+
+    def _prune(self) -> None:
+        now = datetime.now()
+        oldest_hour = (now - timedelta(hours=KEEP_HOURS)).strftime(HOUR_FORMAT)
+        oldest_day = (now - timedelta(days=KEEP_DAYS)).strftime(DAY_FORMAT)
+        self._hours = {key: value for key, value in self._hours.items() if key >= oldest_hour}
+        self._days = {key: value for key, value in self._days.items() if key >= oldest_day}
+
+    def record(
+        self,
+        model: str,
+        prompt_tokens: int,
+        completion_tokens: int,
+        cached_tokens: int,
+        cost: float
+    ) -> None:
+        """Sumar una llamada a los contadores de la hora y el día actuales"""
+        now = datetime.now()
+        for buckets, key in ((self._hours, now.strftime(HOUR_FORMAT)), (self._days, now.strftime(DAY_FORMAT))):
+            counter = buckets.setdefault(key, _empty_counter())
+            counter["requests"] += 1
+            counter["prompt_tokens"] += prompt_tokens
+            counter["completion_tokens"] += completion_tokens
+            counter["cached_tokens"] += cached_tokens
+            counter["cost"] += cost
+            by_model = counter.setdefault("models", {})
+            by_model[model] = by_model.get(model, 0.0) + cost
+        self._dirty = True
+        if time.monotonic() - self._last_save >= self.save_interval:
+            self.save()
+
+    def hour(self, when: Optional[datetime] = None) -> Dict:
+        """Contadores de la hora (por defecto la actual)"""
+        key = (when or datetime.now()).strftime(HOUR_FORMAT)
+        return self._hours.get(key) or _empty_counter()
+
+    def day(self, when: Optional[datetime] = None) -> Dict:
+        """Contadores del día (por defecto el actual)"""
+        key = (when or datetime.now()).strftime(DAY_FORMAT)
+        return self._days.get(key) or _empty_counter()
+
+    def history(self, period: str = "hour") -> List[Tuple[str, Dict]]:
+        """Buckets guardados de `period` ("hour" o "day"), del más viejo al más nuevo"""
+        buckets = self._hours if period == "hour" else self._days
+        return sorted(buckets.items())
+
+class CostGovernor:
+    """
+    Decide cómo generar según lo gastado en la hora y el día. Por debajo de
+    `soft_ratio` del presupuesto no cambia nada; entre `soft_ratio` y el
+    límite se pasa a modo economía (modelos ordenados del más barato al más
+    caro y max_tokens reducido); al llegar al límite se pausa la generación
+    hasta que empiece la siguiente hora o día. Un presupuesto en 0 no limita.
+    """
+
+    def __init__(
+        self,
+        ledger: UsageLedger,
+        prices: Mapping[str, Tuple[float, float]],
+        hourly_budget: float = 0.0,
+        daily_budget: float = 0.0,
+        soft_ratio: float = 0.8,
+        economy_tokens_ratio: float = 0.6
+    ):
+        self.ledger = ledger
+        self.prices = prices
+        self.hourly_budget = hourly_budget
+        self.daily_budget = daily_budget
+        self.soft_ratio = soft_ratio
+        self.economy_tokens_ratio = economy_tokens_ratio
+        self._mode = MODE_NORMAL
+
+    @classmethod
+    def from_config(cls, config: type = Config) -> "CostGovernor":
+        """Crear el governor y su ledger según la configuración del bot"""
+        return cls(
+            UsageLedger(config.LLM_USAGE_FILE),
+            config.OPENROUTER_MODEL_PRICES,
+            hourly_budget=config.LLM_HOURLY_BUDGET,
+            daily_budget=config.LLM_DAILY_BUDGET,
+            soft_ratio=config.LLM_BUDGET_SOFT_RATIO,
+            economy_tokens_ratio=config.LLM_ECONOMY_TOKENS_RATIO
+        )
+
+    def _usage_ratios(self) -> Dict[str, float]:
+        ratios = {}
+        if self.hourly_budget:
+            ratios["hour"] = self.ledger.hour()["cost"] / self.hourly_budget
+        if self.daily_budget:
+            ratios["day"] = self.ledger.day()["cost"] / self.daily_budget
+        return ratios
+
+    def _seconds_until_reset(self, window: str) -> float:
+        now = datetime.now()
+        if window == "hour":
+            reset = now.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+        else:
+            reset = now.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+        return (reset - now).total_seconds()
+
+    def mode(self) -> str:
+        """Modo actual según el presupuesto gastado"""
+        ratios = self._usage_ratios()
+        exhausted = [window for window, ratio in ratios.items() if ratio >= 1]
+        if exhausted:
+            mode = MODE_PAUSED
+        elif any(ratio >= self.soft_ratio for ratio in ratios.values()):
+            mode = MODE_ECONOMY
+        else:
+            mode = MODE_NORMAL
+        if mode != self._mode:
+            logger.warning(f"Governor de costo: {self._mode} -> {mode} (gasto/presupuesto: {ratios})")
+            self._mode = mode
+        return mode
+
+    def plan(self, models: Sequence[str], max_tokens: int) -> Tuple[List[str], int]:
+        """
+        Ajustar los modelos candidatos y max_tokens de una llamada al presupuesto
+        Raises: BudgetExceededError si la generación está en pausa
+        """
+        mode = self.mode()
+        if mode == MODE_PAUSED:
+            ratios = self._usage_ratios()
+            retry_after = max(self._seconds_until_reset(w) for w, ratio in ratios.items() if ratio >= 1)
+            raise BudgetExceededError(
+                f"Presupuesto de OpenRouter agotado, generación en pausa por {retry_after / 60:.0f} minutos",
+                retry_after
+            )
+        if mode == MODE_ECONOMY:
+            # Los modelos sin precio conocido van al final; el orden original desempata
+            cheapest_first = sorted(
+                models,
+                key=lambda model: sum(self.prices[model]) if model in self.prices else float("inf")
+            )
+            return cheapest_first, max(1, int(max_tokens * self.economy_tokens_ratio))
+        return list(models), max_tokens
+
+    def report(self) -> Dict:
+        """Gasto de la hora y el día actuales frente a sus presupuestos"""
+        return {
+            "mode": self.mode(),
+            "hour": {**self.ledger.hour(), "budget": self.hourly_budget},
+            "day": {**self.ledger.day(), "budget": self.daily_budget},
+        }
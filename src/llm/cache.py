@@ -0,0 +1,147 @@
+"""
+Cache de respuestas del LLM: LRU en memoria con TTL y una capa opcional en disco
+"""
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+import hashlib
+import json
+import logging
+import sqlite3
+import time
+
+from src.config import Config
+
+logger = logging.getLogger(__name__)
+
+def make_cache_key(model: str, messages: List[Dict], temperature: float, max_tokens: int) -> str:
+    """Clave estable de una petición de chat completion"""
+    payload = json.dumps(
+        {"model": model, "messages": messages, "temperature": temperature, "max_tokens": max_tokens},
+        sort_keys=True,
+        ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+class ResponseCache:
+    """
+    Cache en dos niveles: un LRU en memoria acotado por número de entradas
+    y, si se configura `disk_path`, una tabla SQLite que sobrevive a reinicios.
+    Ambas capas respetan el mismo TTL.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        ttl: float = 3600,
+        disk_path: Optional[str] = None,
+        max_disk_entries: int = 5000
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_disk_entries = max_disk_entries
+
+        self._memory: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._disk: Optional[sqlite3.Connection] = None
+        if disk_path:
+            self._disk = sqlite3.connect(disk_path, check_same_thread=False)
+            self._disk.execute("PRAGMA journal_mode=WAL")
+            self._disk.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._disk.execute("CREATE INDEX IF NOT EXISTS idx_responses_expires ON responses(expires_at)")
+            self._disk.commit()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @classmethod
+    def from_config(cls, config: type = Config) -> "ResponseCache":
+        """Crear el cache según la configuración del bot"""
+        return cls(
+            max_entries=config.LLM_CACHE_MAX_ENTRIES,
+            ttl=config.LLM_CACHE_TTL,
+            disk_path=config.LLM_CACHE_FILE if config.LLM_CACHE_DISK else None,
+            max_disk_entries=config.LLM_CACHE_MAX_DISK_ENTRIES
+        )
+
+    def get(self, key: str) -> Optional[Any]:
+        """Obtener una respuesta válida del cache, o None si no está o expiró"""
+        now = time.time()
+        entry = self._memory.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > now:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._memory[key]
+
+        if self._disk is not None:
+            row = self._disk.execute(
+                "SELECT value, expires_at FROM responses WHERE key = ? AND expires_at > ?",
+                (key, now)
+            ).fetchone()
+            if row is not None:
+                value = json.loads(row[0])
+                self._remember(key, value, row[1])
+                self.hits += 1
+                self.disk_hits += 1
+                return value
+
+        self.misses += 1
+        return None
+
+    def _remember(self, key: str, value: Any, expires_at: float) -> None:
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def set(self, key: str, value: Any) -> None:
+        """Guardar una respuesta en ambas capas"""
+        expires_at = time.time() + self.ttl
+        self._remember(key, value, expires_at)
+
+        if self._disk is not None:
+            with self._disk:
+                self._disk.execute(
+                    "INSERT OR REPLACE INTO responses (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(value, ensure_ascii=False), expires_at)
+                )
+                self._prune_disk()
+
+    def _prune_disk(self) -> None:
+        """Borrar entradas expiradas y recortar la tabla a max_disk_entries"""
+        self._disk.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),))
+        self._disk.execute(
+            "DELETE FROM responses WHERE key IN ("
+            "SELECT key FROM responses ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_disk_entries,)
+        )
+
+    def clear(self) -> None:
+        self._memory.clear()
+        if self._disk is not None:
+            with self._disk:
+                self._disk.execute("DELETE FROM responses")
+
+    def stats(self) -> Dict:
+        """Contadores de aciertos y fallos del cache"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._memory),
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def close(self) -> None:
+        if self._disk is not None:
+            self._disk.close()
+            self._disk = None
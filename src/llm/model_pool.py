@@ -0,0 +1,156 @@
+"""
+Pool ordenado de modelos con circuit breaker y latencias por modelo
+"""
+from collections import deque
+from typing import Deque, Dict, List, Optional, Sequence
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+class CircuitBreaker:
+    """
+    Circuit breaker clásico: tras `failure_threshold` fallos seguidos el circuito
+    se abre y el modelo se salta durante `reset_timeout` segundos. Después se
+    deja pasar una petición de prueba (half-open); si sale bien se cierra.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 60):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def available(self) -> bool:
+        """Saber si el circuito dejaría pasar una petición, sin reservarla"""
+        state = self.state
+        return state == self.CLOSED or (state == self.HALF_OPEN and not self._probing)
+
+    def allow(self) -> bool:
+        """Reservar el paso de una petición (en half-open solo una a la vez)"""
+        if not self.available():
+            return False
+        if self.state == self.HALF_OPEN:
+            self._probing = True
+        return True
+
+    def release(self) -> None:
+        """Devolver el turno de prueba si la petición se canceló sin resultado"""
+        self._probing = False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._probing = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            # Un fallo en half-open vuelve a abrir el circuito por otra ventana
+            self.opened_at = time.monotonic()
+
+class _ModelState:
+    __slots__ = ("breaker", "latencies", "successes", "failures")
+
+    def __init__(self, breaker: CircuitBreaker, window: int):
+        self.breaker = breaker
+        self.latencies: Deque[float] = deque(maxlen=window)
+        self.successes = 0
+        self.failures = 0
+
+class ModelPool:
+    """
+    Modelos en orden de preferencia. Cada uno lleva su circuit breaker y una
+    ventana de latencias recientes para calcular el deadline del hedging.
+    """
+
+    def __init__(
+        self,
+        models: Sequence[str],
+        failure_threshold: int = 3,
+        reset_timeout: float = 60,
+        latency_window: int = 50
+    ):
+        if not models:
+            raise ValueError("El pool necesita al menos un modelo")
+        self.models: List[str] = list(dict.fromkeys(models))  # Sin repetidos, en orden
+        self._states: Dict[str, _ModelState] = {
+            model: _ModelState(CircuitBreaker(failure_threshold, reset_timeout), latency_window)
+            for model in self.models
+        }
+
+    @property
+    def primary(self) -> str:
+        return self.models[0]
+
+    def available(self) -> List[str]:
+        """Modelos que aceptan peticiones ahora, en orden de preferencia"""
+        return [model for model in self.models if self._states[model].breaker.available()]
+
+    def acquire(self, model: str) -> bool:
+        """Reservar una petición al modelo; False si su circuito está abierto"""
+        return self._states[model].breaker.allow()
+
+    def record_success(self, model: str, latency: float) -> None:
+        state = self._states[model]
+        if state.breaker.state != CircuitBreaker.CLOSED:
+            logger.info(f"Modelo {model} recuperado, cerrando su circuito")
+        state.breaker.record_success()
+        state.latencies.append(latency)
+        state.successes += 1
+
+    def record_failure(self, model: str) -> None:
+        state = self._states[model]
+        was_open = state.breaker.opened_at is not None
+        state.breaker.record_failure()
+        state.failures += 1
+        if state.breaker.opened_at is not None and not was_open:
+            logger.warning(f"Circuito abierto para {model} tras {state.breaker.failures} fallos seguidos")
+
+    def release(self, model: str) -> None:
+        """Devolver el turno de prueba de un half-open si la petición se canceló"""
+        self._states[model].breaker.release()
+
+    def percentile(self, model: str, pct: float) -> Optional[float]:
+        latencies = sorted(self._states[model].latencies)
+        if not latencies:
+            return None
+        index = min(len(latencies) - 1, int(len(latencies) * pct / 100))
+        return latencies[index]
+
+    def hedge_delay(self, model: str, min_delay: float, min_samples: int = 5) -> float:
+        """
+        Tiempo a esperar al modelo antes de lanzar la petición de respaldo: su p95
+        reciente, o `min_delay` mientras no haya suficientes muestras.
+        """
+        if len(self._states[model].latencies) < min_samples:
+            return min_delay
+        return max(min_delay, self.percentile(model, 95))
+
+    def stats(self) -> Dict[str, Dict]:
+        """Estado de cada modelo: circuito, éxitos, fallos y latencias"""
+        result = {}
+        for model in self.models:
+            state = self._states[model]
+            result[model] = {
+                "state": state.breaker.state,
+                "successes": state.successes,
+                "failures": state.failures,
+                "p50": self.percentile(model, 50),
+                "p95": self.percentile(model, 95),
+            }
+        return result
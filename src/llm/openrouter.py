@@ -1,29 +1,172 @@
 """
 Integración con OpenRouter API para generación de texto usando LLMs
 """
-from typing import Dict, List, Optional
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+import asyncio
 import json
 import logging
-import requests
+import re
+import time
 from src.config import Config
+from src.llm.budget import CostGovernor, estimate_cost
+from src.llm.cache import ResponseCache, make_cache_key
+from src.llm.model_pool import ModelPool
+from src.knowledge.prompts import story_protocol
+from src.twitter.text import TWEET_MAX_LENGTH, fit_tweet_length
+from src.twitter.threads import estimate_tokens
+from src.metrics import ERRORS, LLM_COST, LLM_FIRST_TOKEN_LATENCY, LLM_TOKENS, RETRIES, STAGE_LATENCY
+
+if TYPE_CHECKING:
+    import aiohttp
 
 logger = logging.getLogger(__name__)
 
+# Modelos en los que OpenRouter respeta los marcadores cache_control, con el
+# prefijo mínimo (en tokens) que el proveedor cachea: por debajo el marcador se
+# ignora, así que no se envía. El primer prefijo que coincide gana.
+PROMPT_CACHE_MIN_TOKENS = (
+    ("anthropic/claude-3-haiku", 2048),
+    ("anthropic/claude-3.5-haiku", 2048),
+    ("anthropic/", 1024),
+    ("google/gemini", 1024),
+)
+
+def prompt_cache_min_tokens(model: str) -> Optional[int]:
+    """Prefijo mínimo cacheable del modelo, o None si no soporta cache_control"""
+    for prefix, min_tokens in PROMPT_CACHE_MIN_TOKENS:
+        if model.startswith(prefix):
+            return min_tokens
+    return None
+
+# Formato de la salida con varios candidatos en una sola respuesta
+CANDIDATE_SEPARATOR = "---"
+CANDIDATE_SEPARATOR_RE = re.compile(r"^\s*-{3,}\s*$", re.MULTILINE)
+CANDIDATE_NUMBERING_RE = re.compile(r"^\s*(?:\d+[.)]|[-•])\s+")
+
 class OpenRouterClient:
-    def __init__(self):
-        self.api_key = Config.OPENROUTER_API_KEY
-        self.api_url = Config.OPENROUTER_API_URL
-        self.model = Config.OPENROUTER_MODEL
+    MAX_TOKENS = 100  # Reducido para funcionar con cuenta gratuita
+    TEMPERATURE = 0.9
+
+    def __init__(
+        self,
+        session: Optional["aiohttp.ClientSession"] = None,
+        cache: Optional[ResponseCache] = None,
+        config: type = Config,
+        governor: Optional[CostGovernor] = None
+    ):
+        self.config = config
+        self.api_key = config.OPENROUTER_API_KEY
+        self.api_url = config.OPENROUTER_API_URL
+        self.model = config.OPENROUTER_MODEL
+        
+        # Modelos de respaldo en orden, cada uno con su circuit breaker
+        self.models = ModelPool(
+            [self.model] + list(config.OPENROUTER_FALLBACK_MODELS),
+            failure_threshold=config.OPENROUTER_CIRCUIT_FAILURES,
+            reset_timeout=config.OPENROUTER_CIRCUIT_RESET
+        )
+        self.hedging = config.OPENROUTER_HEDGING
+        self.hedge_min_delay = config.OPENROUTER_HEDGE_MIN_DELAY
         
         self.headers = {
             "Authorization": f"Bearer {self.api_key}",
             "HTTP-Referer": "https://github.com/bruh-bot",  # Requerido por OpenRouter
             "Content-Type": "application/json"
         }
+        
+        # Sesión compartida: si nos pasan una, no somos dueños de cerrarla
+        self._session = session
+        self._owns_session = session is None
+        
+        # Cache de respuestas, compartible entre clientes
+        self.cache = cache if cache is not None else ResponseCache.from_config(config)
+        self._owns_cache = cache is None
+        
+        # Streaming SSE con corte temprano al llegar al largo de un tweet
+        self.stream = config.OPENROUTER_STREAM
+        self.stream_deadline = config.OPENROUTER_STREAM_DEADLINE
+        
+        # Prompt de sistema memoizado y marcado para prompt caching
+        self.prompt_caching = config.OPENROUTER_PROMPT_CACHING
+        self._system_prompt: Optional[str] = None
+        self._system_msg: Optional[Dict] = None
+        self.usage = {
+            "requests": 0,
+            "estimated_requests": 0,  # Sin `usage` del proveedor (stream cortado o cancelado)
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "cached_tokens": 0,
+            "cost": 0.0,
+        }
+        
+        # Costo por hora y día persistido, y governor que actúa cerca del presupuesto;
+        # compartible entre clientes para que varias personas gasten de un mismo presupuesto
+        self.prices = config.OPENROUTER_MODEL_PRICES
+        self.governor = governor if governor is not None else CostGovernor.from_config(config)
+        self.ledger = self.governor.ledger
+
+    def _get_session(self) -> "aiohttp.ClientSession":
+        """Obtener la sesión HTTP compartida, creándola en el primer uso"""
+        if self._session is None or self._session.closed:
+            self._session = self.create_session(self.config)
+            self._owns_session = True
+        return self._session
+
+    @staticmethod
+    def create_session(config: type = Config) -> "aiohttp.ClientSession":
+        """Crear una sesión HTTP con pool acotado, compartible entre varios clientes"""
+        # aiohttp se importa al crear la primera sesión: es lo más caro del arranque
+        import aiohttp
+        
+        connector = aiohttp.TCPConnector(
+            limit=config.OPENROUTER_MAX_CONNECTIONS,
+            keepalive_timeout=config.OPENROUTER_KEEPALIVE_TIMEOUT
+        )
+        timeout = aiohttp.ClientTimeout(
+            sock_connect=config.OPENROUTER_CONNECT_TIMEOUT,
+            sock_read=config.OPENROUTER_READ_TIMEOUT
+        )
+        return aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+    async def close(self) -> None:
+        """Cerrar la sesión HTTP y liberar las conexiones del pool"""
+        if self._owns_session and self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        if self._owns_cache:
+            self.cache.close()
+        self.ledger.save()
 
     def _create_system_prompt(self) -> str:
-        """Crear el prompt del sistema que define la personalidad del bot"""
-        personality = Config.BOT_PERSONALITY
+        """Crear el prompt del sistema que define la personalidad del bot (una sola vez)"""
+        if self._system_prompt is None:
+            self._system_prompt = self._render_system_prompt()
+        return self._system_prompt
+
+    def _cacheable_prompt(self, model: str) -> bool:
+        """Saber si el prompt de sistema alcanza el prefijo mínimo que `model` cachea"""
+        min_tokens = prompt_cache_min_tokens(model)
+        return min_tokens is not None and estimate_tokens(self._create_system_prompt()) >= min_tokens
+
+    def _system_message(self) -> Dict:
+        """
+        Mensaje de sistema memoizado. Si el modelo soporta prompt caching y el
+        prompt alcanza su prefijo mínimo cacheable (una persona con mucho
+        contexto), se envía como bloque con `cache_control` para que el proveedor
+        reutilice el prefijo entre peticiones; el prompt por defecto (~200 tokens)
+        queda por debajo y va como texto plano.
+        """
+        if self._system_msg is None:
+            prompt = self._create_system_prompt()
+            if self.prompt_caching and self._cacheable_prompt(self.model):
+                content = [{"type": "text", "text": prompt, "cache_control": {"type": "ephemeral"}}]
+            else:
+                content = prompt
+            self._system_msg = {"role": "system", "content": content}
+        return self._system_msg
+
+    def _render_system_prompt(self) -> str:
+        personality = self.config.BOT_PERSONALITY
         
         return f"""You are {personality['name']}, a {personality['species']} with the following traits:
 {', '.join(personality['traits'])}
@@ -40,25 +183,288 @@ Some of your favorite phrases:
 {json.dumps(personality['catchphrases'], indent=2, ensure_ascii=False)}
 """
 
-    async def _generate_with_hashtags(self, messages: List[Dict]) -> str:
-        """Método común para generar tweets con manejo de hashtags y errores"""
+    def _build_payload(self, model: str, messages: List[Dict], max_tokens: int, stream: bool = False) -> Dict:
+        system = messages[0] if messages else None
+        if system and system.get("role") == "system" and isinstance(system.get("content"), list) \
+                and not self._cacheable_prompt(model):
+            # Los modelos de respaldo sin prompt caching (o con un prefijo mínimo
+            # mayor que el prompt) reciben el prompt como texto plano
+            text = "".join(part.get("text", "") for part in system["content"])
+            messages = [{"role": "system", "content": text}] + messages[1:]
+        payload = {
+            "model": model,
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "temperature": self.TEMPERATURE,
+            "usage": {"include": True},  # Pedir el conteo de tokens, incluidos los cacheados
+        }
+        if stream:
+            payload["stream"] = True
+        return payload
+
+    @staticmethod
+    def _estimate_usage(messages: List[Dict], completion_tokens: int) -> Dict:
+        """
+        Uso aproximado de una petición sin el conteo del proveedor. Los tokens
+        cacheados no se conocen y se cobran como prompt completo: el governor
+        sobreestima en vez de dejar la llamada afuera.
+        """
+        prompt_tokens = 0
+        for message in messages:
+            content = message.get("content") or ""
+            if isinstance(content, list):
+                content = "".join(part.get("text", "") for part in content)
+            prompt_tokens += estimate_tokens(content)
+        return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens}
+
+    def _record_usage(
+        self,
+        usage: Optional[Dict],
+        model: str,
+        messages: Optional[List[Dict]] = None,
+        completion_tokens: int = 0
+    ) -> None:
+        """
+        Acumular tokens usados, tokens servidos desde el cache del proveedor y su costo.
+        Sin `usage` se estima a partir de `messages` y de `completion_tokens`.
+        """
+        self.usage["requests"] += 1
+        if not usage:
+            if messages is None:
+                return
+            usage = self._estimate_usage(messages, completion_tokens)
+            self.usage["estimated_requests"] += 1
+        prompt_tokens = usage.get("prompt_tokens") or 0
+        completion_tokens = usage.get("completion_tokens") or 0
+        cached_tokens = (usage.get("prompt_tokens_details") or {}).get("cached_tokens") or 0
+        # OpenRouter informa el costo real en `usage.cost`; si falta, se estima con la tabla
+        cost = usage.get("cost")
+        if cost is None:
+            cost = estimate_cost(self.prices, model, prompt_tokens, completion_tokens, cached_tokens) or 0.0
+        self.usage["prompt_tokens"] += prompt_tokens
+        self.usage["completion_tokens"] += completion_tokens
+        self.usage["cached_tokens"] += cached_tokens
+        self.usage["cost"] += cost
+        self.ledger.record(model, prompt_tokens, completion_tokens, cached_tokens, cost)
+        LLM_TOKENS.inc(prompt_tokens, kind="prompt")
+        LLM_TOKENS.inc(completion_tokens, kind="completion")
+        LLM_TOKENS.inc(cached_tokens, kind="cached")
+        LLM_COST.inc(cost, model=model)
+
+    def usage_report(self) -> Dict:
+        """Tokens y costo de esta sesión, de la hora y del día, y el modo del governor"""
+        return {"session": dict(self.usage), **self.governor.report()}
+
+    async def _read_stream(
+        self,
+        response: "aiohttp.ClientResponse",
+        model: str,
+        messages: List[Dict],
+        cutoff: Optional[int],
+        start: float
+    ) -> Tuple[str, Dict]:
+        """
+        Consumir los eventos SSE acumulando el texto hasta el final o hasta el corte.
+        El uso se registra siempre: si el stream se corta, falla o se cancela antes
+        del evento final con `usage`, se estima con el prompt y el texto recibido.
+        Returns: (texto, estadísticas de esta llamada: latencias, caracteres y corte)
+        """
+        parts: List[str] = []
+        length = 0
+        first_token = None
+        cut = False
+        usage = None
+        
         try:
-            logger.debug(f"Sending request to OpenRouter with messages: {messages}")
-            
-            response = requests.post(
-                self.api_url,
-                headers=self.headers,
-                json={
-                    "model": self.model,
-                    "messages": messages,
-                    "max_tokens": 100,  # Reducido para funcionar con cuenta gratuita
-                    "temperature": 0.9,
-                }
-            )
+            async for raw_line in response.content:
+                line = raw_line.decode('utf-8').strip()
+                # Las líneas que empiezan con ':' son comentarios keep-alive de OpenRouter
+                if not line or line.startswith(":") or not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                
+                event = json.loads(data)
+                if "error" in event:
+                    error_msg = event["error"].get("message", str(event["error"]))
+                    raise ValueError(f"API error: {error_msg}")
+                
+                if event.get("usage"):
+                    usage = event["usage"]
+                
+                choices = event.get("choices") or []
+                delta = (choices[0].get("delta") or {}).get("content") if choices else None
+                if delta:
+                    if first_token is None:
+                        first_token = time.monotonic() - start
+                        LLM_FIRST_TOKEN_LATENCY.observe(first_token, model=model)
+                    parts.append(delta)
+                    length += len(delta)
+                    # Ya tenemos un tweet completo: cortar la conexión deja de generar tokens
+                    if cutoff is not None and length > cutoff:
+                        cut = True
+                        break
+        finally:
+            self._record_usage(usage, model, messages, estimate_tokens("".join(parts)) if parts else 0)
+        
+        stats = {
+            "first_token_latency": first_token,
+            "total_latency": time.monotonic() - start,
+            "chars": length,
+            "cutoff": cut,
+        }
+        return "".join(parts), stats
+
+    async def _complete_streaming(self, model: str, messages: List[Dict], max_tokens: int, cutoff: Optional[int]) -> str:
+        """Petición en modo streaming, cancelable si excede el deadline"""
+        start = time.monotonic()
+        session = self._get_session()
+        async with session.post(
+            self.api_url,
+            headers=self.headers,
+            json=self._build_payload(model, messages, max_tokens, stream=True)
+        ) as response:
             response.raise_for_status()
+            text, stats = await asyncio.wait_for(
+                self._read_stream(response, model, messages, cutoff, start),
+                timeout=self.stream_deadline
+            )
+        logger.debug("Streaming de %s terminado: %s", model, stats)
+        
+        text = text.strip()
+        if not text:
+            raise ValueError("Empty streamed response")
+        return text
+
+    async def _complete(self, messages: List[Dict], max_tokens: int, cutoff: Optional[int] = TWEET_MAX_LENGTH) -> str:
+        """Completar con el pool de modelos y devolver solo el texto (ver _complete_served)"""
+        text, _, _ = await self._complete_served(messages, max_tokens, cutoff)
+        return text
+
+    async def _complete_served(
+        self,
+        messages: List[Dict],
+        max_tokens: int,
+        cutoff: Optional[int] = TWEET_MAX_LENGTH
+    ) -> Tuple[str, str, int]:
+        """
+        Completar usando el pool de modelos: se prueban en orden saltando los que
+        tienen el circuito abierto. Con hedging, si el primero no responde dentro
+        de su p95 se lanza el siguiente en paralelo y gana el que termine antes.
+        Cerca del presupuesto el governor reordena los modelos por precio y baja
+        max_tokens; con el presupuesto agotado lanza BudgetExceededError.
+        Returns: (texto, modelo que respondió, max_tokens efectivo)
+        """
+        models = self.models.available()
+        if not models:
+            raise Exception("Todos los modelos de OpenRouter tienen el circuito abierto")
+        models, max_tokens = self.governor.plan(models, max_tokens)
+        
+        last_error = None
+        if self.hedging and len(models) > 1:
+            try:
+                text, model = await self._complete_hedged(models[0], models[1], messages, max_tokens, cutoff)
+                return text, model, max_tokens
+            except Exception as e:
+                last_error = e
+            models = models[2:]
+        
+        for model in models:
+            if last_error is not None:
+                RETRIES.inc(operation="llm_fallback")
+                logger.warning(f"Probando el modelo de respaldo {model}...")
+            try:
+                return await self._complete_with(model, messages, max_tokens, cutoff), model, max_tokens
+            except Exception as e:
+                last_error = e
+        raise last_error
+
+    async def _complete_with(self, model: str, messages: List[Dict], max_tokens: int, cutoff: Optional[int]) -> str:
+        """Petición a un modelo concreto, registrando en el pool su latencia o su fallo"""
+        if not self.models.acquire(model):
+            raise Exception(f"Circuito abierto para {model}")
+        start = time.monotonic()
+        try:
+            text = await self._request(model, messages, max_tokens, cutoff)
+        except asyncio.CancelledError:
+            self.models.release(model)
+            raise
+        except Exception:
+            self.models.record_failure(model)
+            raise
+        self.models.record_success(model, time.monotonic() - start)
+        return text
+
+    async def _complete_hedged(
+        self,
+        primary: str,
+        backup: str,
+        messages: List[Dict],
+        max_tokens: int,
+        cutoff: Optional[int]
+    ) -> Tuple[str, str]:
+        """
+        Lanzar el respaldo si el primario tarda más que su p95 y quedarnos con el primero que responda
+        Returns: (texto, modelo que respondió)
+        """
+        delay = self.models.hedge_delay(primary, self.hedge_min_delay)
+        tasks = [asyncio.ensure_future(self._complete_with(primary, messages, max_tokens, cutoff))]
+        models = {tasks[0]: primary}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done and tasks[0].exception() is None:
+                return tasks[0].result(), primary
+            
+            if done:
+                logger.warning(f"{primary} falló, pasando a {backup}")
+            else:
+                logger.info(f"{primary} no respondió en {delay:.1f}s, lanzando petición de respaldo a {backup}")
+            RETRIES.inc(operation="llm_hedge")
+            tasks.append(asyncio.ensure_future(self._complete_with(backup, messages, max_tokens, cutoff)))
+            models[tasks[1]] = backup
+            
+            pending = {task for task in tasks if not task.done()}
+            errors = [task.exception() for task in tasks if task.done()]
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result(), models[task]
+                    errors.append(task.exception())
+            raise errors[-1]
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def _request(self, model: str, messages: List[Dict], max_tokens: int, cutoff: Optional[int]) -> str:
+        """Hacer una petición de chat completion a `model` y devolver el texto validado"""
+        import aiohttp
+        
+        start = time.perf_counter()
+        try:
+            if self.stream:
+                return await self._complete_streaming(model, messages, max_tokens, cutoff)
+            
+            logger.debug("Sending request to OpenRouter with messages: %s", messages)
+            
+            session = self._get_session()
+            try:
+                async with session.post(
+                    self.api_url,
+                    headers=self.headers,
+                    json=self._build_payload(model, messages, max_tokens)
+                ) as response:
+                    response.raise_for_status()
+                    result = await response.json(content_type=None)
+            except asyncio.CancelledError:
+                # El proveedor cobra la generación aunque no se lea la respuesta
+                # (p. ej. la petición que pierde un hedge): se cuenta con max_tokens
+                self._record_usage(None, model, messages, max_tokens)
+                raise
             
-            result = response.json()
-            logger.debug(f"Received response: {result}")
+            logger.debug("Received response: %s", result)
             
             # Verificaciones de seguridad
             if not isinstance(result, dict):
@@ -79,56 +485,169 @@ Some of your favorite phrases:
             if not isinstance(message, dict) or "content" not in message:
                 raise ValueError(f"Invalid message format: {message}")
             
-            text = message["content"].strip()
+            self._record_usage(result.get("usage"), model, messages, estimate_tokens(message["content"] or ""))
+            return message["content"].strip()
             
-            # Asegurarnos que el tweet con hashtags no exceda 280 caracteres
-            if len(text) > 280:
-                text = text[:277] + "..."
-                
-            return text
-            
-        except requests.exceptions.RequestException as e:
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            ERRORS.inc(stage="llm_request")
             logger.error(f"Network error: {str(e)}")
             raise Exception(f"Error connecting to OpenRouter: {str(e)}")
         except ValueError as e:
+            ERRORS.inc(stage="llm_request")
             logger.error(f"Value error: {str(e)}")
             raise Exception(f"Error processing response: {str(e)}")
         except Exception as e:
+            ERRORS.inc(stage="llm_request")
             logger.error(f"Unexpected error: {str(e)}")
             raise Exception(f"Error generating text: {str(e)}")
+        finally:
+            STAGE_LATENCY.observe(time.perf_counter() - start, stage="llm_request")
+
+    async def _generate_with_hashtags(
+        self,
+        messages: List[Dict],
+        use_cache: bool = False,
+        hashtags: Optional[str] = None
+    ) -> str:
+        """
+        Método común para generar tweets con manejo de hashtags y errores.
+        En streaming la respuesta se corta al llegar al largo de un tweet, antes
+        de que el modelo escriba los hashtags del final: el recorte agrega
+        `hashtags` (por defecto los fijos) si quedaron afuera.
+        """
+        if hashtags is None:
+            hashtags = story_protocol.get_hashtags_for_topic([])
+        if use_cache:
+            # La clave usa el modelo y max_tokens que se van a pedir de verdad: en
+            # modo economía o con el primario caído la respuesta no es la del primario
+            models, max_tokens = self.governor.plan(self.models.available(), self.MAX_TOKENS)
+            if models:
+                cached = self.cache.get(make_cache_key(models[0], messages, self.TEMPERATURE, max_tokens))
+                if cached is not None:
+                    logger.debug("Respuesta servida desde el cache")
+                    return cached
+        
+        with STAGE_LATENCY.time(stage="llm_generate"):
+            text, model, max_tokens = await self._complete_served(messages, self.MAX_TOKENS)
+            text = fit_tweet_length(text, hashtags=hashtags)
+        
+        if use_cache:
+            self.cache.set(make_cache_key(model, messages, self.TEMPERATURE, max_tokens), text)
+            
+        return text
+
+    @staticmethod
+    def _split_candidates(text: str) -> List[str]:
+        """Separar la salida multi-tweet en candidatos individuales"""
+        candidates = []
+        for block in CANDIDATE_SEPARATOR_RE.split(text):
+            block = CANDIDATE_NUMBERING_RE.sub("", block.strip()).strip()
+            if block:
+                candidates.append(block)
+        return candidates
+
+    async def generate_tweet_candidates(
+        self,
+        prompt: Optional[str] = None,
+        n: int = 3,
+        hashtags: Optional[str] = None
+    ) -> List[str]:
+        """
+        Generar varios candidatos de tweet en una sola petición.
+        Se pide una salida estructurada en vez del parámetro `n`, que no todos
+        los proveedores de OpenRouter respetan. Con n=1 se hace una generación
+        simple, que conserva `hashtags` si el streaming la corta.
+        """
+        if n <= 1:
+            return [await self.generate_tweet(prompt=prompt, hashtags=hashtags)]
+        
+        content = prompt if prompt else "Generate a tweet about Story Protocol and Web3"
+        content += (
+            f"\n\nEscribe {n} versiones distintas de este tweet. "
+            f"Separa cada versión con una línea que contenga solo {CANDIDATE_SEPARATOR}. "
+            "No numeres las versiones ni agregues texto extra."
+        )
+        messages = [
+            self._system_message(),
+            {"role": "user", "content": content}
+        ]
+        
+        text = await self._complete(messages, self.MAX_TOKENS * n, cutoff=None)
+        candidates = self._split_candidates(text)
+        logger.debug("Recibidos %d/%d candidatos en una petición", len(candidates), n)
+        return candidates
+
+    async def generate_thread(self, prompt: str, max_segments: int = 5) -> List[str]:
+        """
+        Generar un hilo completo en una sola petición, con los tweets separados
+        igual que los candidatos. Devuelve los segmentos sin recortar.
+        """
+        content = prompt + (
+            f"\n\nSepara cada tweet del hilo con una línea que contenga solo {CANDIDATE_SEPARATOR}. "
+            "No agregues texto antes ni después del hilo."
+        )
+        messages = [
+            self._system_message(),
+            {"role": "user", "content": content}
+        ]
+        
+        with STAGE_LATENCY.time(stage="llm_generate_thread"):
+            text = await self._complete(messages, self.MAX_TOKENS * max_segments, cutoff=None)
+        segments = self._split_candidates(text)[:max_segments]
+        logger.debug("Recibido hilo de %d segmentos", len(segments))
+        return segments
 
-    async def generate_tweet(self, prompt: Optional[str] = None) -> str:
+    async def generate_tweet(
+        self,
+        prompt: Optional[str] = None,
+        use_cache: bool = False,
+        hashtags: Optional[str] = None
+    ) -> str:
         """Generar un nuevo tweet basado en el prompt proporcionado"""
         messages = [
-            {"role": "system", "content": self._create_system_prompt()},
+            self._system_message(),
             {
                 "role": "user",
                 "content": prompt if prompt else "Generate a tweet about Story Protocol and Web3"
             }
         ]
 
-        return await self._generate_with_hashtags(messages)
+        return await self._generate_with_hashtags(messages, use_cache=use_cache, hashtags=hashtags)
 
-    async def generate_reply(self, tweet_text: str, mention_context: Optional[str] = None) -> str:
-        """Generar una respuesta a un tweet"""
+    async def generate_reply(
+        self,
+        tweet_text: str,
+        mention_context: Optional[str] = None,
+        use_cache: bool = False,
+        hashtags: Optional[str] = None
+    ) -> str:
+        """
+        Generar una respuesta a un tweet. Sin cache por defecto: dos menciones
+        iguales recibirían el mismo texto y Twitter rechaza la segunda como duplicado.
+        """
         messages = [
-            {"role": "system", "content": self._create_system_prompt()},
+            self._system_message(),
             {"role": "user", "content": f"Generate a sassy reply to this tweet: {tweet_text}"}
         ]
         
         if mention_context:
             messages[1]["content"] += f"\nContext of the conversation: {mention_context}"
         
-        return await self._generate_with_hashtags(messages)
+        return await self._generate_with_hashtags(messages, use_cache=use_cache, hashtags=hashtags)
 
-    async def generate_story_protocol_insight(self, prompt: Optional[str] = None) -> str:
+    async def generate_story_protocol_insight(
+        self,
+        prompt: Optional[str] = None,
+        use_cache: bool = True,
+        hashtags: Optional[str] = None
+    ) -> str:
         """Generar un insight sobre Story Protocol con hashtags contextuales"""
         messages = [
-            {"role": "system", "content": self._create_system_prompt()},
+            self._system_message(),
             {
                 "role": "user",
                 "content": prompt if prompt else "Generate an insight about Story Protocol with sassy chihuahua style"
             }
         ]
         
-        return await self._generate_with_hashtags(messages)
\ No newline at end of file
+        return await self._generate_with_hashtags(messages, use_cache=use_cache, hashtags=hashtags)
\ No newline at end of file
@@ -0,0 +1,63 @@
+"""
+Ranking local de candidatos de tweet generados por el LLM
+"""
+from typing import List, NamedTuple, Optional, Sequence
+
+from src.dedup import SimilarityIndex
+from src.twitter.text import TWEET_MAX_LENGTH, weighted_length
+
+# Pesos de cada criterio en la puntuación final
+_WEIGHT_HASHTAGS = 0.4
+_WEIGHT_NOVELTY = 0.4
+_WEIGHT_PERSONA = 0.2
+
+class Candidate(NamedTuple):
+    text: str
+    score: float
+    similarity: float
+    fits: bool
+
+def _hashtag_coverage(text: str, hashtags: str) -> float:
+    """Fracción de los hashtags requeridos que aparecen en el texto"""
+    required = hashtags.split()
+    if not required:
+        return 1.0
+    lowered = text.lower()
+    return sum(1 for tag in required if tag.lower() in lowered) / len(required)
+
+def _persona_score(text: str, catchphrases: Sequence[str]) -> float:
+    """1 si usa alguna catchphrase, 0.5 si al menos hace una acción *así*"""
+    lowered = text.lower()
+    if any(phrase.lower() in lowered for phrase in catchphrases):
+        return 1.0
+    if text.count("*") >= 2:
+        return 0.5
+    return 0.0
+
+def score_candidate(
+    text: str,
+    hashtags: str = "",
+    similarity: Optional[SimilarityIndex] = None,
+    catchphrases: Sequence[str] = ()
+) -> Candidate:
+    """Puntuar un candidato: largo, hashtags, novedad frente al historial y estilo"""
+    max_similarity = similarity.max_similarity(text) if similarity is not None else 0.0
+    fits = 0 < weighted_length(text) <= TWEET_MAX_LENGTH
+    score = (
+        _WEIGHT_HASHTAGS * _hashtag_coverage(text, hashtags)
+        + _WEIGHT_NOVELTY * (1.0 - max_similarity)
+        + _WEIGHT_PERSONA * _persona_score(text, catchphrases)
+    )
+    if not fits:
+        score -= 1.0  # Un tweet que hay que recortar siempre pierde contra uno que cabe
+    return Candidate(text, score, max_similarity, fits)
+
+def rank_candidates(
+    candidates: Sequence[str],
+    hashtags: str = "",
+    similarity: Optional[SimilarityIndex] = None,
+    catchphrases: Sequence[str] = ()
+) -> List[Candidate]:
+    """Ordenar candidatos del mejor al peor"""
+    scored = [score_candidate(text, hashtags, similarity, catchphrases) for text in candidates]
+    return sorted(scored, key=lambda c: c.score, reverse=True)
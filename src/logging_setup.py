@@ -0,0 +1,130 @@
+"""
+Configuración única de logging: los handlers de consola y archivo corren en
+un hilo aparte (QueueHandler/QueueListener) para que el event loop no espere
+a las escrituras en disco
+"""
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler, TimedRotatingFileHandler
+from typing import Optional
+import atexit
+import copy
+import json
+import logging
+import queue
+
+from src.config import Config
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Atributos estándar de LogRecord; el resto se considera `extra` y va al JSON
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+_listener: Optional[QueueListener] = None
+
+class JsonFormatter(logging.Formatter):
+    """Una línea JSON por registro, con los campos pasados en `extra`"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+class _PreparedQueueHandler(QueueHandler):
+    """
+    QueueHandler que solo resuelve el mensaje (msg % args) en el hilo que
+    loguea; la hora, el formato final y la traza se arman en el listener.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info and not record.exc_text:
+            # El traceback referencia frames vivos: se resuelve a texto antes de encolarlo
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+def _file_handler(config: type, path: str) -> logging.Handler:
+    """Archivo con rotación por tamaño, o por tiempo si LOG_ROTATE_WHEN está definido"""
+    if config.LOG_ROTATE_WHEN:
+        return TimedRotatingFileHandler(
+            path,
+            when=config.LOG_ROTATE_WHEN,
+            backupCount=config.LOG_BACKUP_COUNT,
+            encoding='utf-8',
+            delay=True
+        )
+    return RotatingFileHandler(
+        path,
+        maxBytes=config.LOG_MAX_BYTES,
+        backupCount=config.LOG_BACKUP_COUNT,
+        encoding='utf-8',
+        delay=True
+    )
+
+def setup_logging(
+    config: type = Config,
+    level: Optional[str] = None,
+    log_file: Optional[str] = None,
+    json_output: Optional[bool] = None
+) -> QueueListener:
+    """
+    Reemplazar los handlers del logger raíz por un QueueHandler y arrancar el
+    listener que escribe a consola y, si hay `log_file`, a un archivo rotado.
+    Llamarla de nuevo reconfigura el logging (p. ej. en cada proceso de un shard).
+
+    Args:
+        config: Config de donde leer LOG_* por defecto
+        level: Nivel mínimo (por defecto LOG_LEVEL)
+        log_file: Ruta del archivo de log (por defecto LOG_FILE; "" = solo consola)
+        json_output: Escribir JSON en vez de texto (por defecto LOG_JSON)
+    """
+    global _listener
+    stop_logging()
+
+    level = level or config.LOG_LEVEL
+    log_file = config.LOG_FILE if log_file is None else log_file
+    json_output = config.LOG_JSON if json_output is None else json_output
+
+    formatter = JsonFormatter() if json_output else logging.Formatter(TEXT_FORMAT)
+    handlers = [logging.StreamHandler()]
+    if log_file:
+        handlers.append(_file_handler(config, log_file))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+    root.addHandler(_PreparedQueueHandler(log_queue))
+    root.setLevel(level.upper() if isinstance(level, str) else level)
+
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+def stop_logging() -> None:
+    """Vaciar la cola y cerrar los handlers del listener activo"""
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    _listener = None
+
+atexit.register(stop_logging)
@@ -0,0 +1,228 @@
+"""
+Métricas en formato Prometheus servidas por un endpoint /metrics local.
+Mientras el servidor no está activo, registrar una métrica no hace nada.
+"""
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Buckets pensados para latencias de red y del LLM (segundos)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+_NULL_CONTEXT = nullcontext()
+
+def _format_labels(names: Sequence[str], values: Tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, registry: "MetricsRegistry", name: str, documentation: str, labels: Sequence[str] = ()):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        if not self.registry.enabled:
+            return
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        for key, value in self._values.items():
+            lines.append(f"{self.name}{_format_labels(self.label_names, key)} {value}")
+        return lines
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        if not self.registry.enabled:
+            return
+        self._values[self._key(labels)] = value
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, *args, buckets: Sequence[float] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(buckets)
+        # Por cada combinación de labels: conteos por bucket (+Inf al final), suma y total
+        self._values: Dict[Tuple, List] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        if not self.registry.enabled:
+            return
+        key = self._key(labels)
+        state = self._values.get(key)
+        if state is None:
+            state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        state[0][bisect_left(self.buckets, value)] += 1
+        state[1] += value
+        state[2] += 1
+
+    def time(self, **labels):
+        """Context manager que observa la duración del bloque (sirve también con await dentro)"""
+        if not self.registry.enabled:
+            return _NULL_CONTEXT
+        return self._timer(labels)
+
+    @contextmanager
+    def _timer(self, labels: Dict[str, str]) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        for key, (counts, total, count) in self._values.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                labels = _format_labels(self.label_names, key, 'le="' + le + '"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+class MetricsRegistry:
+    def __init__(self):
+        self.enabled = False
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], None]] = []
+
+    def counter(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Counter:
+        metric = Counter(self, name, documentation, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def gauge(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Gauge:
+        metric = Gauge(self, name, documentation, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        metric = Histogram(self, name, documentation, labels, buckets=buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        """Registrar una función que actualiza gauges justo antes de cada scrape"""
+        self._collectors.append(collector)
+
+    def remove_collector(self, collector: Callable[[], None]) -> None:
+        if collector in self._collectors:
+            self._collectors.remove(collector)
+
+    def render(self) -> str:
+        """Exposición completa en formato de texto de Prometheus"""
+        for collector in self._collectors:
+            try:
+                collector()
+            except Exception as e:
+                logger.error(f"Error en un collector de métricas: {str(e)}")
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+REGISTRY = MetricsRegistry()
+
+STAGE_LATENCY = REGISTRY.histogram(
+    "bruhbot_stage_latency_seconds",
+    "Latencia de cada etapa del pipeline",
+    labels=("stage",)
+)
+LLM_FIRST_TOKEN_LATENCY = REGISTRY.histogram(
+    "bruhbot_llm_first_token_seconds",
+    "Latencia hasta el primer token de una respuesta en streaming",
+    labels=("model",)
+)
+RETRIES = REGISTRY.counter(
+    "bruhbot_retries_total",
+    "Reintentos por operación",
+    labels=("operation",)
+)
+RATE_LIMIT_WAIT = REGISTRY.counter(
+    "bruhbot_rate_limit_wait_seconds_total",
+    "Segundos esperando a que reinicie una ventana de rate limit",
+    labels=("endpoint",)
+)
+LLM_TOKENS = REGISTRY.counter(
+    "bruhbot_llm_tokens_total",
+    "Tokens consumidos en OpenRouter",
+    labels=("kind",)
+)
+LLM_COST = REGISTRY.counter(
+    "bruhbot_llm_cost_usd_total",
+    "Costo estimado en USD de las llamadas a OpenRouter",
+    labels=("model",)
+)
+ERRORS = REGISTRY.counter(
+    "bruhbot_errors_total",
+    "Errores por etapa",
+    labels=("stage",)
+)
+QUEUE_DEPTH = REGISTRY.gauge(
+    "bruhbot_queue_depth",
+    "Elementos pendientes en cada cola",
+    labels=("queue", "persona")
+)
+DRAFT_OLDEST_AGE = REGISTRY.gauge(
+    "bruhbot_draft_oldest_age_seconds",
+    "Edad del borrador más viejo en cola",
+    labels=("persona",)
+)
+
+async def start_metrics_server(port: int, host: str = "127.0.0.1"):
+    """Levantar el servidor /metrics y activar el registro de métricas"""
+    from aiohttp import web
+
+    async def handle_metrics(request):
+        return web.Response(text=REGISTRY.render(), content_type="text/plain", charset="utf-8")
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle_metrics)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    REGISTRY.enabled = True
+    logger.info(f"Métricas disponibles en http://{host}:{port}/metrics")
+    return runner
+
+async def stop_metrics_server(runner: Optional[object]) -> None:
+    if runner is not None:
+        REGISTRY.enabled = False
+        await runner.cleanup()
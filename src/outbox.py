@@ -0,0 +1,146 @@
+"""
+Outbox write-ahead de tweets por publicar
+"""
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional
+import json
+import logging
+import os
+import uuid
+
+from src.storage.atomic import atomic_write_jsonl
+
+logger = logging.getLogger(__name__)
+
+class Outbox:
+    """
+    Log append-only (JSONL con fsync) de los tweets generados. Cada borrador se
+    registra antes de postearlo y se marca entregado con el ID del tweet; lo que
+    quede pendiente tras un post fallido o un crash se reintenta al reiniciar en
+    vez de volver a pagar la generación.
+
+    Los hilos guardan sus segmentos y los IDs ya publicados (operación
+    progress), así un hilo interrumpido se retoma desde el último segmento.
+
+    Operaciones del log: add, progress, done, failed y abandon (tras `max_attempts`
+    fallos o un rechazo permanente de Twitter).
+    """
+
+    def __init__(self, path: str, max_attempts: int = 5, compact_every: int = 100):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.compact_every = compact_every
+        self._pending: "OrderedDict[str, Dict]" = OrderedDict()
+        self._settled = 0  # Entradas cerradas desde la última compactación
+        self._load()
+
+    def _load(self) -> None:
+        """Reconstruir las entradas pendientes reproduciendo el log"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return
+
+        for line in lines:
+            try:
+                op = json.loads(line)
+            except json.JSONDecodeError:
+                # Última línea truncada por un crash a mitad de escritura
+                logger.warning(f"Línea inválida ignorada en {self.path}")
+                continue
+            entry_id = op.get("id")
+            if op.get("op") == "add":
+                self._pending[entry_id] = {k: v for k, v in op.items() if k != "op"}
+            elif op.get("op") == "progress" and entry_id in self._pending:
+                self._pending[entry_id].setdefault("posted", []).append(op.get("tweet_id"))
+            elif op.get("op") == "failed" and entry_id in self._pending:
+                self._pending[entry_id]["attempts"] = op.get("attempts", 0)
+            elif op.get("op") in ("done", "abandon"):
+                self._pending.pop(entry_id, None)
+                self._settled += 1
+
+        if self._pending:
+            logger.info(f"Outbox: {len(self._pending)} tweets pendientes de publicar")
+        # Reescribir si el log terminó a medias, para que el próximo append no quede pegado
+        if self._settled >= self.compact_every or (lines and not lines[-1].endswith("\n")):
+            self.compact()
+
+    def _append(self, op: Dict) -> None:
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(op, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def pending(self) -> List[Dict]:
+        """Entradas sin entregar, de la más antigua a la más nueva"""
+        return list(self._pending.values())
+
+    def next_pending(self) -> Optional[Dict]:
+        """La entrada pendiente más antigua, o None si no hay ninguna"""
+        return next(iter(self._pending.values()), None)
+
+    def add(self, draft: Dict) -> Dict:
+        """Registrar un borrador antes de postearlo"""
+        entry = {
+            "id": uuid.uuid4().hex,
+            "content": draft["content"],
+            "kind": draft.get("kind"),
+            "topic": draft.get("topic"),
+            "created_at": draft.get("created_at") or datetime.now().isoformat(),
+            "attempts": 0,
+        }
+        if draft.get("segments"):
+            entry["segments"] = list(draft["segments"])
+            entry["posted"] = []
+        self._append({"op": "add", **entry})
+        self._pending[entry["id"]] = entry
+        return entry
+
+    def mark_done(self, entry_id: str, tweet_id: Optional[str]) -> None:
+        """Marcar una entrada como publicada"""
+        self._append({"op": "done", "id": entry_id, "tweet_id": tweet_id})
+        self._settle(entry_id)
+
+    def mark_progress(self, entry_id: str, tweet_id: str) -> None:
+        """Registrar un segmento publicado de un hilo"""
+        entry = self._pending.get(entry_id)
+        if entry is None:
+            return
+        self._append({"op": "progress", "id": entry_id, "tweet_id": tweet_id})
+        entry.setdefault("posted", []).append(tweet_id)
+
+    def mark_failed(self, entry_id: str) -> None:
+        """Contar un intento fallido; tras `max_attempts` la entrada se abandona"""
+        entry = self._pending.get(entry_id)
+        if entry is None:
+            return
+        entry["attempts"] += 1
+        if entry["attempts"] >= self.max_attempts:
+            logger.error(f"Abandonando tweet del outbox tras {entry['attempts']} intentos: {entry['content']}")
+            self.mark_abandoned(entry_id)
+            return
+        self._append({"op": "failed", "id": entry_id, "attempts": entry["attempts"]})
+
+    def mark_abandoned(self, entry_id: str) -> None:
+        """Descartar una entrada que no se va a poder publicar (p. ej. rechazada por Twitter)"""
+        entry = self._pending.get(entry_id)
+        if entry is None:
+            return
+        self._append({"op": "abandon", "id": entry_id, "attempts": entry["attempts"]})
+        self._settle(entry_id)
+
+    def _settle(self, entry_id: str) -> None:
+        self._pending.pop(entry_id, None)
+        self._settled += 1
+        if self._settled >= self.compact_every:
+            self.compact()
+
+    def compact(self) -> None:
+        """Reescribir el log dejando solo las entradas pendientes"""
+        atomic_write_jsonl(self.path, ({"op": "add", **entry} for entry in self._pending.values()))
+        self._settled = 0
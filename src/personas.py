@@ -0,0 +1,163 @@
+"""
+Ejecución de varias personas/cuentas en un mismo proceso compartiendo pools
+"""
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List
+import asyncio
+import json
+import logging
+import os
+
+from src.bot import BruhBot
+from src.config import Config
+from src.llm.budget import CostGovernor
+from src.llm.cache import ResponseCache
+from src.llm.openrouter import OpenRouterClient
+from src.logging_setup import setup_logging
+from src.metrics import start_metrics_server, stop_metrics_server
+from src.twitter.api import TwitterAPI
+
+logger = logging.getLogger(__name__)
+
+def load_persona_settings(path: str) -> List[Dict]:
+    """Leer la lista de personas del archivo JSON"""
+    with open(path, 'r', encoding='utf-8') as f:
+        settings = json.load(f)
+    if not isinstance(settings, list) or not all("name" in persona for persona in settings):
+        raise ValueError(f"{path} debe ser una lista de personas con 'name'")
+    return settings
+
+class PersonaRunner:
+    """
+    Corre N bots en un solo event loop. Comparten la sesión HTTP de OpenRouter,
+    el cache del LLM, el governor de costo (el presupuesto del LLM es del
+    proceso, no de cada persona), la sesión HTTP de tweepy y su executor; cada
+    cuenta conserva sus credenciales, su rate limiter y su historial.
+    Lo compartido sale de `base_config`, que también define el puerto de /metrics.
+    """
+
+    def __init__(
+        self,
+        persona_settings: List[Dict],
+        restart_delay: float = Config.PERSONA_RESTART_DELAY,
+        base_config: type = Config
+    ):
+        self.base_config = base_config
+        self.configs = [base_config.for_persona(settings) for settings in persona_settings]
+        self.restart_delay = restart_delay  # Segundos antes de reiniciar una persona caída; 0 = no reiniciar
+        self.bots: List[BruhBot] = []
+        self.cache = ResponseCache.from_config(base_config)
+        self.governor = CostGovernor.from_config(base_config)
+        self.twitter_session = TwitterAPI.create_session(base_config)
+        self.twitter_executor = TwitterAPI.create_executor(base_config)
+        self.llm_session = None
+
+    def _build_bots(self) -> None:
+        # La sesión de aiohttp se crea dentro del event loop
+        self.llm_session = OpenRouterClient.create_session(self.base_config)
+        for config in self.configs:
+            config.validate()
+            llm = OpenRouterClient(
+                session=self.llm_session,
+                cache=self.cache,
+                config=config,
+                governor=self.governor
+            )
+            twitter_api = TwitterAPI(
+                config=config,
+                session=self.twitter_session,
+                executor=self.twitter_executor
+            )
+            self.bots.append(BruhBot(config=config, llm=llm, twitter_api=twitter_api))
+            logger.info(f"Persona '{config.PERSONA_NAME}' lista")
+
+    async def _supervise(self, bot: BruhBot) -> None:
+        """
+        Correr una persona aislada de las demás: si su bot falla se registra el
+        error y, con `restart_delay`, se reinicia; sin él la persona queda
+        detenida y el resto sigue corriendo.
+        """
+        name = bot.config.PERSONA_NAME
+        while True:
+            try:
+                await bot.run()
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"La persona '{name}' se detuvo por un error: {str(e)}")
+                if not self.restart_delay:
+                    return
+            logger.info(f"Reiniciando la persona '{name}' en {self.restart_delay:.0f}s")
+            await asyncio.sleep(self.restart_delay)
+
+    async def run(self) -> None:
+        """Ejecutar todas las personas, cada una supervisada, hasta que terminen o se cancele"""
+        self._build_bots()
+        # Un solo servidor /metrics para todas las personas del proceso
+        metrics_runner = None
+        if self.base_config.METRICS_PORT:
+            metrics_runner = await start_metrics_server(self.base_config.METRICS_PORT, self.base_config.METRICS_HOST)
+        tasks = [
+            asyncio.create_task(self._supervise(bot), name=f"persona-{bot.config.PERSONA_NAME}")
+            for bot in self.bots
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            # Los pools compartidos se cierran recién cuando ninguna persona los usa
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await self.close()
+            await stop_metrics_server(metrics_runner)
+
+    async def close(self) -> None:
+        for bot in self.bots:
+            try:
+                await bot.close()
+            except Exception as e:
+                logger.error(f"Error cerrando persona '{bot.config.PERSONA_NAME}': {str(e)}")
+        if self.llm_session is not None and not self.llm_session.closed:
+            await self.llm_session.close()
+        self.twitter_executor.shutdown(wait=False, cancel_futures=True)
+        self.twitter_session.close()
+        self.cache.close()
+        self.governor.ledger.save()
+
+def _shard_config(shard: int, shards: int) -> type:
+    """
+    Config base de un shard: los procesos no comparten el governor, así que cada
+    uno gasta 1/shards del presupuesto con su propio archivo de gasto y expone
+    /metrics en METRICS_PORT + shard.
+    """
+    root, ext = os.path.splitext(Config.LLM_USAGE_FILE)
+    return type(f"Config_shard{shard}", (Config,), {
+        "LLM_USAGE_FILE": f"{root}.shard{shard}{ext}",
+        "LLM_HOURLY_BUDGET": Config.LLM_HOURLY_BUDGET / shards,
+        "LLM_DAILY_BUDGET": Config.LLM_DAILY_BUDGET / shards,
+        "METRICS_PORT": Config.METRICS_PORT + shard if Config.METRICS_PORT else 0,
+    })
+
+def _run_shard(persona_settings: List[Dict], shard: int, shards: int) -> None:
+    """Punto de entrada de cada proceso del pool"""
+    # El hilo del listener no sobrevive al fork: cada proceso arranca el suyo, con
+    # su propio archivo porque la rotación no es segura entre procesos
+    if Config.LOG_FILE:
+        root, ext = os.path.splitext(Config.LOG_FILE)
+        setup_logging(log_file=f"{root}.shard{shard}{ext}")
+    else:
+        setup_logging()
+    asyncio.run(PersonaRunner(persona_settings, base_config=_shard_config(shard, shards)).run())
+
+def run_sharded(persona_settings: List[Dict], shards: int) -> None:
+    """Repartir las personas entre `shards` procesos, cada uno con su event loop"""
+    groups = [persona_settings[i::shards] for i in range(shards)]
+    groups = [group for group in groups if group]
+    with ProcessPoolExecutor(max_workers=len(groups)) as pool:
+        futures = [
+            pool.submit(_run_shard, group, shard, len(groups))
+            for shard, group in enumerate(groups)
+        ]
+        for future in futures:
+            future.result()
@@ -0,0 +1,179 @@
+"""
+Motor de respuestas a menciones: polling con since_id persistido,
+generación concurrente acotada y posteo espaciado
+"""
+from typing import Callable, Dict, List, Optional, Set
+import asyncio
+import json
+import logging
+import time
+
+from src.llm.budget import MODE_PAUSED, BudgetExceededError
+from src.llm.openrouter import OpenRouterClient
+from src.storage import HistoryStore
+from src.storage.atomic import atomic_write_json
+from src.twitter.api import TweetRejectedError, TwitterAPI
+from src.twitter.threads import build_context
+
+logger = logging.getLogger(__name__)
+
+class ReplyEngine:
+    """
+    Responde menciones en segundo plano sin bloquear el loop de tweets.
+    El hilo y la respuesta de cada mención se preparan en paralelo (bajo un
+    semáforo) y los posts salen de uno en uno con un espaciado mínimo.
+    """
+
+    def __init__(
+        self,
+        twitter_api: TwitterAPI,
+        llm: OpenRouterClient,
+        history: HistoryStore,
+        state_path: str,
+        record_reply: Callable[[str, str, str], None],
+        concurrency: int = 3,
+        post_spacing: float = 30,
+        max_per_poll: int = 10,
+        context_tokens: int = 500,
+        post_reserve: int = 0
+    ):
+        self.twitter_api = twitter_api
+        self.llm = llm
+        self.state_path = state_path
+        self.record_reply = record_reply
+        self.post_spacing = post_spacing
+        self.max_per_poll = max_per_poll
+        self.context_tokens = context_tokens
+        self.post_reserve = post_reserve
+
+        self.since_id: Optional[str] = self._load_state().get("since_id")
+        # Sin checkpoint, el primer poll solo marca dónde empezar (ver _bootstrap)
+        self._bootstrapped = self.since_id is not None
+        self._workers = asyncio.Semaphore(concurrency)
+        self._post_lock = asyncio.Lock()
+        self._last_post = 0.0
+
+        # Menciones ya respondidas, para no contestar dos veces tras un reinicio
+        self._replied: Set[str] = {
+            str(record["in_reply_to"])
+            for record in history.find(tweet_type="reply", limit=1000)
+            if record.get("in_reply_to")
+        }
+
+    def _load_state(self) -> Dict:
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save_state(self) -> None:
+        """Persistir el checkpoint since_id de forma atómica"""
+        atomic_write_json(self.state_path, {"since_id": self.since_id})
+
+    async def _wait_post_slot(self) -> None:
+        """Espaciar los posts de respuestas para no quemar el rate limit"""
+        wait = self._last_post + self.post_spacing - time.monotonic()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    async def _prepare(self, mention: Dict) -> Optional[str]:
+        """Traer el hilo y generar la respuesta a una mención"""
+        async with self._workers:
+            context = None
+            if mention.get("conversation_id"):
+                thread = await self.twitter_api.get_tweet_thread(str(mention["conversation_id"]))
+                context = build_context(thread, exclude_id=mention["id"], token_budget=self.context_tokens)
+            return await self.llm.generate_reply(mention["text"], mention_context=context or None)
+
+    async def _handle(self, mention: Dict) -> bool:
+        """
+        Responder una mención
+        Returns: False si quedó pospuesta por presupuesto y debe volver a pedirse
+        """
+        mention_id = str(mention["id"])
+        try:
+            reply = await self._prepare(mention)
+        except BudgetExceededError as e:
+            logger.info(f"Respuesta a {mention_id} pospuesta por presupuesto: {str(e)}")
+            return False
+        except Exception as e:
+            logger.error(f"Error generando respuesta a {mention_id}: {str(e)}")
+            return True
+
+        async with self._post_lock:
+            await self._wait_post_slot()
+            try:
+                tweet_id = await self.twitter_api.post_reply(reply, mention_id)
+            except TweetRejectedError as e:
+                # Un duplicado no prueba que esta mención tenga respuesta (puede
+                # coincidir con la de otra): no se marca como respondida
+                logger.error(f"Twitter rechazó la respuesta a {mention_id}: {str(e)}")
+                tweet_id = None
+            finally:
+                self._last_post = time.monotonic()
+
+        if tweet_id:
+            self._replied.add(mention_id)
+            self.record_reply(reply, tweet_id, mention_id)
+        return True
+
+    async def _bootstrap(self) -> None:
+        """
+        Primer arranque sin since_id: guardar la mención más nueva como checkpoint
+        sin responder, para no contestar semanas de menciones viejas. Si la API
+        falla queda sin inicializar y se reintenta en el próximo poll.
+        """
+        mentions = await self.twitter_api.get_mentions(max_results=5, max_pages=1)
+        self._bootstrapped = True
+        if mentions:
+            self.since_id = str(max(int(m["id"]) for m in mentions))
+            self._save_state()
+        logger.info(f"Checkpoint de menciones inicializado en {self.since_id}, se responden solo las nuevas")
+
+    async def poll_once(self) -> int:
+        """Procesar las menciones nuevas desde el último checkpoint"""
+        # Las respuestas son de baja prioridad: si el presupuesto de posts está
+        # por agotarse se dejan para el próximo poll sin mover el checkpoint
+        if not self.twitter_api.rate_limiter.has_budget("post", reserve=self.post_reserve):
+            logger.info("Presupuesto de posts bajo, se posponen las respuestas")
+            return 0
+        if self.llm.governor.mode() == MODE_PAUSED:
+            logger.info("Generación en pausa por presupuesto, se posponen las respuestas")
+            return 0
+        
+        try:
+            if not self._bootstrapped:
+                await self._bootstrap()
+                return 0
+            mentions = await self.twitter_api.get_mentions(since_id=self.since_id)
+        except Exception as e:
+            logger.warning(f"No se pudieron obtener menciones, se reintenta en el próximo poll: {str(e)}")
+            return 0
+        
+        if not mentions:
+            return 0
+
+        pending: List[Dict] = [m for m in mentions if str(m["id"]) not in self._replied]
+        # Las más viejas primero, limitadas por poll
+        pending.sort(key=lambda m: int(m["id"]))
+        overflow = len(pending) > self.max_per_poll
+        pending = pending[:self.max_per_poll]
+
+        results = await asyncio.gather(*(self._handle(mention) for mention in pending))
+
+        # Si sobraron menciones o alguna quedó pospuesta por presupuesto, el
+        # checkpoint solo avanza hasta la última resuelta antes de ella; las que
+        # ya se respondieron después están en _replied y no se repiten
+        settled = 0
+        while settled < len(pending) and results[settled]:
+            settled += 1
+        if overflow or settled < len(pending):
+            if not settled:
+                return 0
+            newest = int(pending[settled - 1]["id"])
+        else:
+            newest = max(int(m["id"]) for m in mentions)
+        self.since_id = str(newest)
+        self._save_state()
+        return sum(results)
@@ -0,0 +1,271 @@
+"""
+Scheduler asíncrono de tareas periódicas con deadlines absolutos
+"""
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+import asyncio
+import heapq
+import itertools
+import logging
+import random
+import time
+
+from src.metrics import STAGE_LATENCY
+
+logger = logging.getLogger(__name__)
+
+# Qué hacer con las ejecuciones que se pasaron de su deadline (proceso suspendido,
+# event loop bloqueado o la ejecución anterior todavía corriendo)
+MISSED_SKIP = "skip"  # Descartarlas y seguir en el próximo deadline futuro
+MISSED_RUN_ONCE = "run_once"  # Ejecutar una sola vez ahora y seguir en la grilla
+MISSED_CATCH_UP = "catch_up"  # Ejecutar cada una de las perdidas, una tras otra
+
+MISSED_POLICIES = (MISSED_SKIP, MISSED_RUN_ONCE, MISSED_CATCH_UP)
+
+# Vueltas del event loop que SimulatedClock deja correr antes de avanzar el tiempo
+_SETTLE_ROUNDS = 20
+
+class Clock:
+    """Reloj real: tiempo monotónico y asyncio.sleep"""
+
+    def now(self) -> float:
+        return time.monotonic()
+
+    async def sleep_until(self, deadline: float) -> None:
+        await asyncio.sleep(max(0.0, deadline - self.now()))
+
+    async def sleep(self, seconds: float) -> None:
+        await self.sleep_until(self.now() + seconds)
+
+class SimulatedClock(Clock):
+    """
+    Reloj virtual para pruebas: el tiempo solo avanza con `advance`, que despierta
+    en orden a quien esté dormido. Así una semana de scheduling corre en milisegundos,
+    siempre que las tareas no hagan I/O real.
+    """
+
+    def __init__(self, start: float = 0.0):
+        self._now = start
+        self._sleepers: List = []  # heap de (deadline, secuencia, future)
+        self._sequence = itertools.count()
+
+    def now(self) -> float:
+        return self._now
+
+    async def sleep_until(self, deadline: float) -> None:
+        if deadline <= self._now:
+            await asyncio.sleep(0)
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._sleepers, (deadline, next(self._sequence), future))
+        await future
+
+    async def _settle(self) -> None:
+        for _ in range(_SETTLE_ROUNDS):
+            await asyncio.sleep(0)
+
+    async def advance(self, seconds: float) -> None:
+        """Avanzar el tiempo virtual `seconds`, despertando a cada sleeper en su momento"""
+        target = self._now + seconds
+        await self._settle()
+        while self._sleepers and self._sleepers[0][0] <= target:
+            deadline, _, future = heapq.heappop(self._sleepers)
+            self._now = max(self._now, deadline)
+            if not future.done():
+                future.set_result(None)
+            await self._settle()
+        self._now = target
+
+class Job:
+    """Tarea periódica registrada en el Scheduler"""
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[[], Awaitable[Any]],
+        interval: Union[float, Callable[[], float]],
+        jitter: float = 0.0,
+        max_concurrency: int = 1,
+        missed: str = MISSED_RUN_ONCE
+    ):
+        if missed not in MISSED_POLICIES:
+            raise ValueError(f"Política de ejecuciones perdidas desconocida: {missed}")
+        self.name = name
+        self.func = func
+        self.interval = interval  # Segundos, o función que los devuelve (p. ej. aleatorios)
+        self.jitter = jitter  # Ventana aleatoria [0, jitter) sumada a cada deadline
+        self.max_concurrency = max_concurrency
+        self.missed = missed
+
+        # La grilla avanza desde el deadline anterior, no desde que terminó la
+        # ejecución: la latencia de cada corrida no se acumula como deriva
+        self.base: float = 0.0
+        self.next_run: float = 0.0
+        self.running = 0
+        self.runs = 0
+        self.failures = 0
+        self.skipped = 0
+        self.max_lateness = 0.0
+        self.tasks: set = set()
+
+    def next_interval(self) -> float:
+        return self.interval() if callable(self.interval) else self.interval
+
+class Scheduler:
+    """
+    Heap de jobs ordenado por su próximo deadline. Cada ejecución corre en su
+    propia tarea, acotada por `max_concurrency`, y sus errores se registran sin
+    detener al resto.
+    """
+
+    def __init__(
+        self,
+        clock: Optional[Clock] = None,
+        misfire_grace: float = 5.0,
+        rng: Optional[random.Random] = None
+    ):
+        self.clock = clock or Clock()
+        self.misfire_grace = misfire_grace  # Retraso tolerado antes de aplicar la política de perdidas
+        self._random = rng or random.Random()
+        self._jobs: Dict[str, Job] = {}
+        self._heap: List = []  # (next_run, secuencia, job)
+        self._sequence = itertools.count()
+        self._wakeup = asyncio.Event()
+
+    def add_job(
+        self,
+        name: str,
+        func: Callable[[], Awaitable[Any]],
+        interval: Union[float, Callable[[], float]],
+        jitter: float = 0.0,
+        max_concurrency: int = 1,
+        missed: str = MISSED_RUN_ONCE,
+        delay: float = 0.0
+    ) -> Job:
+        """Registrar un job; la primera ejecución es `delay` segundos después de ahora"""
+        if name in self._jobs:
+            raise ValueError(f"Ya existe un job llamado '{name}'")
+        job = Job(name, func, interval, jitter=jitter, max_concurrency=max_concurrency, missed=missed)
+        job.base = self.clock.now() + delay
+        self._jobs[name] = job
+        self._schedule(job)
+        return job
+
+    def remove_job(self, name: str) -> None:
+        """Quitar un job; sus ejecuciones en curso terminan normalmente"""
+        self._jobs.pop(name, None)
+        self._wakeup.set()
+
+    def get_job(self, name: str) -> Optional[Job]:
+        return self._jobs.get(name)
+
+    def _schedule(self, job: Job) -> None:
+        job.next_run = job.base + (self._random.uniform(0, job.jitter) if job.jitter else 0.0)
+        heapq.heappush(self._heap, (job.next_run, next(self._sequence), job))
+        self._wakeup.set()
+
+    def _advance(self, job: Job, now: float) -> int:
+        """
+        Mover la grilla del job al siguiente deadline y decidir cuántas veces
+        ejecutarlo ahora según su política de ejecuciones perdidas.
+        """
+        job.base += job.next_interval()
+        missed = 0
+        while job.base + self.misfire_grace < now:
+            job.base += job.next_interval()
+            missed += 1
+
+        if not missed:
+            return 1
+        if job.missed == MISSED_SKIP:
+            job.skipped += missed + 1
+            logger.warning(f"Job '{job.name}' atrasado: se descartan {missed + 1} ejecuciones")
+            return 0
+        if job.missed == MISSED_RUN_ONCE:
+            job.skipped += missed
+            logger.warning(f"Job '{job.name}' atrasado: {missed} ejecuciones perdidas, se corre una sola vez")
+            return 1
+        logger.warning(f"Job '{job.name}' atrasado: recuperando {missed + 1} ejecuciones")
+        return missed + 1
+
+    def _dispatch(self, job: Job, now: float) -> None:
+        lateness = now - job.next_run
+        job.max_lateness = max(job.max_lateness, lateness)
+        runs = self._advance(job, now)
+        self._schedule(job)
+
+        if not runs:
+            return
+        if job.running >= job.max_concurrency:
+            job.skipped += runs
+            logger.warning(f"Job '{job.name}' sigue corriendo ({job.running}), se salta esta ejecución")
+            return
+        job.running += 1
+        task = asyncio.create_task(self._execute(job, runs))
+        job.tasks.add(task)
+        task.add_done_callback(job.tasks.discard)
+
+    async def _execute(self, job: Job, runs: int) -> None:
+        """Correr el job `runs` veces seguidas (más de una solo al recuperar perdidas)"""
+        try:
+            for _ in range(runs):
+                try:
+                    with STAGE_LATENCY.time(stage=f"job_{job.name}"):
+                        await job.func()
+                    job.runs += 1
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    job.failures += 1
+                    logger.error(f"Error en el job '{job.name}': {str(e)}")
+        finally:
+            job.running -= 1
+
+    async def run(self) -> None:
+        """Correr los jobs hasta ser cancelado; al cancelar, cancela las ejecuciones en curso"""
+        try:
+            while True:
+                self._wakeup.clear()
+                # Descartar entradas de jobs eliminados
+                while self._heap and self._jobs.get(self._heap[0][2].name) is not self._heap[0][2]:
+                    heapq.heappop(self._heap)
+                if not self._heap:
+                    await self._wakeup.wait()
+                    continue
+
+                deadline, _, job = self._heap[0]
+                now = self.clock.now()
+                if deadline > now:
+                    await self._sleep_or_wakeup(deadline)
+                    continue
+
+                heapq.heappop(self._heap)
+                self._dispatch(job, now)
+        finally:
+            for job in self._jobs.values():
+                for task in list(job.tasks):
+                    task.cancel()
+
+    async def _sleep_or_wakeup(self, deadline: float) -> None:
+        """Dormir hasta el deadline, o antes si se agrega o quita un job"""
+        sleeper = asyncio.ensure_future(self.clock.sleep_until(deadline))
+        waker = asyncio.ensure_future(self._wakeup.wait())
+        try:
+            await asyncio.wait({sleeper, waker}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            sleeper.cancel()
+            waker.cancel()
+
+    def stats(self) -> Dict[str, Dict]:
+        """Ejecuciones, fallos, saltos y próximo deadline de cada job"""
+        now = self.clock.now()
+        return {
+            name: {
+                "runs": job.runs,
+                "failures": job.failures,
+                "skipped": job.skipped,
+                "running": job.running,
+                "max_lateness": job.max_lateness,
+                "next_run_in": max(0.0, job.next_run - now),
+            }
+            for name, job in self._jobs.items()
+        }
@@ -0,0 +1,13 @@
+"""
+Storage module exports
+"""
+from .history import HistoryStore, JsonlHistoryStore, content_hash, normalize_content
+from .sqlite_store import SqliteHistoryStore
+
+__all__ = [
+    'HistoryStore',
+    'JsonlHistoryStore',
+    'SqliteHistoryStore',
+    'content_hash',
+    'normalize_content',
+]
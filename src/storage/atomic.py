@@ -0,0 +1,48 @@
+"""
+Escritura atómica de archivos de estado: archivo temporal + fsync + rename
+"""
+from typing import Any, Iterable
+import json
+import os
+
+def fsync_dir(path: str) -> None:
+    """Persistir la entrada de directorio de `path` tras un rename"""
+    try:
+        fd = os.open(os.path.dirname(path) or ".", os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+def atomic_write_json(path: str, data: Any, **dump_kwargs) -> None:
+    """
+    Reemplazar `path` por `data` en JSON de forma atómica: un crash deja el
+    archivo anterior o el nuevo completo, nunca uno a medias.
+    """
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, **dump_kwargs)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def atomic_write_jsonl(path: str, records: Iterable[Any]) -> int:
+    """
+    Reemplazar `path` por un registro JSON por línea de forma atómica
+    Returns: Cantidad de registros escritos
+    """
+    tmp_path = path + ".tmp"
+    count = 0
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            count += 1
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    fsync_dir(path)
+    return count
@@ -0,0 +1,259 @@
+"""
+Almacenamiento append-only del historial de tweets en formato JSONL
+"""
+from collections import deque
+from datetime import datetime
+from typing import Deque, Dict, Iterator, List, Optional
+import hashlib
+import json
+import logging
+import os
+import unicodedata
+
+from .atomic import atomic_write_jsonl
+
+logger = logging.getLogger(__name__)
+
+# Tamaño de bloque para leer el archivo desde el final
+_TAIL_CHUNK_SIZE = 64 * 1024
+
+def normalize_content(text: str) -> str:
+    """Normalizar un tweet para comparar contenido (unicode, mayúsculas y espacios)"""
+    return " ".join(unicodedata.normalize("NFKC", text).casefold().split())
+
+def content_hash(text: str) -> str:
+    """Hash estable del contenido normalizado de un tweet"""
+    return hashlib.sha256(normalize_content(text).encode('utf-8')).hexdigest()
+
+class HistoryStore:
+    """Interfaz común de los backends de historial que usa BruhBot"""
+
+    def append(self, record: Dict) -> None:
+        """Agregar un registro al historial"""
+        raise NotImplementedError
+
+    def recent(self, n: int) -> List[Dict]:
+        """Obtener los últimos n registros, del más viejo al más nuevo"""
+        raise NotImplementedError
+
+    def __iter__(self) -> Iterator[Dict]:
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def find(
+        self,
+        tweet_type: Optional[str] = None,
+        since: Optional[datetime] = None,
+        topic: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> List[Dict]:
+        """Buscar registros por tipo, fecha mínima y topic (los más nuevos primero)"""
+        since_iso = since.isoformat() if since else None
+        matches = [
+            record for record in self
+            if (tweet_type is None or record.get("type") == tweet_type)
+            and (since_iso is None or record.get("timestamp", "") >= since_iso)
+            and (topic is None or record.get("topic") == topic)
+        ]
+        matches.reverse()
+        return matches[:limit] if limit else matches
+
+    def has_content(self, text: str) -> bool:
+        """Saber si ya se publicó exactamente este texto (tras normalizarlo)"""
+        target = normalize_content(text)
+        return any(normalize_content(record.get("content", "")) == target for record in self)
+
+    def get_by_tweet_id(self, tweet_id: str) -> Optional[Dict]:
+        """Buscar un registro por el ID del tweet publicado"""
+        for record in self:
+            if str(record.get("tweet_id")) == str(tweet_id):
+                return record
+        return None
+
+    def flush(self) -> None:
+        """Asegurar que todo lo escrito esté en disco"""
+
+    def maintain(self) -> None:
+        """Mantenimiento periódico del backend (compactar, checkpoints)"""
+
+    def close(self) -> None:
+        """Liberar los recursos del backend"""
+
+class JsonlHistoryStore(HistoryStore):
+    """
+    Historial en JSONL: un registro por línea, cada append se hace con fsync.
+    Las lecturas son en streaming y `recent` lee el archivo desde el final,
+    así que ni el arranque ni los posts dependen del tamaño del historial.
+    Cada `compact_every` appends (y en `maintain`) se compacta si hay líneas
+    corruptas o más de `max_records` registros; con 0 no se recorta nunca.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        legacy_path: Optional[str] = None,
+        compact_every: int = 500,
+        max_records: int = 0
+    ):
+        self.path = path
+        self.compact_every = compact_every
+        self.max_records = max_records
+
+        self._file = None
+        self._count: Optional[int] = None
+        self._appends_since_compact = 0
+        self._corrupt_lines = False
+
+        if legacy_path:
+            self._migrate_legacy(legacy_path)
+
+    def _migrate_legacy(self, legacy_path: str) -> None:
+        """Convertir el tweets_history.json antiguo a JSONL una sola vez"""
+        if os.path.exists(self.path) or not os.path.exists(legacy_path):
+            return
+
+        try:
+            with open(legacy_path, 'r', encoding='utf-8') as f:
+                records = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.error(f"No se pudo migrar el historial antiguo: {str(e)}")
+            return
+
+        if not isinstance(records, list):
+            logger.error("El historial antiguo no es una lista, se omite la migración")
+            return
+
+        self._write_atomic(records)
+        os.replace(legacy_path, legacy_path + ".migrated")
+        logger.info(f"Historial migrado a JSONL: {len(records)} tweets")
+
+    def _write_atomic(self, records) -> int:
+        """Escribir registros a un archivo temporal y reemplazar el actual de forma atómica"""
+        count = atomic_write_jsonl(self.path, records)
+        self._count = count
+        return count
+
+    def _open_for_append(self):
+        """Abrir el archivo para append, reparando una última línea incompleta"""
+        if self._file is None:
+            self._file = open(self.path, 'a+b')
+            if self._file.tell() > 0:
+                self._file.seek(-1, os.SEEK_END)
+                if self._file.read(1) != b"\n":
+                    # Un crash dejó una línea a medias: la cerramos para no pegarle el siguiente registro
+                    self._file.write(b"\n")
+                    self._corrupt_lines = True
+        return self._file
+
+    def append(self, record: Dict) -> None:
+        """Agregar un registro con un único write + fsync"""
+        f = self._open_for_append()
+        f.write((json.dumps(record, ensure_ascii=False) + "\n").encode('utf-8'))
+        f.flush()
+        os.fsync(f.fileno())
+
+        if self._count is not None:
+            self._count += 1
+
+        self._appends_since_compact += 1
+        if self.compact_every and self._appends_since_compact >= self.compact_every:
+            self._appends_since_compact = 0
+            if self._needs_compaction():
+                self.compact()
+
+    def _parse_line(self, line: bytes) -> Optional[Dict]:
+        line = line.strip()
+        if not line:
+            return None
+        try:
+            return json.loads(line)
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            self._corrupt_lines = True
+            return None
+
+    def __iter__(self) -> Iterator[Dict]:
+        """Recorrer el historial en streaming, sin cargarlo completo en memoria"""
+        try:
+            f = open(self.path, 'rb')
+        except FileNotFoundError:
+            return
+        with f:
+            for line in f:
+                record = self._parse_line(line)
+                if record is not None:
+                    yield record
+
+    def __len__(self) -> int:
+        if self._count is None:
+            self._count = sum(1 for _ in self)
+        return self._count
+
+    def recent(self, n: int) -> List[Dict]:
+        """Leer los últimos n registros desde el final del archivo"""
+        if n <= 0:
+            return []
+        try:
+            f = open(self.path, 'rb')
+        except FileNotFoundError:
+            return []
+
+        with f:
+            f.seek(0, os.SEEK_END)
+            position = f.tell()
+            buffer = b""
+            # n + 1 saltos de línea garantizan n líneas completas
+            while position > 0 and buffer.count(b"\n") <= n:
+                read_size = min(_TAIL_CHUNK_SIZE, position)
+                position -= read_size
+                f.seek(position)
+                buffer = f.read(read_size) + buffer
+
+        lines = buffer.split(b"\n")
+        if position > 0:
+            lines = lines[1:]  # La primera línea puede estar cortada
+
+        records: Deque[Dict] = deque(maxlen=n)
+        for line in lines:
+            record = self._parse_line(line)
+            if record is not None:
+                records.append(record)
+        return list(records)
+
+    def _needs_compaction(self) -> bool:
+        # El primer conteo recorre el archivo y de paso detecta líneas corruptas
+        count = len(self)
+        if self._corrupt_lines:
+            return True
+        return bool(self.max_records) and count > self.max_records
+
+    def compact(self) -> None:
+        """Reescribir el historial sin líneas corruptas y recortado a max_records"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+        if self.max_records:
+            records = deque(self, maxlen=self.max_records)
+        else:
+            records = list(self)
+
+        count = self._write_atomic(records)
+        self._corrupt_lines = False
+        logger.info(f"Historial compactado: {count} tweets")
+
+    def maintain(self) -> None:
+        if self._needs_compaction():
+            self.compact()
+
+    def flush(self) -> None:
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        if self._file is not None:
+            self.flush()
+            self._file.close()
+            self._file = None
@@ -0,0 +1,170 @@
+"""
+Historial de tweets en SQLite con índices para consultas rápidas
+"""
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional
+import json
+import logging
+import sqlite3
+import threading
+
+from .history import HistoryStore, content_hash
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tweets (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    tweet_id TEXT,
+    type TEXT,
+    topic TEXT,
+    content TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tweets_type ON tweets(type);
+CREATE INDEX IF NOT EXISTS idx_tweets_timestamp ON tweets(timestamp);
+CREATE INDEX IF NOT EXISTS idx_tweets_tweet_id ON tweets(tweet_id);
+CREATE INDEX IF NOT EXISTS idx_tweets_content_hash ON tweets(content_hash);
+CREATE INDEX IF NOT EXISTS idx_tweets_topic_timestamp ON tweets(topic, timestamp);
+"""
+
+class SqliteHistoryStore(HistoryStore):
+    """
+    Historial en SQLite (modo WAL) con índices por tipo, fecha, ID del tweet
+    y hash del contenido normalizado.
+
+    Una conexión de sqlite3 no se puede usar desde dos hilos a la vez, así
+    que las escrituras van por una sola conexión serializada con un lock y
+    cada hilo lector abre su propia conexión de solo lectura: con WAL esas
+    lecturas (scripts de consulta, métricas en el executor) ven lo último
+    confirmado sin bloquear ni ser bloqueadas por el posteo.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+        self._write_lock = threading.Lock()
+        self._local = threading.local()
+        self._readers: List[sqlite3.Connection] = []
+
+    def _reader(self) -> sqlite3.Connection:
+        """Conexión de solo lectura del hilo actual, abierta en el primer uso"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+            self._local.conn = conn
+            with self._write_lock:
+                self._readers.append(conn)
+        return conn
+
+    @staticmethod
+    def _to_row(record: Dict) -> tuple:
+        content = record.get("content", "")
+        tweet_id = record.get("tweet_id")
+        return (
+            str(tweet_id) if tweet_id is not None else None,
+            record.get("type"),
+            record.get("topic"),
+            content,
+            content_hash(content),
+            record.get("timestamp") or datetime.now().isoformat(),
+            json.dumps(record, ensure_ascii=False)
+        )
+
+    def append(self, record: Dict) -> None:
+        with self._write_lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO tweets (tweet_id, type, topic, content, content_hash, timestamp, data) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                self._to_row(record)
+            )
+
+    def import_records(self, records: Iterable[Dict]) -> int:
+        """Importar registros de otro backend en una sola transacción"""
+        rows = [self._to_row(record) for record in records]
+        with self._write_lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO tweets (tweet_id, type, topic, content, content_hash, timestamp, data) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+        logger.info(f"Importados {len(rows)} tweets al historial SQLite")
+        return len(rows)
+
+    def _select(self, where: str = "", params: tuple = (), order: str = "id ASC", limit: Optional[int] = None) -> List[Dict]:
+        query = "SELECT data FROM tweets"
+        if where:
+            query += f" WHERE {where}"
+        query += f" ORDER BY {order}"
+        if limit:
+            query += " LIMIT ?"
+            params = params + (limit,)
+        return [json.loads(row[0]) for row in self._reader().execute(query, params)]
+
+    def __iter__(self) -> Iterator[Dict]:
+        for row in self._reader().execute("SELECT data FROM tweets ORDER BY id ASC"):
+            yield json.loads(row[0])
+
+    def __len__(self) -> int:
+        return self._reader().execute("SELECT COUNT(*) FROM tweets").fetchone()[0]
+
+    def recent(self, n: int) -> List[Dict]:
+        if n <= 0:
+            return []
+        records = self._select(order="id DESC", limit=n)
+        records.reverse()
+        return records
+
+    def find(
+        self,
+        tweet_type: Optional[str] = None,
+        since: Optional[datetime] = None,
+        topic: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> List[Dict]:
+        conditions = []
+        params = []
+        if tweet_type is not None:
+            conditions.append("type = ?")
+            params.append(tweet_type)
+        if since is not None:
+            conditions.append("timestamp >= ?")
+            params.append(since.isoformat())
+        if topic is not None:
+            conditions.append("topic = ?")
+            params.append(topic)
+        return self._select(" AND ".join(conditions), tuple(params), order="timestamp DESC", limit=limit)
+
+    def has_content(self, text: str) -> bool:
+        row = self._reader().execute(
+            "SELECT 1 FROM tweets WHERE content_hash = ? LIMIT 1",
+            (content_hash(text),)
+        ).fetchone()
+        return row is not None
+
+    def get_by_tweet_id(self, tweet_id: str) -> Optional[Dict]:
+        records = self._select("tweet_id = ?", (str(tweet_id),), limit=1)
+        return records[0] if records else None
+
+    def flush(self) -> None:
+        with self._write_lock:
+            self._conn.commit()
+
+    def maintain(self) -> None:
+        # Volcar el WAL a la base para que no crezca sin límite
+        with self._write_lock:
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def close(self) -> None:
+        with self._write_lock:
+            for reader in self._readers:
+                reader.close()
+            self._readers.clear()
+            self._local = threading.local()
+            self._conn.close()
@@ -1,6 +1,6 @@
 """
 Twitter module exports
 """
-from .api import TwitterAPI
+from .api import TweetRejectedError, TwitterAPI
 
-__all__ = ['TwitterAPI']
+__all__ = ['TweetRejectedError', 'TwitterAPI']
@@ -1,139 +1,449 @@
 """
 Integración con la API oficial de Twitter
 """
-import tweepy
-from typing import Optional
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional, Sequence
 import logging
 from src.config import Config
+from src.metrics import ERRORS, RATE_LIMIT_WAIT, RETRIES, STAGE_LATENCY
+from src.twitter.ratelimit import RateLimiter
+from src.twitter.text import TWEET_MAX_LENGTH, fit_tweet_length, weighted_length
+from src.twitter.threads import ThreadCache
+
+if TYPE_CHECKING:
+    import requests
+    import tweepy
 
 logger = logging.getLogger(__name__)
 
+# Host que tweepy usa internamente para la API v2
+TWITTER_DEFAULT_HOST = "https://api.twitter.com"
+# Máximo de IDs que acepta GET /2/tweets por llamada
+TWEET_LOOKUP_BATCH = 100
+
+class TweetRejectedError(Exception):
+    """
+    Twitter rechazó el tweet con un 403: reintentarlo no sirve. `duplicate`
+    indica que el mismo texto ya está publicado.
+    """
+
+    def __init__(self, message: str, duplicate: bool = False):
+        super().__init__(message)
+        self.duplicate = duplicate
+
+@functools.lru_cache(maxsize=None)
+def _tweepy_classes():
+    """
+    Importar tweepy/requests y definir sus subclases en el primer uso: juntos
+    cuestan decenas de ms de arranque que un health check o un --help no necesitan.
+    """
+    import requests
+    import tweepy
+
+    class _TwitterSession(requests.Session):
+        """Sesión HTTP de tweepy con pool dimensionado y host configurable"""
+
+        def __init__(self, base_url: str, pool_size: int):
+            super().__init__()
+            self.base_url = base_url.rstrip("/")
+            adapter = requests.adapters.HTTPAdapter(
+                pool_connections=pool_size,
+                pool_maxsize=pool_size
+            )
+            self.mount("https://", adapter)
+            self.mount("http://", adapter)
+
+        def request(self, method, url, *args, **kwargs):
+            if self.base_url != TWITTER_DEFAULT_HOST and url.startswith(TWITTER_DEFAULT_HOST):
+                url = self.base_url + url[len(TWITTER_DEFAULT_HOST):]
+            return super().request(method, url, *args, **kwargs)
+
+    class _HeaderAwareClient(tweepy.Client):
+        """tweepy.Client que recuerda, por hilo, los headers de su última respuesta"""
+
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self._local = threading.local()
+
+        def request(self, method, route, params=None, json=None, user_auth=False):
+            self._local.headers = None
+            response = super().request(method, route, params=params, json=json, user_auth=user_auth)
+            self._local.headers = response.headers
+            return response
+
+        @property
+        def last_headers(self):
+            return getattr(self._local, "headers", None)
+
+    return _TwitterSession, _HeaderAwareClient
+
+def _tweepy_errors():
+    import tweepy.errors
+    return tweepy.errors
+
 class TwitterAPI:
-    def __init__(self):
-        self.auth = tweepy.OAuthHandler(
-            Config.TWITTER_API_KEY,
-            Config.TWITTER_API_SECRET
-        )
-        self.auth.set_access_token(
-            Config.TWITTER_ACCESS_TOKEN,
-            Config.TWITTER_ACCESS_TOKEN_SECRET
+    def __init__(
+        self,
+        config: type = Config,
+        session: Optional["requests.Session"] = None,
+        executor: Optional[ThreadPoolExecutor] = None
+    ):
+        self.config = config
+        
+        # El cliente de tweepy (y su sesión) se crean en la primera llamada.
+        # La sesión HTTP y el executor se pueden compartir entre cuentas;
+        # la autenticación OAuth va en cada petición
+        self._client = None
+        self._session = session
+        self._owns_session = session is None
+        self._owns_executor = executor is None
+        
+        # tweepy es síncrono: sus llamadas corren en un pool de hilos acotado
+        # y cada endpoint tiene su propio límite de concurrencia
+        self._executor = executor
+        self._endpoint_limits: Dict[str, asyncio.Semaphore] = {
+            endpoint: asyncio.Semaphore(limit)
+            for endpoint, limit in config.TWITTER_ENDPOINT_CONCURRENCY.items()
+        }
+        
+        # Hilos ya vistos por conversation_id
+        self.thread_cache = ThreadCache(
+            max_conversations=config.THREAD_CACHE_SIZE,
+            ttl=config.THREAD_CACHE_TTL
         )
-        self.api = tweepy.API(self.auth)
-        self.client = tweepy.Client(
-            consumer_key=Config.TWITTER_API_KEY,
-            consumer_secret=Config.TWITTER_API_SECRET,
-            access_token=Config.TWITTER_ACCESS_TOKEN,
-            access_token_secret=Config.TWITTER_ACCESS_TOKEN_SECRET
+        self._thread_fetches: Dict[str, asyncio.Future] = {}
+        
+        # Presupuesto de rate limit por endpoint, según los headers de Twitter
+        self.rate_limiter = RateLimiter(margin=config.RATE_LIMIT_MARGIN)
+        self._user_id: Optional[str] = None
+
+    @property
+    def client(self) -> "tweepy.Client":
+        """Cliente v2 de tweepy, creado en el primer uso"""
+        if self._client is None:
+            _, client_class = _tweepy_classes()
+            self._client = client_class(
+                consumer_key=self.config.TWITTER_API_KEY,
+                consumer_secret=self.config.TWITTER_API_SECRET,
+                access_token=self.config.TWITTER_ACCESS_TOKEN,
+                access_token_secret=self.config.TWITTER_ACCESS_TOKEN_SECRET
+            )
+            if self._session is None:
+                self._session = self.create_session(self.config)
+            self._client.session = self._session
+        return self._client
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = self.create_executor(self.config)
+        return self._executor
+
+    @staticmethod
+    def create_session(config: type = Config) -> "requests.Session":
+        """Crear la sesión HTTP de tweepy, compartible entre varias cuentas"""
+        session_class, _ = _tweepy_classes()
+        return session_class(config.TWITTER_API_BASE_URL, config.TWITTER_MAX_WORKERS)
+
+    @staticmethod
+    def create_executor(config: type = Config) -> ThreadPoolExecutor:
+        """Crear el pool de hilos para las llamadas bloqueantes de tweepy"""
+        return ThreadPoolExecutor(
+            max_workers=config.TWITTER_MAX_WORKERS,
+            thread_name_prefix="twitter-api"
         )
 
-    async def post_tweet(self, text: str) -> Optional[str]:
+    def _run_with_headers(self, func: Callable[..., Any], *args, **kwargs):
+        """Correr la llamada en el hilo del executor y devolver también sus headers"""
+        result = func(*args, **kwargs)
+        return result, self.client.last_headers
+
+    async def _call(self, endpoint: str, func: Callable[..., Any], *args, **kwargs) -> Any:
         """
-        Postear un tweet usando la API v2 con reintentos
-        Returns: ID del tweet si fue exitoso, None si falló
+        Ejecutar una llamada bloqueante de tweepy en el executor sin bloquear el event loop.
+        Antes de cada intento se reserva un token del rate limiter; un 429 agota el
+        endpoint y se reintenta justo cuando reinicia la ventana.
+        """
+        errors = _tweepy_errors()
+        loop = asyncio.get_running_loop()
+        async with self._endpoint_limits[endpoint]:
+            for attempt in range(self.config.RATE_LIMIT_MAX_RETRIES + 1):
+                waited = await self.rate_limiter.acquire(endpoint)
+                if waited:
+                    RATE_LIMIT_WAIT.inc(waited, endpoint=endpoint)
+                try:
+                    with STAGE_LATENCY.time(stage=f"twitter_{endpoint}"):
+                        result, headers = await loop.run_in_executor(
+                            self.executor,
+                            functools.partial(self._run_with_headers, func, *args, **kwargs)
+                        )
+                except errors.TooManyRequests as e:
+                    self.rate_limiter.update(endpoint, e.response.headers)
+                    self.rate_limiter.exhaust(endpoint, self._reset_time(e))
+                    if attempt == self.config.RATE_LIMIT_MAX_RETRIES:
+                        ERRORS.inc(stage=f"twitter_{endpoint}")
+                        raise
+                    RETRIES.inc(operation=f"twitter_{endpoint}")
+                    logger.warning(f"Rate limit alcanzado en '{endpoint}' (intento {attempt + 1})")
+                    continue
+                except errors.HTTPException as e:
+                    self.rate_limiter.update(endpoint, e.response.headers)
+                    ERRORS.inc(stage=f"twitter_{endpoint}")
+                    raise
+                self.rate_limiter.update(endpoint, headers)
+                return result
+
+    @staticmethod
+    def _reset_time(error: Exception) -> Optional[float]:
+        """Epoch del reset de un 429: el atributo de tweepy si existe, si no el header"""
+        reset = getattr(error, "reset_time", None)
+        if reset is not None:
+            return float(reset)
+        headers = getattr(getattr(error, "response", None), "headers", None) or {}
+        try:
+            return float(headers["x-rate-limit-reset"])
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    async def get_user_id(self) -> str:
+        """ID del usuario autenticado, pedido una sola vez"""
+        if self._user_id is None:
+            me = await self._call("me", self.client.get_me)
+            self._user_id = str(me.data.id)
+        return self._user_id
+
+    def rate_limit_state(self) -> Dict[str, Dict]:
+        """Presupuesto de rate limit actual de cada endpoint"""
+        return self.rate_limiter.state()
+
+    async def close(self) -> None:
+        """Liberar el pool de hilos y las conexiones HTTP (solo si son propios)"""
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        if self._owns_session and self._session is not None:
+            self._session.close()
+
+    async def _create_tweet(self, kind: str, **kwargs) -> Optional[str]:
+        """
+        Crear un tweet con reintentos. Los 429 los reintenta solo `_call` (esperando
+        al reset); aquí se reintentan los demás errores transitorios.
+        Returns: ID del tweet si fue exitoso, None si falló por un error transitorio
+        Raises: TweetRejectedError ante un 403 (duplicado o sin permisos)
         """
         max_retries = 3
         retry_delay = 5  # segundos
         
+        # Un texto que Twitter rechazaría por largo se repara aquí en vez de
+        # gastar una llamada que va a fallar
+        length = weighted_length(kwargs["text"])
+        if length > TWEET_MAX_LENGTH:
+            logger.warning(f"El {kind} excede el largo ponderado ({length}), recortándolo")
+            kwargs["text"] = fit_tweet_length(kwargs["text"])
+        
         for attempt in range(max_retries):
             try:
                 # Si no es el primer intento, esperar antes de reintentar
                 if attempt > 0:
-                    logger.info(f"Reintentando postear tweet (intento {attempt + 1}/{max_retries})...")
+                    RETRIES.inc(operation="post_tweet")
+                    logger.info(f"Reintentando postear {kind} (intento {attempt + 1}/{max_retries})...")
                     await asyncio.sleep(retry_delay * attempt)
                 
-                response = self.client.create_tweet(text=text)
+                response = await self._call("post", self.client.create_tweet, **kwargs)
                 tweet_id = response.data['id']
-                logger.info(f"Tweet posteado exitosamente: {tweet_id}")
+                logger.info(f"Posteado exitosamente ({kind}): {tweet_id}")
                 return tweet_id
                 
+            except _tweepy_errors().TooManyRequests:
+                # `_call` ya agotó sus reintentos esperando al reset de la ventana
+                logger.error(f"Rate limit agotado posteando {kind}")
+                return None
+            except _tweepy_errors().Forbidden as e:
+                if "duplicate" in str(e).lower():
+                    logger.error("Tweet duplicado detectado")
+                    raise TweetRejectedError(f"Tweet duplicado: {str(e)}", duplicate=True) from e
+                logger.error("Error de permisos en la API")
+                raise TweetRejectedError(f"Tweet rechazado: {str(e)}") from e
             except Exception as e:
-                error_msg = str(e)
+                logger.error(f"Error posteando {kind}: {str(e)}")
                 
-                # Manejar diferentes tipos de errores
-                if "429" in error_msg:  # Rate limit
-                    wait_time = 15 * (attempt + 1)  # Espera progresiva
-                    logger.warning(f"Rate limit alcanzado, esperando {wait_time} segundos...")
-                    await asyncio.sleep(wait_time)
-                elif "403" in error_msg:  # Forbidden
-                    if "duplicate" in error_msg.lower():
-                        logger.error("Tweet duplicado detectado")
-                        return None
-                    logger.error("Error de permisos en la API")
-                    return None
-                else:
-                    logger.error(f"Error posteando tweet: {error_msg}")
-                    
-                if attempt == max_retries - 1:
-                    logger.error("Se agotaron los reintentos")
-                    return None
+        logger.error("Se agotaron los reintentos")
+        return None
+
+    async def post_tweet(self, text: str) -> Optional[str]:
+        """
+        Postear un tweet usando la API v2 con reintentos
+        Returns: ID del tweet si fue exitoso, None si falló
+        Raises: TweetRejectedError si Twitter lo rechaza de forma permanente
+        """
+        return await self._create_tweet("tweet", text=text)
 
     async def post_reply(self, text: str, reply_to_id: str) -> Optional[str]:
         """
-        Responder a un tweet usando la API v2
+        Responder a un tweet usando la API v2 con reintentos
         Returns: ID del tweet de respuesta si fue exitoso, None si falló
+        Raises: TweetRejectedError si Twitter la rechaza de forma permanente
         """
-        try:
-            response = self.client.create_tweet(
-                text=text,
-                in_reply_to_tweet_id=reply_to_id
-            )
-            tweet_id = response.data['id']
-            logger.info(f"Respuesta posteada exitosamente: {tweet_id}")
-            return tweet_id
-        except Exception as e:
-            logger.error(f"Error posteando respuesta: {str(e)}")
-            return None
+        return await self._create_tweet("respuesta", text=text, in_reply_to_tweet_id=reply_to_id)
+
+    async def post_thread(
+        self,
+        segments: Sequence[str],
+        reply_to_id: Optional[str] = None,
+        on_posted: Optional[Callable[[str], None]] = None
+    ) -> List[str]:
+        """
+        Postear un hilo como cadena de respuestas: cada segmento responde al
+        anterior y sale en cuanto se conoce el ID del previo. Con `reply_to_id`
+        el hilo continúa desde un tweet ya publicado (para reanudar un hilo a medias).
+        `on_posted` recibe cada ID antes de postear el siguiente segmento.
+        Returns: IDs publicados en orden; si un segmento falla, solo los anteriores
+        Raises: TweetRejectedError si Twitter rechaza un segmento (los anteriores
+        ya se informaron por `on_posted`)
+        """
+        posted: List[str] = []
+        previous = reply_to_id
+        for index, text in enumerate(segments):
+            if previous is None:
+                tweet_id = await self._create_tweet("hilo", text=text)
+            else:
+                tweet_id = await self._create_tweet("hilo", text=text, in_reply_to_tweet_id=previous)
+            if not tweet_id:
+                logger.error(f"Hilo interrumpido en el segmento {index + 1}/{len(segments)}")
+                break
+            previous = str(tweet_id)
+            posted.append(previous)
+            if on_posted is not None:
+                on_posted(previous)
+        return posted
 
-    async def get_mentions(self, since_id: Optional[str] = None) -> list:
+    async def get_mentions(
+        self,
+        since_id: Optional[str] = None,
+        max_results: int = 100,
+        max_pages: int = 5
+    ) -> list:
         """
-        Obtener menciones recientes usando la API v2
-        Returns: Lista de menciones
+        Obtener menciones recientes usando la API v2, recorriendo las páginas
+        Returns: Lista de menciones (más nuevas primero); vacía si no hay nuevas
+        Raises: La excepción de la API si falla, para no confundir un error con
+            "no hay menciones" (el checkpoint since_id no debe moverse)
         """
         try:
             mentions = []
-            response = self.client.get_users_mentions(
-                id=self.client.get_me().data.id,
-                since_id=since_id,
-                tweet_fields=['created_at', 'conversation_id']
-            )
+            user_id = await self.get_user_id()
+            pagination_token = None
             
-            if response.data:
-                for tweet in response.data:
-                    mentions.append({
-                        'id': tweet.id,
-                        'text': tweet.text,
-                        'created_at': tweet.created_at,
-                        'conversation_id': tweet.conversation_id
-                    })
+            for _ in range(max_pages):
+                response = await self._call(
+                    "mentions",
+                    self.client.get_users_mentions,
+                    id=user_id,
+                    since_id=since_id,
+                    max_results=max_results,
+                    pagination_token=pagination_token,
+                    tweet_fields=['created_at', 'conversation_id', 'author_id'],
+                    user_auth=True
+                )
+                
+                if response.data:
+                    for tweet in response.data:
+                        mentions.append({
+                            'id': tweet.id,
+                            'text': tweet.text,
+                            'created_at': tweet.created_at,
+                            'conversation_id': tweet.conversation_id,
+                            'author_id': tweet.author_id
+                        })
+                
+                pagination_token = (response.meta or {}).get('next_token')
+                if not pagination_token:
+                    break
             
             logger.info(f"Obtenidas {len(mentions)} menciones nuevas")
             return mentions
         except Exception as e:
             logger.error(f"Error obteniendo menciones: {str(e)}")
-            return []
+            raise
 
-    async def get_tweet_thread(self, conversation_id: str) -> list:
+    async def get_tweet_metrics(self, tweet_ids: Iterable[str]) -> Dict[str, Dict[str, int]]:
         """
-        Obtener el hilo completo de un tweet para contexto
-        Returns: Lista de tweets en el hilo
+        Obtener las public_metrics de varios tweets, en lotes de hasta 100 IDs
+        por llamada a get_tweets en vez de una llamada por tweet.
+        Returns: Diccionario ID -> public_metrics (los tweets borrados no aparecen)
         """
+        ids = list(dict.fromkeys(str(tweet_id) for tweet_id in tweet_ids))
+        batches = [ids[i:i + TWEET_LOOKUP_BATCH] for i in range(0, len(ids), TWEET_LOOKUP_BATCH)]
+
+        async def fetch(batch: List[str]) -> Dict[str, Dict[str, int]]:
+            try:
+                response = await self._call(
+                    "lookup",
+                    self.client.get_tweets,
+                    ids=batch,
+                    tweet_fields=['public_metrics'],
+                    user_auth=True
+                )
+            except Exception as e:
+                logger.error(f"Error obteniendo métricas de {len(batch)} tweets: {str(e)}")
+                return {}
+            return {str(tweet.id): dict(tweet.public_metrics or {}) for tweet in response.data or []}
+
+        metrics: Dict[str, Dict[str, int]] = {}
+        for result in await asyncio.gather(*(fetch(batch) for batch in batches)):
+            metrics.update(result)
+        return metrics
+
+    async def get_tweet_thread(self, conversation_id: str, max_pages: int = 5) -> list:
+        """
+        Obtener el hilo completo de un tweet para contexto. Los tweets ya vistos
+        vienen del cache y solo se piden los posteriores al último conocido.
+        Returns: Lista de tweets en el hilo, del más viejo al más nuevo
+        """
+        conversation_id = str(conversation_id)
+        
+        # Varias menciones del mismo hilo comparten un único fetch en curso
+        fetch = self._thread_fetches.get(conversation_id)
+        if fetch is None:
+            fetch = asyncio.ensure_future(self._fetch_thread(conversation_id, max_pages))
+            self._thread_fetches[conversation_id] = fetch
+            fetch.add_done_callback(lambda _: self._thread_fetches.pop(conversation_id, None))
+        return await asyncio.shield(fetch)
+
+    async def _fetch_thread(self, conversation_id: str, max_pages: int) -> list:
+        """Traer los tweets nuevos de una conversación y mezclarlos con el cache"""
         try:
-            thread = []
-            response = self.client.search_recent_tweets(
-                query=f"conversation_id:{conversation_id}",
-                tweet_fields=['created_at', 'conversation_id', 'in_reply_to_user_id']
-            )
+            new_tweets = []
+            since_id = self.thread_cache.since_id(conversation_id)
+            pagination_token = None
             
-            if response.data:
-                for tweet in response.data:
-                    thread.append({
-                        'id': tweet.id,
-                        'text': tweet.text,
-                        'created_at': tweet.created_at
-                    })
+            for _ in range(max_pages):
+                response = await self._call(
+                    "thread",
+                    self.client.search_recent_tweets,
+                    query=f"conversation_id:{conversation_id}",
+                    since_id=since_id,
+                    max_results=100,
+                    next_token=pagination_token,
+                    tweet_fields=['created_at', 'conversation_id', 'in_reply_to_user_id'],
+                    user_auth=True
+                )
+                
+                if response.data:
+                    for tweet in response.data:
+                        new_tweets.append({
+                            'id': tweet.id,
+                            'text': tweet.text,
+                            'created_at': tweet.created_at
+                        })
+                
+                pagination_token = (response.meta or {}).get('next_token')
+                if not pagination_token:
+                    break
             
-            thread.sort(key=lambda x: x['created_at'])
-            return thread
+            return self.thread_cache.merge(conversation_id, new_tweets)
         except Exception as e:
             logger.error(f"Error obteniendo hilo: {str(e)}")
-            return []
\ No newline at end of file
+            return []
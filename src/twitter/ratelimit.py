@@ -0,0 +1,108 @@
+"""
+Limitador de rate limit por endpoint basado en los headers x-rate-limit-*
+"""
+from typing import Dict, Mapping, Optional
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+class EndpointBudget:
+    """Presupuesto de una ventana de rate limit de un endpoint"""
+    __slots__ = ("limit", "remaining", "reset", "lock")
+
+    def __init__(self):
+        self.limit: Optional[int] = None
+        self.remaining: Optional[int] = None  # None = todavía no sabemos
+        self.reset: Optional[float] = None  # Epoch en segundos
+        self.lock = asyncio.Lock()
+
+class RateLimiter:
+    """
+    Token bucket por endpoint alimentado por los headers de Twitter.
+    Cada llamada consume un token; sin tokens se espera exactamente hasta el
+    reset de la ventana en vez de adivinar con esperas fijas.
+    """
+
+    def __init__(self, margin: float = 1.0):
+        self.margin = margin  # Segundos extra tras el reset por desfase de relojes
+        self._budgets: Dict[str, EndpointBudget] = {}
+        self.total_wait = 0.0
+
+    def _budget(self, endpoint: str) -> EndpointBudget:
+        budget = self._budgets.get(endpoint)
+        if budget is None:
+            budget = self._budgets[endpoint] = EndpointBudget()
+        return budget
+
+    def _refresh(self, budget: EndpointBudget, now: float) -> None:
+        """Si la ventana ya se reinició, olvidar el conteo viejo"""
+        if budget.reset is not None and now >= budget.reset:
+            budget.remaining = budget.limit
+            budget.reset = None
+
+    async def acquire(self, endpoint: str) -> float:
+        """
+        Reservar un token del endpoint, esperando al reset si no quedan.
+        Returns: segundos esperados
+        """
+        budget = self._budget(endpoint)
+        async with budget.lock:
+            now = time.time()
+            self._refresh(budget, now)
+            waited = 0.0
+            if budget.remaining is not None and budget.remaining <= 0 and budget.reset is not None:
+                waited = budget.reset - now + self.margin
+                logger.warning(f"Rate limit de '{endpoint}' agotado, esperando {waited:.0f}s hasta el reset...")
+                await asyncio.sleep(waited)
+                self.total_wait += waited
+                self._refresh(budget, time.time())
+            if budget.remaining is not None:
+                budget.remaining -= 1
+            return waited
+
+    def update(self, endpoint: str, headers: Optional[Mapping[str, str]]) -> None:
+        """Sincronizar el presupuesto con los headers de la última respuesta"""
+        if not headers:
+            return
+        budget = self._budget(endpoint)
+        try:
+            if "x-rate-limit-limit" in headers:
+                budget.limit = int(headers["x-rate-limit-limit"])
+            if "x-rate-limit-remaining" in headers:
+                budget.remaining = int(headers["x-rate-limit-remaining"])
+            if "x-rate-limit-reset" in headers:
+                budget.reset = float(headers["x-rate-limit-reset"])
+        except ValueError:
+            logger.debug("Headers de rate limit inválidos para '%s': %s", endpoint, headers)
+
+    def exhaust(self, endpoint: str, reset: Optional[float]) -> None:
+        """Marcar el endpoint sin tokens tras un 429"""
+        budget = self._budget(endpoint)
+        budget.remaining = 0
+        budget.reset = reset if reset is not None else time.time() + 15 * 60
+
+    def remaining(self, endpoint: str) -> Optional[int]:
+        """Tokens que quedan en la ventana actual (None si aún no se conoce)"""
+        budget = self._budget(endpoint)
+        self._refresh(budget, time.time())
+        return budget.remaining
+
+    def has_budget(self, endpoint: str, reserve: int = 0) -> bool:
+        """Saber si quedan más de `reserve` tokens, para descartar trabajo de baja prioridad"""
+        remaining = self.remaining(endpoint)
+        return remaining is None or remaining > reserve
+
+    def state(self) -> Dict[str, Dict]:
+        """Estado actual de todos los endpoints conocidos"""
+        now = time.time()
+        result = {}
+        for endpoint, budget in self._budgets.items():
+            self._refresh(budget, now)
+            result[endpoint] = {
+                "limit": budget.limit,
+                "remaining": budget.remaining,
+                "reset_in": max(0.0, budget.reset - now) if budget.reset is not None else None,
+            }
+        return result
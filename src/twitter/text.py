@@ -0,0 +1,200 @@
+"""
+Largo ponderado de un tweet según las reglas de Twitter (twitter-text v3) y
+recorte que conserva los hashtags
+"""
+from typing import List, Sequence
+import re
+import unicodedata
+
+TWEET_MAX_LENGTH = 280
+URL_LENGTH = 23  # Todo link cuenta como un t.co de 23 caracteres
+EMOJI_WEIGHT = 2  # Cada emoji cuenta 2, aunque sea una secuencia de varios code points
+ELLIPSIS = "…"  # Pesa 2, uno menos que "..."
+
+# Rangos de code points que pesan 1; todo lo demás (CJK, emoji sueltos, etc.) pesa 2
+_LIGHT_RANGES = (
+    (0x0000, 0x10FF),
+    (0x2000, 0x200D),
+    (0x2010, 0x201F),
+    (0x2032, 0x2037),
+)
+
+# Dominios sin esquema que Twitter convierte en link (subconjunto de los TLDs frecuentes)
+_TLDS = "com|org|net|io|xyz|ai|co|app|dev|gg|me|ly|fi|so|tv|us|es|mx|ar|foundation|finance|art"
+_URL = (
+    r"(?:https?://|www\.)[^\s]*[^\s.,!?;:)\]'\"\u2026]"
+    rf"|\b[a-z0-9][a-z0-9-]*(?:\.[a-z0-9-]+)*\.(?:{_TLDS})\b(?:/[^\s]*[^\s.,!?;:)\]'\"\u2026])?"
+)
+_EMOJI_BASE = (
+    "[\U0001F000-\U0001FAFF\u2300-\u23FF\u2600-\u27BF\u2B00-\u2BFF"
+    "\u2190-\u21FF\u25A0-\u25FF\u3030\u303D\u3297\u3299]"
+)
+# Selector de variación, tonos de piel, keycap y etiquetas (banderas de subdivisiones)
+_EMOJI_MODIFIERS = "[\uFE0F\U0001F3FB-\U0001F3FF\u20E3\U000E0020-\U000E007F]*"
+_EMOJI_ATOM = f"{_EMOJI_BASE}{_EMOJI_MODIFIERS}"
+_EMOJI = (
+    "[\U0001F1E6-\U0001F1FF]{2}"  # Banderas: par de indicadores regionales
+    "|[0-9#*]\uFE0F?\u20E3"  # Keycaps
+    "|[\u00A9\u00AE\u203C\u2049\u2122\u2139]\uFE0F"  # Símbolos de texto en presentación emoji
+    f"|{_EMOJI_ATOM}(?:\u200D{_EMOJI_ATOM})*"  # Emoji con modificadores y secuencias ZWJ
+)
+_TOKEN_RE = re.compile(f"(?P<url>{_URL})|(?P<emoji>{_EMOJI})", re.IGNORECASE)
+
+_TRAILING_HASHTAGS_RE = re.compile(r"(?:\s*#\w+)+\s*$")
+_HASHTAG_RE = re.compile(r"#\w+")
+_SENTENCE_END_RE = re.compile(r"[.!?¡¿…]+(?=\s|$)")
+# Lo que puede quedar colgando al cortar una secuencia de emoji a mitad
+_DANGLING_RE = re.compile("[\u200D\uFE0F\U0001F3FB-\U0001F3FF\u20E3\U000E0020-\U000E007F]+$")
+
+def _char_weight(char: str) -> int:
+    code = ord(char)
+    for start, end in _LIGHT_RANGES:
+        if start <= code <= end:
+            return 1
+    return 2
+
+def _plain_weight(text: str) -> int:
+    """Peso de un tramo sin links ni emoji"""
+    if text.isascii():
+        return len(text)
+    return sum(_char_weight(char) for char in text)
+
+def weighted_length(text: str) -> int:
+    """
+    Largo que Twitter le asigna al texto: normalizado a NFC, cada code point
+    pesa 1 o 2 según su rango, cada emoji (con sus modificadores) pesa 2 y
+    cada link pesa 23.
+    """
+    text = unicodedata.normalize("NFC", text)
+    # Camino rápido: texto ASCII sin puntos no puede tener links ni emoji
+    if text.isascii() and "." not in text:
+        return len(text)
+
+    length = 0
+    position = 0
+    for match in _TOKEN_RE.finditer(text):
+        length += _plain_weight(text[position:match.start()])
+        length += URL_LENGTH if match.lastgroup == "url" else EMOJI_WEIGHT
+        position = match.end()
+    return length + _plain_weight(text[position:])
+
+def is_valid_tweet(text: str, max_length: int = TWEET_MAX_LENGTH) -> bool:
+    """Saber si Twitter aceptaría el texto: no vacío y dentro del largo ponderado"""
+    return bool(text.strip()) and weighted_length(text) <= max_length
+
+def _cut_to_weight(text: str, budget: int) -> str:
+    """Cortar un texto sin espacios al peso dado sin partir emoji ni links"""
+    result = []
+    used = 0
+    position = 0
+    for match in _TOKEN_RE.finditer(text):
+        for char in text[position:match.start()]:
+            used += _char_weight(char)
+            if used > budget:
+                return "".join(result)
+            result.append(char)
+        used += URL_LENGTH if match.lastgroup == "url" else EMOJI_WEIGHT
+        if used > budget:
+            return "".join(result)
+        result.append(match.group())
+        position = match.end()
+    for char in text[position:]:
+        used += _char_weight(char)
+        if used > budget:
+            break
+        result.append(char)
+    return _DANGLING_RE.sub("", "".join(result))
+
+def _trim_body(body: str, budget: int) -> str:
+    """
+    Recortar el cuerpo a `budget` de peso: en el último fin de oración si no
+    se pierde mucho texto, si no en el último espacio con "…" al final.
+    """
+    if weighted_length(body) <= budget:
+        return body
+
+    ellipsis_weight = weighted_length(ELLIPSIS)
+    words: List[str] = re.findall(r"\S+\s*", body)
+    kept: List[str] = []
+    used = 0
+    for word in words:
+        weight = weighted_length(word.rstrip())
+        # La elipsis del final también ocupa lugar
+        if used + weight + ellipsis_weight > budget:
+            break
+        kept.append(word)
+        used += weighted_length(word)
+
+    if not kept:
+        return _cut_to_weight(body, budget - ellipsis_weight).rstrip() + ELLIPSIS
+
+    trimmed = "".join(kept).rstrip()
+    # Preferir terminar en una oración completa si conserva al menos 60% del espacio
+    ends = list(_SENTENCE_END_RE.finditer(trimmed))
+    if ends and weighted_length(trimmed[:ends[-1].end()]) >= budget * 0.6:
+        return trimmed[:ends[-1].end()]
+    return trimmed.rstrip(" ,;:-–—") + ELLIPSIS
+
+def fit_tweet_length(text: str, hashtags: str = "", max_length: int = TWEET_MAX_LENGTH) -> str:
+    """
+    Asegurar que el tweet no exceda el largo ponderado de Twitter. Si sobra,
+    se recorta el cuerpo y se conservan los hashtags del final y los de
+    `hashtags` (los del topic) que se hayan perdido en el recorte.
+    """
+    text = text.strip()
+    if weighted_length(text) <= max_length:
+        return text
+
+    tail_match = _TRAILING_HASHTAGS_RE.search(text)
+    body = text[:tail_match.start()] if tail_match else text
+    tags = list(dict.fromkeys(_HASHTAG_RE.findall(tail_match.group()))) if tail_match else []
+    tag_set = {tag.lower() for tag in tags}
+    required = [tag for tag in dict.fromkeys(hashtags.split()) if tag.lower() not in tag_set]
+
+    # Se reserva lugar para todos; si los hashtags no entran ni en la mitad del
+    # tweet, se sacan desde el final (primero los requeridos que faltaban)
+    kept = tags + required
+    while kept and weighted_length(" ".join(kept)) > max_length // 2:
+        kept.pop()
+    reserved = weighted_length(" ".join(kept)) + 1 if kept else 0
+    trimmed = _trim_body(body.rstrip(), max_length - reserved)
+
+    # Los requeridos que sí quedaron en el cuerpo recortado no se repiten
+    in_body = {tag.lower() for tag in _HASHTAG_RE.findall(trimmed)}
+    tail = " ".join(tag for tag in kept if tag in tags or tag.lower() not in in_body)
+    result = f"{trimmed} {tail}".strip() if tail else trimmed
+
+    if weighted_length(result) > max_length:
+        # Último recurso: nunca mandar a Twitter algo que va a rechazar
+        result = _cut_to_weight(result, max_length)
+    return result
+
+def format_thread(
+    segments: Sequence[str],
+    hashtags: str = "",
+    numbering: bool = True,
+    max_length: int = TWEET_MAX_LENGTH
+) -> List[str]:
+    """
+    Preparar los segmentos de un hilo para postear: cada uno ajustado al largo
+    ponderado dejando lugar para la numeración " i/N", y con los hashtags del
+    topic asegurados al final del último.
+    """
+    segments = [segment.strip() for segment in segments if segment.strip()]
+    total = len(segments)
+    thread = []
+    for index, segment in enumerate(segments, 1):
+        suffix = f" {index}/{total}" if numbering and total > 1 else ""
+        last = index == total
+        if last and hashtags:
+            lowered = segment.lower()
+            missing = [tag for tag in hashtags.split() if tag.lower() not in lowered]
+            if missing:
+                segment = f"{segment} {' '.join(missing)}"
+        fitted = fit_tweet_length(
+            segment,
+            hashtags=hashtags if last else "",
+            max_length=max_length - len(suffix)
+        )
+        thread.append(fitted + suffix)
+    return thread
@@ -0,0 +1,108 @@
+"""
+Cache de hilos de conversación con fetch incremental y recorte por tokens
+"""
+from collections import OrderedDict
+from typing import Dict, List, Optional
+import time
+
+# Aproximación barata de tokens por carácter para textos cortos
+_CHARS_PER_TOKEN = 4
+
+class _Conversation:
+    __slots__ = ("tweets", "newest_id", "last_access")
+
+    def __init__(self):
+        self.tweets: List[Dict] = []
+        self.newest_id: Optional[int] = None
+        self.last_access = time.monotonic()
+
+class ThreadCache:
+    """
+    Guarda los tweets ya vistos de cada conversation_id para que cada mención
+    nueva solo pida los tweets posteriores. Las conversaciones frías se expulsan
+    por LRU (max_conversations) y por TTL desde el último acceso.
+    """
+
+    def __init__(self, max_conversations: int = 200, ttl: float = 6 * 60 * 60):
+        self.max_conversations = max_conversations
+        self.ttl = ttl
+        self._conversations: "OrderedDict[str, _Conversation]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._conversations)
+
+    def _expire(self) -> None:
+        now = time.monotonic()
+        while self._conversations:
+            conversation_id, conversation = next(iter(self._conversations.items()))
+            if now - conversation.last_access <= self.ttl:
+                break
+            del self._conversations[conversation_id]
+
+    def since_id(self, conversation_id: str) -> Optional[str]:
+        """ID del tweet más nuevo ya visto, para pedir solo los posteriores"""
+        self._expire()
+        conversation = self._conversations.get(conversation_id)
+        if conversation is None or conversation.newest_id is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return str(conversation.newest_id)
+
+    def merge(self, conversation_id: str, new_tweets: List[Dict]) -> List[Dict]:
+        """Agregar tweets nuevos a la conversación y devolver el hilo ordenado"""
+        conversation = self._conversations.get(conversation_id)
+        if conversation is None:
+            conversation = _Conversation()
+            self._conversations[conversation_id] = conversation
+
+        known = {tweet["id"] for tweet in conversation.tweets}
+        fresh = [tweet for tweet in new_tweets if tweet["id"] not in known]
+        if fresh:
+            # Los IDs de Twitter crecen con el tiempo: basta ordenar el lote nuevo
+            fresh.sort(key=lambda tweet: int(tweet["id"]))
+            if conversation.tweets and int(fresh[0]["id"]) < int(conversation.tweets[-1]["id"]):
+                conversation.tweets = sorted(conversation.tweets + fresh, key=lambda tweet: int(tweet["id"]))
+            else:
+                conversation.tweets.extend(fresh)
+            conversation.newest_id = int(conversation.tweets[-1]["id"])
+
+        conversation.last_access = time.monotonic()
+        self._conversations.move_to_end(conversation_id)
+        while len(self._conversations) > self.max_conversations:
+            self._conversations.popitem(last=False)
+
+        return list(conversation.tweets)
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // _CHARS_PER_TOKEN + 1
+
+def build_context(thread: List[Dict], exclude_id: Optional[str] = None, token_budget: int = 500) -> str:
+    """
+    Armar el contexto del hilo para el LLM dentro de un presupuesto de tokens:
+    siempre el tweet raíz si cabe, y después los más recientes hacia atrás.
+    """
+    tweets = [tweet for tweet in thread if str(tweet["id"]) != str(exclude_id)]
+    if not tweets:
+        return ""
+
+    root, rest = tweets[0], tweets[1:]
+    budget = token_budget - estimate_tokens(root["text"])
+    if budget < 0:
+        root, rest = None, tweets
+        budget = token_budget
+
+    selected: List[Dict] = []
+    for tweet in reversed(rest):
+        cost = estimate_tokens(tweet["text"])
+        if cost > budget:
+            break
+        selected.append(tweet)
+        budget -= cost
+    selected.reverse()
+
+    lines = [root["text"]] if root else []
+    lines.extend(tweet["text"] for tweet in selected)
+    return "\n".join(lines)
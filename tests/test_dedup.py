@@ -0,0 +1,43 @@
+"""
+SimilarityIndex: los casi duplicados se detectan y los tweets distintos pasan
+"""
+from src.dedup import SimilarityIndex
+
+POSTED = [
+    "Story Protocol convierte tu propiedad intelectual en un activo programable #StoryProtocol",
+    "Los royalties on-chain pagan a cada creador de la cadena de remixes #Web3",
+    "Licenciar tu IP nunca fue tan fácil: términos claros y pagos automáticos #IP",
+]
+
+def _index(**kwargs) -> SimilarityIndex:
+    index = SimilarityIndex(**kwargs)
+    index.extend(POSTED)
+    return index
+
+def test_near_duplicates_are_caught():
+    index = _index()
+
+    # Mismo texto con otras mayúsculas, espacios y puntuación
+    assert index.is_duplicate("story protocol convierte tu propiedad intelectual en un activo programable!! #storyprotocol")
+    # Una palabra cambiada
+    assert index.is_duplicate("Los royalties on-chain le pagan a cada creador de la cadena de remixes #Web3")
+
+def test_distinct_tweets_pass():
+    index = _index()
+
+    assert not index.is_duplicate("Mi humano me dejó sin galletas y ni siquiera están registradas como IP #Bruh")
+    assert not index.is_duplicate("Los remixes son el nuevo meme: Story Protocol los rastrea on-chain #Web3")
+    assert index.max_similarity("texto completamente nuevo sin relación") < 0.3
+
+def test_threshold_is_configurable():
+    text = "Story Protocol convierte tu propiedad intelectual en un activo programable y remixable #StoryProtocol"
+
+    assert _index(threshold=0.6).is_duplicate(text)
+    assert not _index(threshold=0.9).is_duplicate(text)
+
+def test_lookback_evicts_old_tweets():
+    index = _index(lookback=2)
+
+    assert len(index) == 2
+    assert not index.is_duplicate(POSTED[0])
+    assert index.is_duplicate(POSTED[-1])
@@ -0,0 +1,84 @@
+"""
+JsonlHistoryStore: appends con fsync, recuperación de líneas corruptas tras
+un crash, compactación y migración del historial JSON antiguo.
+"""
+import json
+import os
+
+from src.storage import JsonlHistoryStore
+
+def _record(i: int) -> dict:
+    return {"type": "original", "content": f"tweet {i}", "tweet_id": str(i), "timestamp": f"2024-01-01T00:00:{i:02d}"}
+
+def _lines(path: str) -> list:
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read().splitlines()
+
+def test_append_persists_and_reads_recent(tmp_path):
+    path = str(tmp_path / "history.jsonl")
+    store = JsonlHistoryStore(path)
+    for i in range(5):
+        store.append(_record(i))
+    store.close()
+
+    reopened = JsonlHistoryStore(path)
+    assert len(reopened) == 5
+    assert [r["tweet_id"] for r in reopened.recent(2)] == ["3", "4"]
+    assert reopened.get_by_tweet_id("1")["content"] == "tweet 1"
+    assert reopened.has_content("  TWEET 2 ")
+
+def test_each_append_is_fsynced(tmp_path, monkeypatch):
+    synced = []
+    real_fsync = os.fsync
+    monkeypatch.setattr(os, "fsync", lambda fd: synced.append(fd) or real_fsync(fd))
+
+    store = JsonlHistoryStore(str(tmp_path / "history.jsonl"))
+    for i in range(3):
+        store.append(_record(i))
+    store.close()
+
+    # Uno por append, más el flush del cierre
+    assert len(synced) == 4
+
+def test_truncated_line_is_recovered(tmp_path):
+    path = str(tmp_path / "history.jsonl")
+    store = JsonlHistoryStore(path)
+    store.append(_record(0))
+    store.close()
+    # Un crash dejó el siguiente registro a medias
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('{"type": "original", "cont')
+
+    store = JsonlHistoryStore(path)
+    store.append(_record(1))
+    assert [r["tweet_id"] for r in store] == ["0", "1"]
+
+    store.maintain()
+    store.close()
+    assert [json.loads(line)["tweet_id"] for line in _lines(path)] == ["0", "1"]
+
+def test_compaction_trims_to_max_records(tmp_path):
+    path = str(tmp_path / "history.jsonl")
+    store = JsonlHistoryStore(path, compact_every=5, max_records=3)
+    for i in range(10):
+        store.append(_record(i))
+    store.close()
+
+    # Compactó en el append 5 y en el 10, quedando los últimos 3
+    assert [json.loads(line)["tweet_id"] for line in _lines(path)] == ["7", "8", "9"]
+    assert len(JsonlHistoryStore(path)) == 3
+
+def test_legacy_json_is_migrated_once(tmp_path):
+    path = str(tmp_path / "history.jsonl")
+    legacy = str(tmp_path / "history.json")
+    with open(legacy, 'w', encoding='utf-8') as f:
+        json.dump([_record(0), _record(1)], f, indent=2)
+
+    store = JsonlHistoryStore(path, legacy_path=legacy)
+    assert len(store) == 2
+    assert not os.path.exists(legacy)
+    assert os.path.exists(legacy + ".migrated")
+
+    store.append(_record(2))
+    store.close()
+    assert len(JsonlHistoryStore(path, legacy_path=legacy)) == 3
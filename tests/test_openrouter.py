@@ -0,0 +1,98 @@
+"""
+OpenRouterClient contra el servidor falso: las respuestas a menciones no se
+cachean, la clave del cache usa el modelo y max_tokens efectivos después del
+governor, cada llamada en streaming registra su latencia al primer token y
+cache_control solo marca prompts que alcanzan el mínimo cacheable.
+"""
+import asyncio
+
+from benchmarks.fake_servers import FakeServers
+from src.config import Config
+from src.llm.openrouter import OpenRouterClient
+from src.metrics import LLM_FIRST_TOKEN_LATENCY, REGISTRY
+
+def _config(servers: FakeServers, data_dir: str) -> type:
+    return Config.for_persona({
+        "name": "test",
+        "DATA_DIR": data_dir,
+        "OPENROUTER_API_URL": servers.openrouter_url,
+        "OPENROUTER_API_KEY": "test",
+    })
+
+async def _with_client(data_dir: str, scenario):
+    """Correr `scenario(client, servers)` con un cliente apuntando al servidor falso"""
+    servers = FakeServers(candidates=1)
+    await servers.start()
+    client = OpenRouterClient(config=_config(servers, data_dir))
+    try:
+        return await scenario(client, servers)
+    finally:
+        await client.close()
+        await servers.stop()
+
+def test_replies_skip_cache(tmp_path):
+    async def scenario(client, servers):
+        first = await client.generate_reply("@bruhbot gm")
+        second = await client.generate_reply("@bruhbot gm")
+        return first, second, servers.stats.requests["chat_completions"]
+
+    first, second, requests = asyncio.run(_with_client(str(tmp_path), scenario))
+
+    # Misma mención, dos peticiones: la segunda no repite el texto de la primera
+    assert requests == 2
+    assert first != second
+
+def test_cache_key_follows_economy_mode(tmp_path):
+    async def scenario(client, servers):
+        first = await client.generate_story_protocol_insight()
+        cached = await client.generate_story_protocol_insight()
+        # Gasto cerca del presupuesto diario: modo economía, otro modelo y menos tokens
+        client.governor.ledger.record(client.model, 0, 0, 0, client.config.LLM_DAILY_BUDGET * 0.9)
+        economy = await client.generate_story_protocol_insight()
+        return first, cached, economy, servers.stats.requests["chat_completions"]
+
+    first, cached, economy, requests = asyncio.run(_with_client(str(tmp_path), scenario))
+
+    assert cached == first
+    assert economy != first
+    assert requests == 2
+
+def test_streaming_records_first_token_latency_per_call(tmp_path, monkeypatch):
+    monkeypatch.setattr(REGISTRY, "enabled", True)
+
+    async def scenario(client, servers):
+        client.stream = True
+        key = (client.model,)
+        before = LLM_FIRST_TOKEN_LATENCY._values.get(key, [None, 0.0, 0])[2]
+        tweets = await asyncio.gather(*(client.generate_tweet() for _ in range(4)))
+        return tweets, LLM_FIRST_TOKEN_LATENCY._values[key][2] - before
+
+    tweets, observed = asyncio.run(_with_client(str(tmp_path), scenario))
+
+    assert all(tweets)
+    # Una observación por llamada concurrente, sin pisarse entre ellas
+    assert observed == 4
+
+def _system_content(client: OpenRouterClient, model: str):
+    messages = [client._system_message(), {"role": "user", "content": "gm"}]
+    return client._build_payload(model, messages, 100)["messages"][0]["content"]
+
+def test_cache_control_only_marks_cacheable_prompts(tmp_path):
+    # El prompt por defecto queda por debajo del prefijo mínimo cacheable
+    client = OpenRouterClient(config=Config.for_persona({"name": "test", "DATA_DIR": str(tmp_path)}))
+    assert isinstance(_system_content(client, "anthropic/claude-3-opus"), str)
+
+    # Una persona con mucho contexto supera el mínimo de Opus (1024) pero no el de Haiku (2048)
+    personality = {
+        **Config.BOT_PERSONALITY,
+        "catchphrases": [f"Frase de la persona número {i} sobre Story Protocol" for i in range(120)],
+    }
+    client = OpenRouterClient(config=Config.for_persona({
+        "name": "test",
+        "DATA_DIR": str(tmp_path),
+        "BOT_PERSONALITY": personality,
+    }))
+    [block] = _system_content(client, "anthropic/claude-3-opus")
+    assert block["cache_control"] == {"type": "ephemeral"}
+    assert isinstance(_system_content(client, "anthropic/claude-3-haiku"), str)
+    assert isinstance(_system_content(client, "meta-llama/llama-3.1-8b-instruct"), str)
@@ -0,0 +1,111 @@
+"""
+Outbox write-ahead: lo pendiente sobrevive a un crash y se publica al
+reanudar, un rechazo permanente de Twitter cierra la entrada y la
+compactación conserva el progreso de los hilos.
+"""
+import asyncio
+
+from aiohttp import web
+
+from benchmarks.fake_servers import FakeServers
+from src.bot import BruhBot
+from src.config import Config
+from src.drafts import DraftBuffer
+from src.outbox import Outbox
+
+class RejectingServers(FakeServers):
+    """Servidor falso que rechaza todo tweet con un 403"""
+
+    def __init__(self, detail: str, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.detail = detail
+
+    async def _create_tweet(self, request):
+        self.stats.requests["create_tweet"] = self.stats.requests.get("create_tweet", 0) + 1
+        return web.json_response(
+            {"title": "Forbidden", "detail": self.detail, "status": 403},
+            status=403
+        )
+
+def _config(servers: FakeServers, data_dir: str) -> type:
+    return Config.for_persona({
+        "name": "test",
+        "DATA_DIR": data_dir,
+        "TWITTER_API_BASE_URL": servers.twitter_url,
+        "TWITTER_API_KEY": "test",
+        "TWITTER_API_SECRET": "test",
+        "TWITTER_ACCESS_TOKEN": "test",
+        "TWITTER_ACCESS_TOKEN_SECRET": "test",
+        "RATE_LIMIT_MARGIN": 0.0,
+    })
+
+async def _post_pending(servers: FakeServers, data_dir: str, content: str):
+    """Dejar `content` pendiente en el outbox (como tras un crash) y reanudarlo en un bot nuevo"""
+    await servers.start()
+    config = _config(servers, data_dir)
+    config.ensure_directories()
+    Outbox(config.OUTBOX_FILE).add({"content": content, "kind": "tweet", "topic": "test"})
+
+    bot = BruhBot(config=config)
+    try:
+        tweet_id = await bot.post_once()
+        return tweet_id, Outbox(config.OUTBOX_FILE).pending(), bot.tweets_history.recent(1)
+    finally:
+        await bot.close()
+        await servers.stop()
+
+def test_pending_entry_is_posted_after_restart(tmp_path):
+    tweet_id, pending, history = asyncio.run(_post_pending(FakeServers(), str(tmp_path), "gm desde el outbox"))
+
+    assert tweet_id
+    assert pending == []
+    assert history[0]["tweet_id"] == tweet_id
+    assert history[0]["content"] == "gm desde el outbox"
+
+def test_permanent_rejection_settles_entry(tmp_path):
+    servers = RejectingServers("You are not permitted to perform this action.")
+    tweet_id, pending, history = asyncio.run(_post_pending(servers, str(tmp_path), "tweet rechazado"))
+
+    assert tweet_id is None
+    # Un 403 no se reintenta: la entrada sale del outbox en el primer intento
+    assert servers.stats.requests["create_tweet"] == 1
+    assert pending == []
+    assert history == []
+
+def test_compaction_keeps_thread_progress(tmp_path):
+    path = str(tmp_path / "outbox.jsonl")
+    outbox = Outbox(path, max_attempts=5)
+    done = outbox.add({"content": "ya salió"})
+    thread = outbox.add({"content": "hilo", "kind": "thread", "segments": ["uno", "dos", "tres"]})
+    outbox.mark_progress(thread["id"], "101")
+    outbox.mark_failed(thread["id"])
+    outbox.mark_done(done["id"], "100")
+
+    outbox.compact()
+    with open(path, 'r', encoding='utf-8') as f:
+        assert len(f.readlines()) == 1
+
+    [entry] = Outbox(path).pending()
+    assert entry["id"] == thread["id"]
+    assert entry["posted"] == ["101"]
+    assert entry["attempts"] == 1
+    assert entry["segments"] == ["uno", "dos", "tres"]
+
+def test_draft_stays_queued_until_registered(tmp_path):
+    path = str(tmp_path / "drafts.json")
+
+    async def scenario():
+        drafts = DraftBuffer(path)
+        await drafts.put({"content": "borrador"})
+
+        def failing_register(draft):
+            raise OSError("disco lleno")
+
+        try:
+            await drafts.take(failing_register)
+        except OSError:
+            pass
+        return await DraftBuffer(path).take(lambda draft: draft["content"])
+
+    # El registro en el outbox falló: el borrador sigue en la cola persistida
+    assert asyncio.run(scenario()) == "borrador"
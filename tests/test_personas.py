@@ -0,0 +1,88 @@
+"""
+PersonaRunner: cada persona corre supervisada, la caída de una no detiene a
+las demás, los pools compartidos se cierran después de que todas terminan y
+todas gastan de un mismo presupuesto del LLM.
+"""
+import asyncio
+
+from src.config import Config
+from src.personas import PersonaRunner, _shard_config
+
+class FakeBot:
+    """Bot mínimo que falla las primeras `failures` veces y después corre hasta ser cancelado"""
+
+    def __init__(self, config, events, failures=0):
+        self.config = config
+        self.events = events
+        self.failures = failures
+        self.starts = 0
+
+    async def run(self):
+        self.starts += 1
+        if self.starts <= self.failures:
+            raise RuntimeError("Twitter caído")
+        try:
+            await asyncio.Event().wait()
+        finally:
+            self.events.append(f"stopped {self.config.PERSONA_NAME}")
+
+class FakeRunner(PersonaRunner):
+    def __init__(self, failures, restart_delay):
+        super().__init__([{"name": name} for name in failures], restart_delay=restart_delay)
+        self.failures = failures
+        self.events = []
+
+    def _build_bots(self):
+        self.bots = [FakeBot(config, self.events, self.failures[config.PERSONA_NAME]) for config in self.configs]
+
+    async def close(self):
+        self.events.append("closed")
+
+async def _run_for(runner: PersonaRunner, seconds: float) -> None:
+    task = asyncio.create_task(runner.run())
+    await asyncio.sleep(seconds)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+def test_failed_persona_does_not_stop_the_others():
+    runner = FakeRunner({"bruh": 0, "luna": 1}, restart_delay=0)
+    asyncio.run(_run_for(runner, 0.05))
+
+    bruh, luna = runner.bots
+    assert bruh.starts == 1
+    assert luna.starts == 1
+    # La persona sana siguió corriendo hasta la cancelación, y el cierre fue lo último
+    assert runner.events == ["stopped bruh", "closed"]
+
+def test_failed_persona_is_restarted():
+    runner = FakeRunner({"bruh": 0, "luna": 2}, restart_delay=0.01)
+    asyncio.run(_run_for(runner, 0.2))
+
+    bruh, luna = runner.bots
+    assert luna.starts == 3
+    assert sorted(runner.events[:-1]) == ["stopped bruh", "stopped luna"]
+    assert runner.events[-1] == "closed"
+
+def test_personas_share_one_llm_budget(tmp_path):
+    credentials = {var: "test" for var in Config.CREDENTIAL_VARS + ["OPENROUTER_API_KEY"]}
+    base = type("Config_test", (Config,), {"DATA_DIR": str(tmp_path), "LLM_USAGE_FILE": str(tmp_path / "llm_usage.json")})
+    runner = PersonaRunner(
+        [{"name": name, "DATA_DIR": str(tmp_path / name), **credentials} for name in ("bruh", "luna")],
+        base_config=base
+    )
+
+    async def scenario():
+        runner._build_bots()
+        await runner.close()
+        return [bot.llm.governor for bot in runner.bots]
+
+    governors = asyncio.run(scenario())
+
+    assert governors[0] is governors[1] is runner.governor
+    assert runner.governor.ledger.path == base.LLM_USAGE_FILE
+
+def test_shards_split_the_budget():
+    config = _shard_config(1, 4)
+
+    assert config.LLM_DAILY_BUDGET == Config.LLM_DAILY_BUDGET / 4
+    assert config.LLM_USAGE_FILE.endswith("llm_usage.shard1.json")
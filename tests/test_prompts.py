@@ -0,0 +1,31 @@
+"""
+Template de hilos: solo la idea educativa del topic y numeración coherente
+con la que agrega format_thread
+"""
+from src.knowledge.prompts.story_protocol import (
+    EDUCATIONAL_PROMPTS,
+    STORY_PROTOCOL_TOPICS,
+    get_thread_template,
+)
+
+def test_thread_template_includes_only_the_topic_prompt():
+    topic = STORY_PROTOCOL_TOPICS[0]
+    prompt = get_thread_template(topic, 5)
+
+    assert EDUCATIONAL_PROMPTS[topic["prompt"]] in prompt
+    others = [text for key, text in EDUCATIONAL_PROMPTS.items() if key != topic["prompt"]]
+    assert not any(text in prompt for text in others)
+
+def test_topic_without_prompt_has_no_ideas():
+    prompt = get_thread_template({"topic": "gm", "tags": ["ai"]}, 5)
+
+    assert not any(text in prompt for text in EDUCATIONAL_PROMPTS.values())
+
+def test_every_topic_prompt_exists():
+    assert all(topic["prompt"] in EDUCATIONAL_PROMPTS for topic in STORY_PROTOCOL_TOPICS)
+
+def test_numbering_is_left_to_format_thread():
+    prompt = get_thread_template(STORY_PROTOCOL_TOPICS[0], 5)
+
+    assert "No numerar los tweets" in prompt
+    assert '"1/N" se agrega al publicar' in prompt
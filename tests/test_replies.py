@@ -0,0 +1,127 @@
+"""
+ReplyEngine contra los servidores falsos: ni un error de la API de menciones
+ni un presupuesto agotado mueven el checkpoint since_id, y una caída de
+Twitter al arrancar no detiene al bot.
+"""
+import asyncio
+import json
+import os
+
+from benchmarks.fake_servers import FakeServers, FaultProfile
+from src.bot import BruhBot
+from src.config import Config
+from src.llm.openrouter import OpenRouterClient
+from src.replies import ReplyEngine
+from src.scheduler import Scheduler, SimulatedClock
+from src.storage import JsonlHistoryStore
+from src.twitter.api import TwitterAPI
+
+def _config(servers: FakeServers, data_dir: str) -> type:
+    return Config.for_persona({
+        "name": "test",
+        "DATA_DIR": data_dir,
+        "TWITTER_API_BASE_URL": servers.twitter_url,
+        "TWITTER_API_KEY": "test",
+        "TWITTER_API_SECRET": "test",
+        "TWITTER_ACCESS_TOKEN": "test",
+        "TWITTER_ACCESS_TOKEN_SECRET": "test",
+        "OPENROUTER_API_URL": servers.openrouter_url,
+        "OPENROUTER_API_KEY": "test",
+        "RATE_LIMIT_MARGIN": 0.0,
+    })
+
+def test_failed_bootstrap_is_retried_without_replying(tmp_path):
+    async def scenario():
+        servers = FakeServers(twitter=FaultProfile(error_rate=1.0))
+        await servers.start()
+        config = _config(servers, str(tmp_path))
+        api = TwitterAPI(config=config)
+        llm = OpenRouterClient(config=config)
+        history = JsonlHistoryStore(config.TWEETS_HISTORY_FILE)
+        replies = []
+        engine = ReplyEngine(
+            api, llm, history, config.REPLY_STATE_FILE,
+            record_reply=lambda text, tweet_id, mention_id: replies.append(mention_id),
+            post_spacing=0
+        )
+        try:
+            # Twitter caído: el primer poll no puede inicializar el checkpoint
+            failed = await engine.poll_once()
+            state = (engine._bootstrapped, engine.since_id, os.path.exists(config.REPLY_STATE_FILE))
+
+            # Twitter se recupera: el siguiente poll inicializa sin responder nada
+            servers.twitter = FaultProfile()
+            bootstrapped = await engine.poll_once()
+            checkpoint = engine.since_id
+
+            # Desde ahí solo se responden las menciones nuevas
+            handled = await engine.poll_once()
+            return failed, state, bootstrapped, checkpoint, handled, replies
+        finally:
+            await llm.close()
+            await api.close()
+            await servers.stop()
+
+    failed, state, bootstrapped, checkpoint, handled, replies = asyncio.run(scenario())
+
+    assert failed == 0
+    assert state == (False, None, False)
+    assert bootstrapped == 0
+    assert checkpoint is not None
+    assert handled == len(replies) == 10
+    assert all(int(mention_id) > int(checkpoint) for mention_id in replies)
+
+def test_paused_governor_keeps_checkpoint(tmp_path):
+    async def scenario():
+        servers = FakeServers()
+        await servers.start()
+        config = _config(servers, str(tmp_path))
+        with open(config.REPLY_STATE_FILE, 'w', encoding='utf-8') as f:
+            json.dump({"since_id": "1"}, f)
+        api = TwitterAPI(config=config)
+        llm = OpenRouterClient(config=config)
+        history = JsonlHistoryStore(config.TWEETS_HISTORY_FILE)
+        replies = []
+        engine = ReplyEngine(
+            api, llm, history, config.REPLY_STATE_FILE,
+            record_reply=lambda text, tweet_id, mention_id: replies.append(mention_id),
+            post_spacing=0
+        )
+        try:
+            # El gasto del día supera LLM_DAILY_BUDGET: el governor pausa la generación
+            llm.governor.ledger.record(config.OPENROUTER_MODEL, 0, 0, 0, config.LLM_DAILY_BUDGET * 2)
+            handled = await engine.poll_once()
+            return handled, engine.since_id, servers.stats.requests.get("mentions", 0), replies
+        finally:
+            await llm.close()
+            await api.close()
+            await servers.stop()
+
+    handled, since_id, mention_requests, replies = asyncio.run(scenario())
+
+    assert handled == 0
+    assert since_id == "1"
+    # Las menciones ni se piden: quedan para cuando se libere el presupuesto
+    assert mention_requests == 0
+    assert replies == []
+
+def test_bot_survives_twitter_outage_at_startup(tmp_path):
+    async def scenario():
+        servers = FakeServers(twitter=FaultProfile(error_rate=1.0))
+        await servers.start()
+        bot = BruhBot(config=_config(servers, str(tmp_path)), scheduler=Scheduler(clock=SimulatedClock()))
+        task = asyncio.create_task(bot.run())
+        try:
+            # El poll de menciones falla al resolver el ID del usuario y el bot sigue
+            await asyncio.sleep(0.3)
+            return task.done(), servers.stats.requests.get("users_me", 0)
+        finally:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            await bot.close()
+            await servers.stop()
+
+    crashed, user_lookups = asyncio.run(scenario())
+
+    assert not crashed
+    assert user_lookups >= 1
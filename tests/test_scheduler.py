@@ -0,0 +1,94 @@
+"""
+Scheduler sobre SimulatedClock: una semana de jobs corre en milisegundos y
+los deadlines se mantienen en la grilla aunque las ejecuciones tarden.
+"""
+import asyncio
+import time
+
+import pytest
+
+from src.scheduler import MISSED_CATCH_UP, MISSED_RUN_ONCE, MISSED_SKIP, Scheduler, SimulatedClock
+
+WEEK = 7 * 24 * 60 * 60
+
+async def _run_for(scheduler: Scheduler, clock: SimulatedClock, seconds: float) -> None:
+    task = asyncio.create_task(scheduler.run())
+    try:
+        await clock.advance(seconds)
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+def test_simulated_week_is_drift_free():
+    async def scenario():
+        clock = SimulatedClock()
+        scheduler = Scheduler(clock=clock)
+        posts, replies = [], []
+
+        async def post():
+            posts.append(clock.now())
+            # Generar y postear tarda; no debe correr los deadlines siguientes
+            await clock.sleep(120)
+
+        async def reply():
+            replies.append(clock.now())
+
+        scheduler.add_job("post", post, 1800)
+        scheduler.add_job("replies", reply, 300)
+        await _run_for(scheduler, clock, WEEK)
+        return posts, replies, scheduler.stats()
+
+    start = time.perf_counter()
+    posts, replies, stats = asyncio.run(scenario())
+    elapsed = time.perf_counter() - start
+
+    assert posts == [i * 1800 for i in range(WEEK // 1800 + 1)]
+    assert replies == [i * 300 for i in range(WEEK // 300 + 1)]
+    assert stats["post"]["max_lateness"] == 0
+    assert stats["post"]["skipped"] == stats["replies"]["skipped"] == 0
+    assert elapsed < 5
+
+@pytest.mark.parametrize("policy, expected_runs, expected_skipped", [
+    (MISSED_SKIP, 0, 11),
+    (MISSED_RUN_ONCE, 1, 10),
+    (MISSED_CATCH_UP, 11, 0),
+])
+def test_missed_run_policies(policy, expected_runs, expected_skipped):
+    async def scenario():
+        clock = SimulatedClock()
+        scheduler = Scheduler(clock=clock, misfire_grace=5)
+        runs = []
+
+        async def job():
+            runs.append(clock.now())
+
+        scheduler.add_job("job", job, 100, missed=policy)
+        # El proceso estuvo suspendido: el reloj saltó 1050 s sin que nada corriera
+        await clock.advance(1050)
+        await _run_for(scheduler, clock, 0)
+        return runs, scheduler.get_job("job")
+
+    runs, job = asyncio.run(scenario())
+
+    assert len(runs) == expected_runs
+    assert job.skipped == expected_skipped
+    # Después del atraso la grilla sigue en múltiplos del intervalo
+    assert job.next_run == 1100
+
+def test_overlapping_runs_are_skipped():
+    async def scenario():
+        clock = SimulatedClock()
+        scheduler = Scheduler(clock=clock)
+
+        async def slow():
+            await clock.sleep(250)
+
+        scheduler.add_job("slow", slow, 100, max_concurrency=1)
+        await _run_for(scheduler, clock, 1000)
+        return scheduler.get_job("slow")
+
+    job = asyncio.run(scenario())
+
+    # Corre en 0, 300, 600 y 900; las ejecuciones intermedias se saltan
+    assert job.runs == 3
+    assert job.skipped == 7
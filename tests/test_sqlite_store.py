@@ -0,0 +1,82 @@
+"""
+SqliteHistoryStore: consultas indexadas, lecturas desde otros hilos mientras
+se escribe y migración única del historial JSONL.
+"""
+import os
+import threading
+from datetime import datetime, timedelta
+
+from src.bot import BruhBot
+from src.config import Config
+from src.storage import JsonlHistoryStore, SqliteHistoryStore
+
+def _record(i: int, **extra) -> dict:
+    return {
+        "type": "original",
+        "topic": "ip",
+        "content": f"tweet número {i}",
+        "tweet_id": str(1000 + i),
+        "timestamp": (datetime(2024, 1, 1) + timedelta(hours=i)).isoformat(),
+        **extra
+    }
+
+def test_queries(tmp_path):
+    store = SqliteHistoryStore(str(tmp_path / "history.db"))
+    for i in range(5):
+        store.append(_record(i))
+    store.append(_record(5, type="reply", topic=None))
+
+    assert len(store) == 6
+    assert [r["tweet_id"] for r in store.recent(2)] == ["1004", "1005"]
+    assert [r["tweet_id"] for r in store.find(tweet_type="original", since=datetime(2024, 1, 1, 3))] == ["1004", "1003"]
+    assert len(store.find(topic="ip", limit=2)) == 2
+    assert store.has_content("  TWEET número 2 ")
+    assert not store.has_content("tweet número 9")
+    assert store.get_by_tweet_id("1003")["content"] == "tweet número 3"
+    store.close()
+
+def test_reads_from_other_threads_while_writing(tmp_path):
+    store = SqliteHistoryStore(str(tmp_path / "history.db"))
+    errors = []
+    counts = []
+
+    def reader():
+        try:
+            for _ in range(50):
+                counts.append(len(store))
+                store.recent(5)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=reader) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for i in range(200):
+        store.append(_record(i))
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert all(0 <= count <= 200 for count in counts)
+    assert len(store) == 200
+    store.close()
+
+def test_jsonl_history_is_imported_once(tmp_path):
+    config = Config.for_persona({"name": "test", "DATA_DIR": str(tmp_path), "HISTORY_BACKEND": "sqlite"})
+    config.ensure_directories()
+    jsonl = JsonlHistoryStore(config.TWEETS_HISTORY_FILE)
+    for i in range(3):
+        jsonl.append(_record(i))
+    jsonl.close()
+
+    bot = BruhBot(config=config)
+    assert len(bot.tweets_history) == 3
+    bot.tweets_history.close()
+
+    assert not os.path.exists(config.TWEETS_HISTORY_FILE)
+    assert os.path.exists(config.TWEETS_HISTORY_FILE + ".migrated")
+
+    # El segundo arranque no vuelve a importar
+    bot = BruhBot(config=config)
+    assert len(bot.tweets_history) == 3
+    bot.tweets_history.close()
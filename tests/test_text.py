@@ -0,0 +1,91 @@
+"""
+Largo ponderado de twitter-text v3 y recortes que conservan los hashtags
+"""
+import pytest
+
+from src.twitter.text import (
+    TWEET_MAX_LENGTH,
+    URL_LENGTH,
+    fit_tweet_length,
+    format_thread,
+    is_valid_tweet,
+    weighted_length,
+)
+
+@pytest.mark.parametrize("url", [
+    "https://storyprotocol.xyz",
+    "https://example.com/" + "a" * 200,
+    "www.example.org/ip",
+    "storyprotocol.xyz",
+])
+def test_urls_weigh_23(url):
+    assert weighted_length(url) == URL_LENGTH
+    assert weighted_length(f"mira {url} ya") == len("mira  ya") + URL_LENGTH
+
+def test_url_trailing_punctuation_is_not_part_of_the_link():
+    assert weighted_length("https://example.com.") == URL_LENGTH + 1
+
+@pytest.mark.parametrize("text, expected", [
+    ("hola", 4),
+    ("ñandú", 5),
+    ("日本語", 6),
+    ("한국어", 6),
+    ("“comillas”", 10),
+])
+def test_code_point_weights(text, expected):
+    assert weighted_length(text) == expected
+
+@pytest.mark.parametrize("emoji", [
+    "🐕",
+    "👍🏽",  # Tono de piel
+    "👨‍👩‍👧‍👦",  # Secuencia ZWJ
+    "🇦🇷",  # Bandera
+    "1️⃣",  # Keycap
+    "❤️",
+])
+def test_each_emoji_weighs_2(emoji):
+    assert weighted_length(emoji) == 2
+    assert weighted_length(f"a{emoji}b") == 4
+
+def test_cjk_tweet_limit_is_half_the_characters():
+    assert is_valid_tweet("字" * 140)
+    assert not is_valid_tweet("字" * 141)
+
+def test_short_tweet_is_unchanged():
+    text = "gm chihuahuas #StoryProtocol"
+    assert fit_tweet_length(text) == text
+
+def test_trim_keeps_trailing_hashtags():
+    body = " ".join(f"palabra{i}" for i in range(60))
+    result = fit_tweet_length(f"{body} #StoryProtocol #Web3")
+
+    assert weighted_length(result) <= TWEET_MAX_LENGTH
+    assert result.endswith("… #StoryProtocol #Web3")
+
+def test_trim_adds_missing_topic_hashtags():
+    body = " ".join(f"palabra{i}" for i in range(60))
+    result = fit_tweet_length(f"{body} #Web3", hashtags="#StoryProtocol #IP")
+
+    assert weighted_length(result) <= TWEET_MAX_LENGTH
+    assert result.endswith("#Web3 #StoryProtocol #IP")
+
+def test_trim_prefers_sentence_end():
+    first = "Story Protocol convierte la propiedad intelectual en un activo programable. " * 3
+    result = fit_tweet_length(first + "x" * 200 + " #Web3")
+
+    assert result.endswith(". #Web3")
+    assert "…" not in result
+
+def test_trim_counts_emoji_and_cjk_weight():
+    result = fit_tweet_length("🐕字" * 100 + " #Bruh")
+
+    assert weighted_length(result) <= TWEET_MAX_LENGTH
+    assert result.endswith("#Bruh")
+
+def test_thread_segments_leave_room_for_numbering():
+    segments = ["a" * 300, "b" * 300, "final"]
+    thread = format_thread(segments, hashtags="#StoryProtocol")
+
+    assert [t[-4:] for t in thread] == [" 1/3", " 2/3", " 3/3"]
+    assert all(weighted_length(t) <= TWEET_MAX_LENGTH for t in thread)
+    assert thread[-1] == "final #StoryProtocol 3/3"
@@ -0,0 +1,75 @@
+"""
+Concurrencia de TwitterAPI contra un servidor v2 falso con latencia: las
+llamadas bloqueantes de tweepy corren en paralelo en el executor y el
+semáforo de cada endpoint acota cuántas salen a la vez.
+"""
+import asyncio
+import time
+
+from benchmarks.fake_servers import FakeServers, FaultProfile
+from src.config import Config
+from src.twitter.api import TwitterAPI
+
+LATENCY = 0.3
+CALLS = 6
+
+class CountingServers(FakeServers):
+    """Servidor falso que registra cuántas peticiones atiende a la vez"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.in_flight = 0
+        self.peak = 0
+
+    async def _inject(self, route, profile):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            return await super()._inject(route, profile)
+        finally:
+            self.in_flight -= 1
+
+def _config(servers: FakeServers, data_dir: str, post_concurrency: int) -> type:
+    return Config.for_persona({
+        "name": "test",
+        "DATA_DIR": data_dir,
+        "TWITTER_API_BASE_URL": servers.twitter_url,
+        "TWITTER_API_KEY": "test",
+        "TWITTER_API_SECRET": "test",
+        "TWITTER_ACCESS_TOKEN": "test",
+        "TWITTER_ACCESS_TOKEN_SECRET": "test",
+        "TWITTER_MAX_WORKERS": CALLS,
+        "TWITTER_ENDPOINT_CONCURRENCY": {**Config.TWITTER_ENDPOINT_CONCURRENCY, "post": post_concurrency},
+        "RATE_LIMIT_MARGIN": 0.0,
+    })
+
+async def _post_concurrently(data_dir: str, post_concurrency: int):
+    """Postear CALLS tweets a la vez; devuelve los IDs, la duración y el pico en el servidor"""
+    servers = CountingServers(twitter=FaultProfile(latency=LATENCY))
+    await servers.start()
+    api = TwitterAPI(config=_config(servers, data_dir, post_concurrency))
+    try:
+        # Crear el cliente y la sesión fuera de la medición
+        await api.get_user_id()
+        start = time.perf_counter()
+        ids = await asyncio.gather(*(api.post_tweet(f"tweet concurrente {i}") for i in range(CALLS)))
+        return ids, time.perf_counter() - start, servers.peak
+    finally:
+        await api.close()
+        await servers.stop()
+
+def test_concurrent_calls_run_in_parallel(tmp_path):
+    ids, elapsed, peak = asyncio.run(_post_concurrently(str(tmp_path), post_concurrency=CALLS))
+
+    assert all(ids)
+    assert peak == CALLS
+    # En serie tardaría CALLS * LATENCY; en paralelo, cerca de una sola latencia
+    assert elapsed < 2 * LATENCY
+
+def test_endpoint_semaphore_limits_concurrency(tmp_path):
+    ids, elapsed, peak = asyncio.run(_post_concurrently(str(tmp_path), post_concurrency=2))
+
+    assert all(ids)
+    assert peak == 2
+    # Tres tandas de dos llamadas
+    assert elapsed >= 3 * LATENCY * 0.9